@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Supporto comune ai server del controller in modalità grpc.aio.
+
+Gli handler sono coroutine: la logica esistente (sqlite, calcolo dei path, SSH)
+resta sincrona e gira in executor limitati, così un client lento occupa un
+thread solo mentre lavora e gli stream aperti non ne occupano nessuno.
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent import futures
+
+#thread per il lavoro bloccante chiamato dagli handler async
+BLOCKING_WORKERS = 32
+
+class AbortRpc(Exception):
+    """context.abort() chiamato dalla logica sincrona: l'handler async chiude la RPC"""
+    def __init__(self, code, details):
+        super().__init__(details)
+        self.code = code
+        self.details = details
+
+class ContextProxy:
+    """ServicerContext sincrono sopra quello grpc.aio, per la logica eseguita negli executor"""
+    def __init__(self, context):
+        self.context = context
+        #letti sul loop: dagli executor si usano solo le copie
+        self.client_peer = context.peer()
+        self.client_auth = context.auth_context()
+        self.finished = threading.Event()
+        context.add_done_callback(lambda _: self.finished.set())
+
+    def peer(self):
+        return self.client_peer
+
+    def auth_context(self):
+        return self.client_auth
+
+    def is_active(self):
+        return not self.finished.is_set()
+
+    def abort(self, code, details):
+        raise AbortRpc(code, details)
+
+class BlockingExecutor:
+    """ThreadPoolExecutor limitato in cui gli handler async spostano le chiamate bloccanti"""
+    def __init__(self, max_workers=BLOCKING_WORKERS, name='blocking'):
+        self.pool = futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+
+    async def call(self, context, function, *args):
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.pool, functools.partial(function, *args))
+        except AbortRpc as e:
+            await context.abort(e.code, e.details)
+
+    async def stream(self, context, iterator):
+        """Consuma un generatore bloccante un elemento alla volta nell'executor"""
+        loop = asyncio.get_running_loop()
+        done = object()
+        try:
+            while True:
+                item = await loop.run_in_executor(self.pool, next, iterator, done)
+                if item is done:
+                    return
+                yield item
+        except AbortRpc as e:
+            await context.abort(e.code, e.details)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False)
+
+class LoopQueue:
+    """Coda alimentata da thread qualsiasi (put) e consumata da una coroutine sul loop (get)"""
+    def __init__(self, loop=None):
+        self.loop = loop or asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    def put(self, item):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, item)
+
+    async def get(self):
+        return await self.queue.get()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Lettura incrementale dell'output JSON di vtysh ('show ip bgp json').
+
+La tabella completa non viene mai decodificata tutta insieme: dal pipe si legge
+a pezzi e si decodifica un membro di "routes" alla volta (raw_decode), così la
+memoria resta quella di un prefisso e l'estrazione parte prima che vtysh finisca.
+"""
+
+import codecs
+import json
+import re
+import subprocess
+import tempfile
+import threading
+
+SHOW_BGP_JSON = ['vtysh', '-c', 'show ip bgp json']
+#una tabella completa impiega ben più dei 10 secondi usati per il dump in memoria
+VTYSH_TIMEOUT = 120
+READ_SIZE = 65536
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+class JsonStream:
+    """Testo JSON che arriva a pezzi: un valore alla volta, tenendo in memoria solo quello"""
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def fill(self):
+        """Aggiunge il pezzo successivo scartando quanto già letto; False a fine input"""
+        if self.eof:
+            return False
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def error(self, message):
+        return json.JSONDecodeError(message, self.buffer, self.pos)
+
+    def peek(self):
+        """Primo carattere dopo gli spazi ('' a fine input)"""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise self.error(f"Expecting {char!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decodifica il prossimo valore completo, leggendo altri pezzi finché serve"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            #un numero a fine buffer potrebbe continuare nel pezzo successivo
+            if end == len(self.buffer) and isinstance(value, (int, float)) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+    def members(self):
+        """Chiavi dell'oggetto che inizia qui; dopo ogni chiave il chiamante legge il valore"""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise self.error("Expecting property name")
+            self.expect(':')
+            yield key
+            separator = self.peek()
+            self.pos += 1
+            if separator == '}':
+                return
+            if separator != ',':
+                raise self.error("Expecting ',' delimiter")
+
+def iter_members(chunks, key):
+    """(nome, valore) dei membri dell'oggetto top-level `key`; gli altri membri vengono scartati"""
+    stream = JsonStream(chunks)
+    for name in stream.members():
+        if name != key:
+            stream.value()
+            continue
+        for member in stream.members():
+            yield member, stream.value()
+
+def read_pipe(pipe, read_size=READ_SIZE):
+    """Testo dal pipe appena disponibile (anche a metà di un carattere UTF-8)"""
+    decoder = codecs.getincrementaldecoder('utf-8')('replace')
+    while True:
+        data = pipe.read1(read_size)
+        if not data:
+            tail = decoder.decode(b'', final=True)
+            if tail:
+                yield tail
+            return
+        yield decoder.decode(data)
+
+def iter_bgp_routes(command=SHOW_BGP_JSON, timeout=VTYSH_TIMEOUT):
+    """(prefisso, AS path, bestpath) per ogni percorso della tabella BGP, mentre vtysh la stampa.
+
+    Solleva subprocess.TimeoutExpired oltre timeout secondi, RuntimeError se vtysh fallisce.
+    """
+    #stderr su file: un pipe pieno di warning bloccherebbe vtysh (e lo stdout) fino al timeout
+    errors = tempfile.TemporaryFile()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=errors)
+    expired = threading.Event()
+
+    def stderr_text():
+        errors.seek(0)
+        return errors.read().decode('utf-8', 'replace').strip()
+
+    def kill():
+        expired.set()
+        process.kill()
+
+    timer = threading.Timer(timeout, kill)
+    timer.daemon = True
+    timer.start()
+    try:
+        try:
+            for prefix, entries in iter_members(read_pipe(process.stdout), 'routes'):
+                for entry in entries:
+                    yield prefix, entry.get("path") or '', entry.get("bestpath") or False
+        except json.JSONDecodeError:
+            if expired.is_set():
+                raise subprocess.TimeoutExpired(command, timeout)
+            #output troncato o non JSON perché vtysh è fallito: meglio il suo errore
+            if process.wait() != 0:
+                raise RuntimeError(f"vtysh: {stderr_text()}")
+            raise
+
+        process.wait()
+        if expired.is_set():
+            raise subprocess.TimeoutExpired(command, timeout)
+        if process.returncode != 0:
+            raise RuntimeError(f"vtysh: {stderr_text()}")
+    finally:
+        timer.cancel()
+        if process.poll() is None:
+            #consumatore che si ferma prima della fine della tabella
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        errors.close()
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import grpc
+import argparse
 import subprocess
 import json
 import sys
@@ -13,11 +14,22 @@ import traceback
 sys.path.append('/shared')
 import bgp_segments_pb2
 import bgp_segments_pb2_grpc
+import bgp_json_stream
 
 CERT_DIR = '/shared/certs'
 CA_CERT = os.path.join(CERT_DIR, "ca.crt")
 CONTROLLER_PORT = 50052
 RETRY_INTERVAL = 5
+#path per blocco dello stream: messaggi piccoli qualunque sia la dimensione della tabella
+CHUNK_PATHS = 500
+STREAM_TIMEOUT = 300
+#ultimo report accettato dal controller: i successivi mandano solo le differenze
+STATE_FILE = '/var/tmp/bgp_segments_state.json'
+#oltre questa frazione di path cambiati si rimanda il report completo
+DELTA_MAX_FRACTION = 0.5
+#modalità daemon: riepilogo BGP (economico) ogni POLL_INTERVAL, tabella completa almeno ogni REFRESH_INTERVAL
+POLL_INTERVAL = 10
+REFRESH_INTERVAL = 600
 
 def get_asn_from_frr():
     try:
@@ -42,54 +54,31 @@ def get_asn_from_frr():
         print(f"Error from FRR: {e}")
         return None
 
-def extract_bgp_paths():
-    try:
-        result = subprocess.run(
-            ['vtysh', '-c', 'show ip bgp json'],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-        
-        if result.returncode != 0:
-            print(f"Error vtysh: {result.stderr}")
-            return []
-        
-        bgp_data = json.loads(result.stdout)
-        routes = bgp_data.get("routes", {})
-        paths = []
-        
-        for prefix, route_info in routes.items():
-            for entry in route_info:
-                path = entry.get("path") or ''
-                best = entry.get("bestpath") or False
-                if path:
-                    as_sequence = [
-                        int(asn) for asn in path.split() 
-                        if asn.isdigit()
-                    ]
-                    if as_sequence and as_sequence not in paths:
-                        paths.append(as_sequence)
-                    if best:
-                        print(path, best)
-        return paths
-        
-    except subprocess.TimeoutExpired:
-        print("Timeout vtysh")
-        return []
-    except json.JSONDecodeError as e:
-        print(f"Error JSON: {e}")
-        return []
-    except Exception as e:
-        print(f"Error: {e}")
-        return []
+def iter_bgp_paths():
+    """AS path unici della tabella BGP, uno alla volta.
+    
+    Gli errori di vtysh si propagano: una tabella illeggibile non deve sembrare vuota
+    (ritirerebbe tutti i segmenti dell'AS). L'output di vtysh viene letto a pezzi
+    (bgp_json_stream): la tabella non è mai tutta in memoria.
+    """
+    seen = set()
+    
+    for _, path, _ in bgp_json_stream.iter_bgp_routes():
+        if path:
+            as_sequence = [
+                int(asn) for asn in path.split() 
+                if asn.isdigit()
+            ]
+            if as_sequence and tuple(as_sequence) not in seen:
+                seen.add(tuple(as_sequence))
+                yield as_sequence
 
 def calculate_segments_from_paths(paths, local_asn):
     segments = set()
 
     for path in paths:
         if path and path[0] != local_asn:
-            full_path = [local_asn] + path
+            full_path = [local_asn] + list(path)
         else:
             full_path = path
             
@@ -204,88 +193,228 @@ def find_controller():
     
     return None
 
-def send_bgp_data(controller_ip, local_asn):
-    """Invia dati BGP (con segmenti calcolati) al controller"""
+def segments_msg(segments):
+    return [bgp_segments_pb2.Segment(as_a=seg[0], as_b=seg[1]) for seg in segments]
+
+def paths_msg(paths):
+    return [bgp_segments_pb2.AsPath(as_sequence=path) for path in paths]
+
+def networks_msg(networks):
+    return [
+        bgp_segments_pb2.Network(network=net['network'], interface=net['interface'], is_ipv6=net['is_ipv6'])
+        for net in networks
+    ]
+
+def build_request(local_asn, paths, segments, networks, sequence=0):
+    return bgp_segments_pb2.BgpDataRequest(
+        local_asn=local_asn,
+        sequence=sequence,
+        segments=segments_msg(segments),
+        paths=paths_msg(paths),
+        networks=networks_msg(networks)
+    )
+
+def report_chunks(local_asn, paths, networks, sequence=0, chunk_paths=CHUNK_PATHS):
+    """Report a blocchi di al più chunk_paths path, con i segmenti non ancora inviati.
+    
+    Le reti viaggiano nel primo blocco; ne parte almeno uno anche con la tabella vuota.
+    """
+    sent_segments = set()
+    batch = []
+    first = True
+    
+    def chunk():
+        segments = [seg for seg in calculate_segments_from_paths(batch, local_asn) if seg not in sent_segments]
+        sent_segments.update(segments)
+        return build_request(local_asn, batch, segments, networks if first else [], sequence)
+    
+    for path in paths:
+        batch.append(path)
+        if len(batch) >= chunk_paths:
+            yield chunk()
+            batch = []
+            first = False
+    if batch or first:
+        yield chunk()
+
+def open_channel(controller_ip):
+    """Canale TLS verso il controller, None senza certificato CA"""
+    address = f"{controller_ip}:{CONTROLLER_PORT}"
+    
+    try:
+        with open(CA_CERT, 'rb') as f:
+            ca_cert = f.read()
+    except FileNotFoundError:
+        print(f"[client] Errore: Certificato CA non trovato in {CA_CERT}")
+        return None
+    
+    credentials = grpc.ssl_channel_credentials(root_certificates=ca_cert)
+    
+    return grpc.secure_channel(
+        address,
+        credentials,
+        options=[
+            ('grpc.ssl_target_name_override', 'ctrl'),
+            ('grpc.keepalive_time_ms', 30000),
+            ('grpc.keepalive_timeout_ms', 10000),
+        ]
+    )
+
+def load_state(local_asn, state_file=STATE_FILE):
+    """Ultimo report accettato (sequenza, path, reti), None se assente o di un altro AS"""
+    try:
+        with open(state_file) as f:
+            state = json.load(f)
+        if state.get('asn') != local_asn:
+            return None
+        return {
+            'sequence': state['sequence'],
+            'paths': {tuple(path) for path in state['paths']},
+            'networks': state['networks']
+        }
+    except (OSError, ValueError, KeyError):
+        return None
+
+def save_state(local_asn, sequence, paths, networks, state_file=STATE_FILE):
+    tmp_file = state_file + '.tmp'
+    try:
+        with open(tmp_file, 'w') as f:
+            json.dump({
+                'asn': local_asn,
+                'sequence': sequence,
+                'paths': sorted(paths),
+                'networks': networks
+            }, f)
+        os.replace(tmp_file, state_file)
+    except OSError as e:
+        #senza stato il prossimo report sarà completo
+        print(f"Cannot save report state: {e}")
+
+def network_key(net):
+    return (net['network'], net['interface'], net['is_ipv6'])
+
+def build_delta(local_asn, state, paths, networks):
+    """Differenze tra lo stato riportato e quello attuale, con la sequenza successiva"""
+    old_segments = set(calculate_segments_from_paths(state['paths'], local_asn))
+    new_segments = set(calculate_segments_from_paths(paths, local_asn))
+    old_networks = {network_key(net): net for net in state['networks']}
+    new_networks = {network_key(net): net for net in networks}
+    
+    return bgp_segments_pb2.BgpDeltaRequest(
+        local_asn=local_asn,
+        sequence=state['sequence'] + 1,
+        added_segments=segments_msg(sorted(new_segments - old_segments)),
+        withdrawn_segments=segments_msg(sorted(old_segments - new_segments)),
+        added_paths=paths_msg(sorted(paths - state['paths'])),
+        withdrawn_paths=paths_msg(sorted(state['paths'] - paths)),
+        added_networks=networks_msg(new_networks[key] for key in new_networks.keys() - old_networks.keys()),
+        withdrawn_networks=networks_msg(old_networks[key] for key in old_networks.keys() - new_networks.keys())
+    )
+
+def recorded(paths, sink):
+    """Passa i path allo stream annotandoli in sink (lo stato da salvare)"""
+    for path in paths:
+        sink.add(tuple(path))
+        yield path
+
+def send_full_report(stub, local_asn, read_paths, networks, sequence=0):
+    """Report completo a blocchi; un solo messaggio se il controller non ha lo stream.
+    
+    read_paths() restituisce ogni volta un nuovo iteratore sui path.
+    """
+    try:
+        response = stub.ReportBgpDataStream(
+            report_chunks(local_asn, read_paths(), networks, sequence),
+            timeout=STREAM_TIMEOUT
+        )
+        print(f"   • BGP Paths: {response.paths_received}")
+        print(f"   • Segments calculated: {response.segments_received}")
+        print(f"   • Chunks: {response.chunks_received}")
+        return response
+    except grpc.RpcError as e:
+        if e.code() != grpc.StatusCode.UNIMPLEMENTED:
+            raise
+    #controller senza stream: un solo messaggio con tutto
+    bgp_paths = list(read_paths())
+    segments = calculate_segments_from_paths(bgp_paths, local_asn)
+    print(f"   • BGP Paths: {len(bgp_paths)}")
+    print(f"   • Segments calculated: {len(segments)}")
+    return stub.ReportBgpData(build_request(local_asn, bgp_paths, segments, networks, sequence), timeout=10)
+
+def send_delta(stub, local_asn, state, paths, networks):
+    """Report delta; (risposta, sequenza da salvare), sequenza 0 se il controller non li gestisce"""
+    delta = build_delta(local_asn, state, paths, networks)
+    changed = len(delta.added_paths) + len(delta.withdrawn_paths)
+    if changed > max(1, len(paths)) * DELTA_MAX_FRACTION:
+        print(f"   • {changed} paths changed: sending the full table")
+        sequence = delta.sequence
+        return send_full_report(stub, local_asn, lambda: iter(paths), networks, sequence), sequence
+    
+    print(f"   • Delta {delta.sequence}: "
+          f"paths +{len(delta.added_paths)}/-{len(delta.withdrawn_paths)}, "
+          f"segments +{len(delta.added_segments)}/-{len(delta.withdrawn_segments)}, "
+          f"networks +{len(delta.added_networks)}/-{len(delta.withdrawn_networks)}")
+    try:
+        response = stub.ReportBgpDelta(delta, timeout=10)
+    except grpc.RpcError as e:
+        if e.code() != grpc.StatusCode.UNIMPLEMENTED:
+            raise
+        print("   • Controller without delta reports: sending the full table")
+        return send_full_report(stub, local_asn, lambda: iter(paths), networks), 0
+    
+    if response.resync_required:
+        #il controller ha perso (o non ha mai avuto) la sequenza precedente
+        sequence = max(state['sequence'], response.last_sequence) + 1
+        print(f"   • {response.message}: full resync with sequence {sequence}")
+        return send_full_report(stub, local_asn, lambda: iter(paths), networks, sequence), sequence
+    return response, delta.sequence
+
+def report_bgp_data(stub, local_asn, networks, state):
+    """Un report sul canale dato: completo senza stato, altrimenti delta.
+    
+    Restituisce il nuovo stato (sequenza 0: controller senza sequenze), None se rifiutato.
+    """
+    if state is None:
+        #primo report: a blocchi mentre legge la tabella, annotando i path per lo stato
+        paths = set()
+        sequence = 1
+        response = send_full_report(
+            stub, local_asn, lambda: recorded(iter_bgp_paths(), paths), networks, sequence
+        )
+    else:
+        paths = {tuple(path) for path in iter_bgp_paths()}
+        response, sequence = send_delta(stub, local_asn, state, paths, networks)
+    
+    print(f"{response.message}")
+    if not response.success:
+        return None
+    print(f"   • Total segments in controller: {response.total_segments_stored}")
+    return {'sequence': sequence, 'paths': paths, 'networks': networks}
+
+def send_bgp_data(controller_ip, local_asn, state_file=STATE_FILE):
+    """Invia dati BGP (con segmenti calcolati) al controller: tutto la prima volta, poi solo le differenze"""
     try:
-        # Raccogli dati BGP
-        bgp_paths = extract_bgp_paths()
-        
-        # Calcola segmenti dai path
-        segments = calculate_segments_from_paths(bgp_paths, local_asn)
-        
         # Raccogli reti
         networks = get_all_networks()
         
         print(f"My data:")
         print(f"   • AS Number: {local_asn}")
-        print(f"   • BGP Paths: {len(bgp_paths)}")
-        print(f"   • Segments calculated: {len(segments)}")
         print(f"   • Networks: {len(networks)}")
         
         # Connessione gRPC sicura
-        address = f"{controller_ip}:{CONTROLLER_PORT}"
-        
-        try:
-            with open(CA_CERT, 'rb') as f:
-                ca_cert = f.read()
-        except FileNotFoundError:
-            print(f"[client] Errore: Certificato CA non trovato in {CA_CERT}")
+        channel = open_channel(controller_ip)
+        if channel is None:
             return False
         
-        credentials = grpc.ssl_channel_credentials(root_certificates=ca_cert)
-        
-        channel = grpc.secure_channel(
-            address,
-            credentials,
-            options=[
-                ('grpc.ssl_target_name_override', 'ctrl'),
-                ('grpc.keepalive_time_ms', 30000),
-                ('grpc.keepalive_timeout_ms', 10000),
-            ]
-        )
-        
         stub = bgp_segments_pb2_grpc.BgpPathServiceStub(channel)
-        
-        # Prepara messaggi protobuf
-        segments_msg = [
-            bgp_segments_pb2.Segment(as_a=seg[0], as_b=seg[1])
-            for seg in segments
-        ]
-        
-        paths_msg = [
-            bgp_segments_pb2.AsPath(as_sequence=path)
-            for path in bgp_paths
-        ]
-        
-        networks_msg = [
-            bgp_segments_pb2.Network(
-                network=net['network'],
-                interface=net['interface'],
-                is_ipv6=net['is_ipv6']
-            )
-            for net in networks
-        ]
-        
-        # Crea richiesta
-        request = bgp_segments_pb2.BgpDataRequest(
-            local_asn=local_asn,
-            segments=segments_msg,
-            paths=paths_msg,
-            networks=networks_msg
-        )
-        
-        # Invia al controller
-        response = stub.ReportBgpData(request, timeout=10)
-        
+        state = report_bgp_data(stub, local_asn, networks, load_state(local_asn, state_file))
         channel.close()
         
-        if response.success:
-            print(f"{response.message}")
-            print(f"   • Total segments in controller: {response.total_segments_stored}")
-            return True
-        else:
-            print(f"{response.message}")
+        if state is None:
             return False
+        if state['sequence']:
+            save_state(local_asn, state['sequence'], state['paths'], networks, state_file)
+        return True
             
     except grpc.RpcError as e:
         print(f"Error gRPC: {e.code()}")
@@ -294,7 +423,87 @@ def send_bgp_data(controller_ip, local_asn):
         print(f"Error: {e}")
         return False
 
-def run_client():
+def bgp_table_version():
+    """Impronta economica della tabella BGP da 'show bgp summary json', None se non leggibile.
+    
+    tableVersion cresce a ogni cambio di best path; stato e prefissi dei peer
+    coprono sessioni cadute o rialzate.
+    """
+    try:
+        result = subprocess.run(
+            ['vtysh', '-c', 'show bgp summary json'],
+            capture_output=True,
+            text=True,
+            timeout=5
+        )
+        if result.returncode != 0:
+            return None
+        summary = json.loads(result.stdout)
+    except (subprocess.TimeoutExpired, OSError, ValueError):
+        return None
+    
+    #riepilogo per famiglia di indirizzi (ipv4Unicast, ...); piatto nelle versioni meno recenti di FRR
+    families = {'': summary} if 'peers' in summary else {
+        name: family for name, family in summary.items() if isinstance(family, dict)
+    }
+    return {
+        name: (
+            family.get('tableVersion'),
+            family.get('ribCount'),
+            sorted(
+                (peer, info.get('state'), info.get('pfxRcd'))
+                for peer, info in family.get('peers', {}).items()
+            )
+        )
+        for name, family in families.items()
+    }
+
+def run_daemon(controller_ip, local_asn, interval=POLL_INTERVAL, refresh=REFRESH_INTERVAL, state_file=STATE_FILE):
+    """Resta attivo e riporta solo quando la tabella BGP o le reti cambiano.
+    
+    Ogni interval secondi legge solo il riepilogo BGP; la tabella completa viene
+    letta quando l'impronta cambia o comunque ogni refresh secondi.
+    """
+    channel = open_channel(controller_ip)
+    if channel is None:
+        sys.exit(1)
+    stub = bgp_segments_pb2_grpc.BgpPathServiceStub(channel)
+    
+    state = load_state(local_asn, state_file)
+    #(impronta, reti) dell'ultimo report accettato
+    reported = None
+    last_report = 0
+    
+    print(f"Daemon mode: BGP summary every {interval}s, full check every {refresh}s")
+    sys.stdout.flush()
+    try:
+        while True:
+            current = (bgp_table_version(), get_all_networks())
+            changed = current[0] is None or current != reported
+            if changed or time.monotonic() - last_report >= refresh:
+                print(f"\n[{time.strftime('%H:%M:%S')}] "
+                      + ("BGP table or networks changed" if changed else "Periodic check"))
+                try:
+                    new_state = report_bgp_data(stub, local_asn, current[1], state)
+                except grpc.RpcError as e:
+                    print(f"Error gRPC: {e.code()}")
+                    new_state = None
+                except Exception as e:
+                    print(f"Error: {e}")
+                    new_state = None
+                
+                if new_state is not None:
+                    state = new_state
+                    if state['sequence']:
+                        save_state(local_asn, state['sequence'], state['paths'], state['networks'], state_file)
+                    reported = current
+                    last_report = time.monotonic()
+                sys.stdout.flush()
+            time.sleep(interval)
+    finally:
+        channel.close()
+
+def run_client(daemon=False, interval=POLL_INTERVAL, refresh=REFRESH_INTERVAL, state_file=STATE_FILE):
     local_asn = get_asn_from_frr()
     if local_asn is None:
         print("\nNo ASN in the config")
@@ -318,12 +527,16 @@ def run_client():
     print(f"Controller found: {controller_ip}")
     print("-" * 60)
     
+    if daemon:
+        run_daemon(controller_ip, local_asn, interval, refresh, state_file)
+        return
+    
     attempt = 0
     while True:
         attempt += 1
         print(f"\nAttempt #{attempt}")
         
-        if send_bgp_data(controller_ip, local_asn):
+        if send_bgp_data(controller_ip, local_asn, state_file):
             print("\n" + "=" * 60)
             print("Success! Data sent to controller")
             print("=" * 60)
@@ -333,8 +546,18 @@ def run_client():
         time.sleep(RETRY_INTERVAL)
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='BGP segment collection client')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Stay running and report whenever the BGP table changes')
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL,
+                        help='Seconds between BGP summary checks in --daemon mode')
+    parser.add_argument('--refresh', type=float, default=REFRESH_INTERVAL,
+                        help='Read the full table at least this often in --daemon mode (seconds)')
+    parser.add_argument('--state-file', default=STATE_FILE, help='Last accepted report, for delta reports')
+    args = parser.parse_args()
+    
     try:
-        run_client()
+        run_client(args.daemon, args.interval, args.refresh, args.state_file)
     except KeyboardInterrupt:
         print("\nClient on closure...")
         sys.exit(0)
@@ -2,16 +2,20 @@
 
 import grpc
 from concurrent import futures
+import argparse
+import asyncio
 import sqlite3
 import sys
 import os
 import time
-import threading
 from datetime import datetime
 
 sys.path.append('/shared')
 import bgp_segments_pb2
 import bgp_segments_pb2_grpc
+from aio_serving import BLOCKING_WORKERS, BlockingExecutor, ContextProxy
+import bmp_listener
+import metrics
 
 DB_TRUSTED = '/shared/trusted_nodes.db'
 DB_TOPOLOGY = '/shared/network_topology.db'
@@ -19,7 +23,21 @@ CERT_DIR = '/shared/certs'
 SERVER_CERT = os.path.join(CERT_DIR, "server.crt")
 SERVER_KEY = os.path.join(CERT_DIR, "server.key")
 
-db_lock = threading.Lock()
+SERVER_OPTIONS = [
+    ('grpc.max_send_message_length', 50 * 1024 * 1024),
+    ('grpc.max_receive_message_length', 50 * 1024 * 1024),
+    ('grpc.keepalive_time_ms', 30000),
+    ('grpc.keepalive_timeout_ms', 10000),
+]
+SUMMARY_INTERVAL = 10
+
+db_lock = metrics.InstrumentedLock('network_topology')
+
+SEGMENTS_STORED = metrics.counter('controller_segments_stored_total', 'New segments written to the topology database')
+REPORTS = metrics.counter('controller_bgp_reports_total', 'BGP reports received, by kind', ('kind',))
+
+#generazioni conservate nel log delle modifiche ai segmenti (oltre: ricarica completa)
+CHANGE_LOG_GENERATIONS = 1000
 
 def init_topology_database():
     conn = sqlite3.connect(DB_TOPOLOGY)
@@ -58,10 +76,83 @@ def init_topology_database():
         )
     ''')
     
+    #contatore letto dal path server per sapere quando ricaricare la topologia
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS topology_generation (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            generation INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('INSERT OR IGNORE INTO topology_generation (id, generation) VALUES (0, 0)')
+    
+    #segmenti aggiunti/rimossi per generazione: il path server li applica come delta al grafo
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS segment_changes (
+            generation INTEGER NOT NULL,
+            as_a INTEGER NOT NULL,
+            as_b INTEGER NOT NULL,
+            added INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS segment_changes_generation ON segment_changes (generation)')
+    
+    #chi riporta ogni segmento: un segmento sparisce quando l'ultimo AS lo ritira
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS segment_reporters (
+            as_a INTEGER NOT NULL,
+            as_b INTEGER NOT NULL,
+            reporter INTEGER NOT NULL,
+            sequence INTEGER NOT NULL,
+            PRIMARY KEY (as_a, as_b, reporter)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS segment_reporters_reporter ON segment_reporters (reporter)')
+    
+    #ultima sequenza di report applicata per AS (report delta)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS report_sequences (
+            asn INTEGER PRIMARY KEY,
+            sequence INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
     conn.commit()
     conn.close()
     print("✓ Topology database initialized")
 
+def record_segment_changes(cursor, added=(), removed=()):
+    """Nuova generazione della topologia con i segmenti che l'hanno prodotta"""
+    cursor.execute('UPDATE topology_generation SET generation = generation + 1 WHERE id = 0')
+    cursor.execute('SELECT generation FROM topology_generation WHERE id = 0')
+    generation = cursor.fetchone()[0]
+    cursor.executemany(
+        'INSERT INTO segment_changes (generation, as_a, as_b, added) VALUES (?, ?, ?, ?)',
+        [(generation, as_a, as_b, 1) for as_a, as_b in added] +
+        [(generation, as_a, as_b, 0) for as_a, as_b in removed]
+    )
+    cursor.execute('DELETE FROM segment_changes WHERE generation <= ?', (generation - CHANGE_LOG_GENERATIONS,))
+    return generation
+
+def withdraw_segments(cursor, reporter, segments):
+    """Ritira i segmenti di un AS; restituisce quelli rimasti senza nessun AS che li riporta"""
+    removed = []
+    for as_a, as_b in segments:
+        cursor.execute(
+            'DELETE FROM segment_reporters WHERE as_a = ? AND as_b = ? AND reporter = ?',
+            (as_a, as_b, reporter)
+        )
+        if cursor.rowcount == 0:
+            continue
+        cursor.execute('SELECT 1 FROM segment_reporters WHERE as_a = ? AND as_b = ? LIMIT 1', (as_a, as_b))
+        if cursor.fetchone() is None:
+            cursor.execute('DELETE FROM segments WHERE as_a = ? AND as_b = ?', (as_a, as_b))
+            removed.append((as_a, as_b))
+    return removed
+
+def path_string(path_msg):
+    return ' → '.join(str(asn) for asn in path_msg.as_sequence)
+
 def load_trusted_nodes():
     try:
         conn = sqlite3.connect(DB_TRUSTED)
@@ -88,11 +179,22 @@ def load_trusted_nodes():
         return {}
 
 class BgpDataServicer(bgp_segments_pb2_grpc.BgpPathServiceServicer):
-    def __init__(self):
-        self.trusted_nodes = load_trusted_nodes()
+    def __init__(self, trusted_nodes=None, on_change=None):
+        #processo separato: nodi trusted letti una volta; controller unico: dallo snapshot condiviso
+        self.trusted_nodes_source = trusted_nodes
+        self.loaded_trusted_nodes = None if trusted_nodes else load_trusted_nodes()
+        #chiamata dopo ogni nuova generazione della topologia
+        self.on_change = on_change
         self.total_segments = 0
         self.received_from = set()
     
+    @property
+    def trusted_nodes(self):
+        if self.trusted_nodes_source is not None:
+            return self.trusted_nodes_source()
+        return self.loaded_trusted_nodes
+    
+    @metrics.rpc
     def ReportBgpData(self, request, context):
     
         client_asn = request.local_asn
@@ -100,9 +202,10 @@ class BgpDataServicer(bgp_segments_pb2_grpc.BgpPathServiceServicer):
         
         print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Data from AS{client_asn}")
         
-        is_trusted = client_asn in self.trusted_nodes
+        trusted_nodes = self.trusted_nodes
+        is_trusted = client_asn in trusted_nodes
         if is_trusted:
-            node_info = self.trusted_nodes[client_asn]
+            node_info = trusted_nodes[client_asn]
             print(f"  ✓ Trusted node: {node_info['hostname']}")
         else:
             print(f" Untrusted node: error")
@@ -130,18 +233,115 @@ class BgpDataServicer(bgp_segments_pb2_grpc.BgpPathServiceServicer):
             total_segments_stored=self.total_segments
         )
     
+    @metrics.rpc
+    def ReportBgpDataStream(self, request_iterator, context):
+        """Report a blocchi: ogni blocco è una transazione, in memoria resta solo quello corrente"""
+        report = None
+        for chunk in request_iterator:
+            if report is None:
+                report = self.start_report(chunk.local_asn)
+            elif chunk.local_asn != report['asn']:
+                context.abort(grpc.StatusCode.INVALID_ARGUMENT, "local_asn changed during the report")
+            if not self.save_chunk(report, chunk):
+                return bgp_segments_pb2.BgpDataResponse(
+                    success=False,
+                    message=f"Database error after {report['chunks']} chunk(s)",
+                    total_segments_stored=self.total_segments
+                )
+        
+        if report is None:
+            return bgp_segments_pb2.BgpDataResponse(success=False, message="Empty report")
+        return self.finish_report(report)
+    
+    def start_report(self, client_asn):
+        print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Streamed data from AS{client_asn}")
+        trusted_nodes = self.trusted_nodes
+        if client_asn in trusted_nodes:
+            print(f"  ✓ Trusted node: {trusted_nodes[client_asn]['hostname']}")
+        else:
+            print(f" Untrusted node: error")
+        sys.stdout.flush()
+        return {'asn': client_asn, 'chunks': 0, 'segments': 0, 'paths': 0, 'networks': 0, 'new_segments': 0,
+                'sequence': 0, 'removed_segments': 0}
+    
+    def save_chunk(self, report, chunk):
+        #il primo blocco sostituisce le reti dell'AS, i successivi le aggiungono
+        first = report['chunks'] == 0
+        if first:
+            report['sequence'] = chunk.sequence
+        new_segments = self.store(report['asn'], chunk, replace_networks=first,
+                                  replace_paths=first and report['sequence'] > 0, sequence=report['sequence'])
+        if new_segments is None:
+            return False
+        report['chunks'] += 1
+        report['segments'] += len(chunk.segments)
+        report['paths'] += len(chunk.paths)
+        report['networks'] += len(chunk.networks)
+        report['new_segments'] += new_segments
+        return True
+    
+    def finish_report(self, report):
+        print(f"  • Chunks: {report['chunks']}")
+        print(f"  • Segments: {report['segments']}")
+        print(f"  • Paths: {report['paths']}")
+        print(f"  • Networks: {report['networks']}")
+        print(f"  • New segments stored: {report['new_segments']}")
+        if report['sequence']:
+            removed = self.complete_sequence(report['asn'], report['sequence'])
+            if removed is None:
+                return bgp_segments_pb2.BgpDataResponse(success=False, message="Database error")
+            report['removed_segments'] = removed
+            print(f"  • Segments withdrawn: {removed} (sequence {report['sequence']})")
+        print("-" * 60)
+        sys.stdout.flush()
+        
+        self.received_from.add(report['asn'])
+        REPORTS.inc(kind='full')
+        #una sola notifica per report, non una per blocco
+        if (report['new_segments'] or report['removed_segments']) and self.on_change:
+            self.on_change()
+        
+        return bgp_segments_pb2.BgpDataResponse(
+            success=True,
+            message=f"Data from AS{report['asn']} stored successfully",
+            total_segments_stored=self.total_segments,
+            chunks_received=report['chunks'],
+            segments_received=report['segments'],
+            paths_received=report['paths'],
+            networks_received=report['networks']
+        )
+    
     def save_data(self, source_asn, request):
-        new_segments_count = 0
+        new_segments = self.store(source_asn, request, replace_paths=request.sequence > 0, sequence=request.sequence)
+        if new_segments is None:
+            return 0
+        removed = self.complete_sequence(source_asn, request.sequence) if request.sequence else 0
+        REPORTS.inc(kind='full')
+        if (new_segments or removed) and self.on_change:
+            self.on_change()
+        return new_segments
+    
+    def store(self, source_asn, request, replace_networks=True, replace_paths=False, sequence=0):
+        """Scrive segmenti, path e reti in una transazione; numero di segmenti nuovi, None se fallisce.
+        
+        Con replace_paths i path dell'AS vengono sostituiti invece che aggiunti (report con sequenza).
+        """
+        new_segments = []
+        trusted_nodes = self.trusted_nodes
         
         try:
             with db_lock:
                 conn = sqlite3.connect(DB_TOPOLOGY, timeout=5)
                 cursor = conn.cursor()
                 
+                if replace_paths:
+                    #inizio di un report completo: i segmenti che non riporterà verranno ritirati
+                    cursor.execute('UPDATE segment_reporters SET sequence = -1 WHERE reporter = ?', (source_asn,))
+                
                 for seg in request.segments:
                     trust = (
-                        seg.as_a in self.trusted_nodes and 
-                        seg.as_b in self.trusted_nodes
+                        seg.as_a in trusted_nodes and 
+                        seg.as_b in trusted_nodes
                     )
                     
                     try:
@@ -149,37 +349,227 @@ class BgpDataServicer(bgp_segments_pb2_grpc.BgpPathServiceServicer):
                             INSERT INTO segments (as_a, as_b, trusted, discovered_by)
                             VALUES (?, ?, ?, ?)
                         ''', (seg.as_a, seg.as_b, trust, source_asn))
-                        new_segments_count += 1
+                        new_segments.append((seg.as_a, seg.as_b))
                     except sqlite3.IntegrityError:
                         #segmento già esistente
                         pass
+                    cursor.execute('''
+                        INSERT OR REPLACE INTO segment_reporters (as_a, as_b, reporter, sequence)
+                        VALUES (?, ?, ?, ?)
+                    ''', (seg.as_a, seg.as_b, source_asn, sequence))
+                
+                if replace_paths:
+                    cursor.execute('DELETE FROM as_paths WHERE discovered_by = ?', (source_asn,))
                 
                 for path_msg in request.paths:
-                    path_str = ' → '.join(str(asn) for asn in path_msg.as_sequence)
+                    path_str = path_string(path_msg)
                     cursor.execute('''
                         INSERT INTO as_paths (path, discovered_by)
                         VALUES (?, ?)
                     ''', (path_str, source_asn))
                 
                 #rimuovi vecchie per questo ASN
-                cursor.execute('DELETE FROM as_networks WHERE asn = ?', (source_asn,))
+                if replace_networks:
+                    cursor.execute('DELETE FROM as_networks WHERE asn = ?', (source_asn,))
                 
                 for net in request.networks:
                     cursor.execute('''
-                        INSERT INTO as_networks (asn, network, interface, is_ipv6)
+                        INSERT OR REPLACE INTO as_networks (asn, network, interface, is_ipv6)
                         VALUES (?, ?, ?, ?)
                     ''', (source_asn, net.network, net.interface, 1 if net.is_ipv6 else 0))
                 
+                #solo i segmenti entrano nel grafo del path server
+                if new_segments:
+                    record_segment_changes(cursor, added=new_segments)
+                
+                cursor.execute('SELECT COUNT(*) FROM segments')
+                self.total_segments = cursor.fetchone()[0]
+                
+                conn.commit()
+                conn.close()
+                
+        except Exception as e:
+            print(f"  ✗ Database error: {e}")
+            return None
+        
+        SEGMENTS_STORED.inc(len(new_segments))
+        return len(new_segments)
+    
+    def complete_sequence(self, source_asn, sequence):
+        """Fine di un report completo: ritira i segmenti dell'AS non riportati e registra la sequenza"""
+        try:
+            with db_lock:
+                conn = sqlite3.connect(DB_TOPOLOGY, timeout=5)
+                cursor = conn.cursor()
+                
+                cursor.execute(
+                    'SELECT as_a, as_b FROM segment_reporters WHERE reporter = ? AND sequence != ?',
+                    (source_asn, sequence)
+                )
+                removed = withdraw_segments(cursor, source_asn, cursor.fetchall())
+                if removed:
+                    record_segment_changes(cursor, removed=removed)
+                
+                cursor.execute('''
+                    INSERT OR REPLACE INTO report_sequences (asn, sequence, updated_at)
+                    VALUES (?, ?, CURRENT_TIMESTAMP)
+                ''', (source_asn, sequence))
+                
                 cursor.execute('SELECT COUNT(*) FROM segments')
                 self.total_segments = cursor.fetchone()[0]
                 
                 conn.commit()
                 conn.close()
+        except Exception as e:
+            print(f"  ✗ Database error: {e}")
+            return None
+        return len(removed)
+    
+    @metrics.rpc
+    def ReportBgpDelta(self, request, context):
+        client_asn = request.local_asn
+        print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Delta {request.sequence} from AS{client_asn}: "
+              f"segments +{len(request.added_segments)}/-{len(request.withdrawn_segments)}, "
+              f"paths +{len(request.added_paths)}/-{len(request.withdrawn_paths)}, "
+              f"networks +{len(request.added_networks)}/-{len(request.withdrawn_networks)}")
+        
+        result = self.apply_delta(client_asn, request)
+        if result is None:
+            return bgp_segments_pb2.BgpDeltaResponse(success=False, message="Database error")
+        
+        last_sequence, added, removed = result
+        if last_sequence != request.sequence:
+            #sequenza persa, ripetuta o AS sconosciuto: serve il report completo
+            print(f"  Sequence gap (last applied {last_sequence}): full resync requested")
+            sys.stdout.flush()
+            REPORTS.inc(kind='resync')
+            return bgp_segments_pb2.BgpDeltaResponse(
+                success=False,
+                message=f"Expected sequence {last_sequence + 1}",
+                resync_required=True,
+                last_sequence=last_sequence,
+                total_segments_stored=self.total_segments
+            )
+        
+        print(f"  • Segments: {added} new, {removed} removed")
+        print("-" * 60)
+        sys.stdout.flush()
+        
+        self.received_from.add(client_asn)
+        REPORTS.inc(kind='delta')
+        if (added or removed) and self.on_change:
+            self.on_change()
+        
+        return bgp_segments_pb2.BgpDeltaResponse(
+            success=True,
+            message=f"Delta {request.sequence} from AS{client_asn} applied",
+            last_sequence=last_sequence,
+            total_segments_stored=self.total_segments
+        )
+    
+    def ingest_delta(self, source_asn, request):
+        """Delta senza sequenza (sorgenti push come BMP): applicato così com'è.
+        
+        Restituisce (segmenti nuovi, rimossi), None se il database fallisce.
+        """
+        result = self.apply_delta(source_asn, request, sequenced=False)
+        if result is None:
+            return None
+        _, added, removed = result
+        self.received_from.add(source_asn)
+        if (added or removed) and self.on_change:
+            self.on_change()
+        return added, removed
+    
+    def reported_by(self, source_asn):
+        """(AS path, segmenti) che il database attribuisce all'AS, None se il database fallisce"""
+        try:
+            with db_lock:
+                conn = sqlite3.connect(DB_TOPOLOGY, timeout=5)
+                cursor = conn.cursor()
+                cursor.execute('SELECT as_a, as_b FROM segment_reporters WHERE reporter = ?', (source_asn,))
+                segments = set(cursor.fetchall())
+                cursor.execute('SELECT DISTINCT path FROM as_paths WHERE discovered_by = ?', (source_asn,))
+                paths = {tuple(int(asn) for asn in row[0].split(' → ')) for row in cursor if row[0]}
+                conn.close()
+        except Exception as e:
+            print(f"  ✗ Database error: {e}")
+            return None
+        return paths, segments
+    
+    def apply_delta(self, source_asn, request, sequenced=True):
+        """Applica un delta se segue l'ultima sequenza: (sequenza applicata, segmenti nuovi, rimossi)"""
+        trusted_nodes = self.trusted_nodes
+        try:
+            with db_lock:
+                conn = sqlite3.connect(DB_TOPOLOGY, timeout=5)
+                cursor = conn.cursor()
+                
+                last_sequence = 0
+                if sequenced:
+                    cursor.execute('SELECT sequence FROM report_sequences WHERE asn = ?', (source_asn,))
+                    row = cursor.fetchone()
+                    last_sequence = row[0] if row else 0
+                    if row is None or request.sequence != last_sequence + 1:
+                        conn.close()
+                        return last_sequence, 0, 0
+                
+                removed = withdraw_segments(
+                    cursor, source_asn, [(seg.as_a, seg.as_b) for seg in request.withdrawn_segments]
+                )
+                added = []
+                for seg in request.added_segments:
+                    trust = seg.as_a in trusted_nodes and seg.as_b in trusted_nodes
+                    cursor.execute('''
+                        INSERT OR IGNORE INTO segments (as_a, as_b, trusted, discovered_by)
+                        VALUES (?, ?, ?, ?)
+                    ''', (seg.as_a, seg.as_b, trust, source_asn))
+                    if cursor.rowcount:
+                        added.append((seg.as_a, seg.as_b))
+                    cursor.execute('''
+                        INSERT OR REPLACE INTO segment_reporters (as_a, as_b, reporter, sequence)
+                        VALUES (?, ?, ?, ?)
+                    ''', (seg.as_a, seg.as_b, source_asn, request.sequence))
+                
+                cursor.executemany(
+                    'DELETE FROM as_paths WHERE path = ? AND discovered_by = ?',
+                    [(path_string(path_msg), source_asn) for path_msg in request.withdrawn_paths]
+                )
+                cursor.executemany(
+                    'INSERT INTO as_paths (path, discovered_by) VALUES (?, ?)',
+                    [(path_string(path_msg), source_asn) for path_msg in request.added_paths]
+                )
+                
+                cursor.executemany(
+                    'DELETE FROM as_networks WHERE asn = ? AND network = ?',
+                    [(source_asn, net.network) for net in request.withdrawn_networks]
+                )
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO as_networks (asn, network, interface, is_ipv6)
+                    VALUES (?, ?, ?, ?)
+                ''', [(source_asn, net.network, net.interface, 1 if net.is_ipv6 else 0)
+                      for net in request.added_networks])
                 
+                if added or removed:
+                    record_segment_changes(cursor, added=added, removed=removed)
+                
+                if sequenced:
+                    cursor.execute(
+                        'UPDATE report_sequences SET sequence = ?, updated_at = CURRENT_TIMESTAMP WHERE asn = ?',
+                        (request.sequence, source_asn)
+                    )
+                
+                cursor.execute('SELECT COUNT(*) FROM segments')
+                self.total_segments = cursor.fetchone()[0]
+                
+                conn.commit()
+                conn.close()
         except Exception as e:
             print(f"  ✗ Database error: {e}")
+            return None
         
-        return new_segments_count
+        SEGMENTS_STORED.inc(len(added))
+        return request.sequence, len(added), len(removed)
     
     def print_summary(self):
         try:
@@ -215,29 +605,85 @@ class BgpDataServicer(bgp_segments_pb2_grpc.BgpPathServiceServicer):
         except Exception as e:
             print(f"Error generating summary: {e}")
 
-def serve():
+class AsyncBgpDataServicer(bgp_segments_pb2_grpc.BgpPathServiceServicer):
+    """Handler grpc.aio: il salvataggio su sqlite gira nell'executor limitato"""
+    def __init__(self, servicer, blocking):
+        self.servicer = servicer
+        self.blocking = blocking
+    
+    async def ReportBgpData(self, request, context):
+        return await self.blocking.call(context, self.servicer.ReportBgpData, request, ContextProxy(context))
+    
+    async def ReportBgpDelta(self, request, context):
+        return await self.blocking.call(context, self.servicer.ReportBgpDelta, request, ContextProxy(context))
+    
+    async def ReportBgpDataStream(self, request_iterator, context):
+        #i blocchi arrivano sul loop, il salvataggio di ciascuno va nell'executor
+        report = None
+        async for chunk in request_iterator:
+            if report is None:
+                report = await self.blocking.call(context, self.servicer.start_report, chunk.local_asn)
+            elif chunk.local_asn != report['asn']:
+                await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "local_asn changed during the report")
+            if not await self.blocking.call(context, self.servicer.save_chunk, report, chunk):
+                return bgp_segments_pb2.BgpDataResponse(
+                    success=False,
+                    message=f"Database error after {report['chunks']} chunk(s)",
+                    total_segments_stored=self.servicer.total_segments
+                )
+        
+        if report is None:
+            return bgp_segments_pb2.BgpDataResponse(success=False, message="Empty report")
+        return await self.blocking.call(context, self.servicer.finish_report, report)
+
+def server_credentials():
     with open(SERVER_CERT, "rb") as f:
         server_cert = f.read()
     with open(SERVER_KEY, "rb") as f:
         server_key = f.read()
+    return grpc.ssl_server_credentials([(server_key, server_cert)])
+
+async def serve_aio(blocking_workers=BLOCKING_WORKERS, bmp_port=0, bmp_settle=bmp_listener.SYNC_SETTLE):
+    init_topology_database()
+    servicer = BgpDataServicer()
+    if bmp_port:
+        bmp_listener.start_bmp_listener(servicer, bmp_port, settle=bmp_settle)
+    blocking = BlockingExecutor(blocking_workers, 'collect')
+    
+    server = grpc.aio.server(options=SERVER_OPTIONS)
+    bgp_segments_pb2_grpc.add_BgpPathServiceServicer_to_server(AsyncBgpDataServicer(servicer, blocking), server)
+    server.add_secure_port('[::]:50052', server_credentials())
+    await server.start()
     
-    server_creds = grpc.ssl_server_credentials([(server_key, server_cert)])
+    print("=" * 60)
+    print("PHASE 2 - SEGMENT COLLECTION: Controller Server (asyncio)")
+    print("=" * 60)
+    print("Listening on port 50052")
+    print(f"Blocking workers: {blocking_workers}")
+    print("Waiting for nodes...")
+    print("=" * 60)
+    sys.stdout.flush()
     
+    try:
+        while True:
+            await asyncio.sleep(SUMMARY_INTERVAL)
+            if len(servicer.received_from) > 0:
+                await asyncio.get_running_loop().run_in_executor(blocking.pool, servicer.print_summary)
+    finally:
+        servicer.print_summary()
+        await server.stop(0)
+        blocking.shutdown()
+
+def serve(bmp_port=0, bmp_settle=bmp_listener.SYNC_SETTLE):
     init_topology_database()
     servicer = BgpDataServicer()
+    if bmp_port:
+        bmp_listener.start_bmp_listener(servicer, bmp_port, settle=bmp_settle)
     
-    server = grpc.server(
-        futures.ThreadPoolExecutor(max_workers=20),
-        options=[
-            ('grpc.max_send_message_length', 50 * 1024 * 1024),
-            ('grpc.max_receive_message_length', 50 * 1024 * 1024),
-            ('grpc.keepalive_time_ms', 30000),
-            ('grpc.keepalive_timeout_ms', 10000),
-        ]
-    )
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=20), options=SERVER_OPTIONS)
     
     bgp_segments_pb2_grpc.add_BgpPathServiceServicer_to_server(servicer, server)
-    server.add_secure_port('[::]:50052', server_creds)
+    server.add_secure_port('[::]:50052', server_credentials())
     server.start()
     
     print("=" * 60)
@@ -250,7 +696,7 @@ def serve():
     
     try:
         while True:
-            time.sleep(10)
+            time.sleep(SUMMARY_INTERVAL)
             
             if len(servicer.received_from) > 0:
                 servicer.print_summary()
@@ -260,5 +706,29 @@ def serve():
         servicer.print_summary()
         server.stop(0)
 
+def main():
+    parser = argparse.ArgumentParser(description='BGP segment collection server')
+    parser.add_argument('--aio', action='store_true', help='Serve with grpc.aio (coroutine handlers)')
+    parser.add_argument('--blocking-workers', type=int, default=BLOCKING_WORKERS,
+                        help='Threads for database work in --aio mode')
+    parser.add_argument('--metrics-port', type=int, default=0,
+                        help='Serve Prometheus metrics on 127.0.0.1:PORT (0: disabled)')
+    parser.add_argument('--bmp-port', type=int, default=0,
+                        help=f'Accept BMP sessions from trusted routers on PORT, e.g. {bmp_listener.BMP_PORT} (0: disabled)')
+    parser.add_argument('--bmp-settle', type=float, default=bmp_listener.SYNC_SETTLE,
+                        help='Seconds of BMP silence that end a router\'s initial table dump without End-of-RIB')
+    args = parser.parse_args()
+    
+    if args.metrics_port:
+        metrics.start_http_server(args.metrics_port)
+    
+    if not args.aio:
+        serve(args.bmp_port, args.bmp_settle)
+        return
+    try:
+        asyncio.run(serve_aio(args.blocking_workers, args.bmp_port, args.bmp_settle))
+    except KeyboardInterrupt:
+        print("\nController stopping...")
+
 if __name__ == '__main__':
-    serve()
+    main()
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x12\x62gp_segments.proto\x12\x0c\x62gp_segments\"\x9a\x01\n\x0e\x42gpDataRequest\x12\x11\n\tlocal_asn\x18\x01 \x01(\r\x12\'\n\x08segments\x18\x02 \x03(\x0b\x32\x15.bgp_segments.Segment\x12#\n\x05paths\x18\x03 \x03(\x0b\x32\x14.bgp_segments.AsPath\x12\'\n\x08networks\x18\x04 \x03(\x0b\x32\x15.bgp_segments.Network\"R\n\x0f\x42gpDataResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x1d\n\x15total_segments_stored\x18\x03 \x01(\r\"%\n\x07Segment\x12\x0c\n\x04\x61s_a\x18\x01 \x01(\r\x12\x0c\n\x04\x61s_b\x18\x02 \x01(\r\"\x1d\n\x06\x41sPath\x12\x13\n\x0b\x61s_sequence\x18\x01 \x03(\r\">\n\x07Network\x12\x0f\n\x07network\x18\x01 \x01(\t\x12\x11\n\tinterface\x18\x02 \x01(\t\x12\x0f\n\x07is_ipv6\x18\x03 \x01(\x08\x32`\n\x0e\x42gpPathService\x12N\n\rReportBgpData\x12\x1c.bgp_segments.BgpDataRequest\x1a\x1d.bgp_segments.BgpDataResponse\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x12\x62gp_segments.proto\x12\x0c\x62gp_segments\"\xac\x01\n\x0e\x42gpDataRequest\x12\x11\n\tlocal_asn\x18\x01 \x01(\r\x12\'\n\x08segments\x18\x02 \x03(\x0b\x32\x15.bgp_segments.Segment\x12#\n\x05paths\x18\x03 \x03(\x0b\x32\x14.bgp_segments.AsPath\x12\'\n\x08networks\x18\x04 \x03(\x0b\x32\x15.bgp_segments.Network\x12\x10\n\x08sequence\x18\x05 \x01(\x04\"\xd4\x02\n\x0f\x42gpDeltaRequest\x12\x11\n\tlocal_asn\x18\x01 \x01(\r\x12\x10\n\x08sequence\x18\x02 \x01(\x04\x12-\n\x0e\x61\x64\x64\x65\x64_segments\x18\x03 \x03(\x0b\x32\x15.bgp_segments.Segment\x12\x31\n\x12withdrawn_segments\x18\x04 \x03(\x0b\x32\x15.bgp_segments.Segment\x12)\n\x0b\x61\x64\x64\x65\x64_paths\x18\x05 \x03(\x0b\x32\x14.bgp_segments.AsPath\x12-\n\x0fwithdrawn_paths\x18\x06 \x03(\x0b\x32\x14.bgp_segments.AsPath\x12-\n\x0e\x61\x64\x64\x65\x64_networks\x18\x07 \x03(\x0b\x32\x15.bgp_segments.Network\x12\x31\n\x12withdrawn_networks\x18\x08 \x03(\x0b\x32\x15.bgp_segments.Network\"\x83\x01\n\x10\x42gpDeltaResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x17\n\x0fresync_required\x18\x03 \x01(\x08\x12\x15\n\rlast_sequence\x18\x04 \x01(\x04\x12\x1d\n\x15total_segments_stored\x18\x05 \x01(\r\"\xb9\x01\n\x0f\x42gpDataResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x1d\n\x15total_segments_stored\x18\x03 \x01(\r\x12\x17\n\x0f\x63hunks_received\x18\x04 \x01(\r\x12\x19\n\x11segments_received\x18\x05 \x01(\r\x12\x16\n\x0epaths_received\x18\x06 \x01(\r\x12\x19\n\x11networks_received\x18\x07 \x01(\r\"%\n\x07Segment\x12\x0c\n\x04\x61s_a\x18\x01 \x01(\r\x12\x0c\n\x04\x61s_b\x18\x02 \x01(\r\"\x1d\n\x06\x41sPath\x12\x13\n\x0b\x61s_sequence\x18\x01 \x03(\r\">\n\x07Network\x12\x0f\n\x07network\x18\x01 \x01(\t\x12\x11\n\tinterface\x18\x02 \x01(\t\x12\x0f\n\x07is_ipv6\x18\x03 \x01(\x08\x32\x8b\x02\n\x0e\x42gpPathService\x12N\n\rReportBgpData\x12\x1c.bgp_segments.BgpDataRequest\x1a\x1d.bgp_segments.BgpDataResponse\"\x00\x12V\n\x13ReportBgpDataStream\x12\x1c.bgp_segments.BgpDataRequest\x1a\x1d.bgp_segments.BgpDataResponse\"\x00(\x01\x12Q\n\x0eReportBgpDelta\x12\x1d.bgp_segments.BgpDeltaRequest\x1a\x1e.bgp_segments.BgpDeltaResponse\"\x00\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -32,15 +32,19 @@ _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'bgp_segments_pb2', _globals
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
   _globals['_BGPDATAREQUEST']._serialized_start=37
-  _globals['_BGPDATAREQUEST']._serialized_end=191
-  _globals['_BGPDATARESPONSE']._serialized_start=193
-  _globals['_BGPDATARESPONSE']._serialized_end=275
-  _globals['_SEGMENT']._serialized_start=277
-  _globals['_SEGMENT']._serialized_end=314
-  _globals['_ASPATH']._serialized_start=316
-  _globals['_ASPATH']._serialized_end=345
-  _globals['_NETWORK']._serialized_start=347
-  _globals['_NETWORK']._serialized_end=409
-  _globals['_BGPPATHSERVICE']._serialized_start=411
-  _globals['_BGPPATHSERVICE']._serialized_end=507
+  _globals['_BGPDATAREQUEST']._serialized_end=209
+  _globals['_BGPDELTAREQUEST']._serialized_start=212
+  _globals['_BGPDELTAREQUEST']._serialized_end=552
+  _globals['_BGPDELTARESPONSE']._serialized_start=555
+  _globals['_BGPDELTARESPONSE']._serialized_end=686
+  _globals['_BGPDATARESPONSE']._serialized_start=689
+  _globals['_BGPDATARESPONSE']._serialized_end=874
+  _globals['_SEGMENT']._serialized_start=876
+  _globals['_SEGMENT']._serialized_end=913
+  _globals['_ASPATH']._serialized_start=915
+  _globals['_ASPATH']._serialized_end=944
+  _globals['_NETWORK']._serialized_start=946
+  _globals['_NETWORK']._serialized_end=1008
+  _globals['_BGPPATHSERVICE']._serialized_start=1011
+  _globals['_BGPPATHSERVICE']._serialized_end=1278
 # @@protoc_insertion_point(module_scope)
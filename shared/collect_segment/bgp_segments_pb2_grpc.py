@@ -39,6 +39,16 @@ class BgpPathServiceStub(object):
                 request_serializer=bgp__segments__pb2.BgpDataRequest.SerializeToString,
                 response_deserializer=bgp__segments__pb2.BgpDataResponse.FromString,
                 _registered_method=True)
+        self.ReportBgpDataStream = channel.stream_unary(
+                '/bgp_segments.BgpPathService/ReportBgpDataStream',
+                request_serializer=bgp__segments__pb2.BgpDataRequest.SerializeToString,
+                response_deserializer=bgp__segments__pb2.BgpDataResponse.FromString,
+                _registered_method=True)
+        self.ReportBgpDelta = channel.unary_unary(
+                '/bgp_segments.BgpPathService/ReportBgpDelta',
+                request_serializer=bgp__segments__pb2.BgpDeltaRequest.SerializeToString,
+                response_deserializer=bgp__segments__pb2.BgpDeltaResponse.FromString,
+                _registered_method=True)
 
 
 class BgpPathServiceServicer(object):
@@ -50,6 +60,20 @@ class BgpPathServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ReportBgpDataStream(self, request_iterator, context):
+        """stessi dati a blocchi limitati (tabelle complete): il controller salva ogni blocco appena arriva
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ReportBgpDelta(self, request, context):
+        """solo le differenze dall'ultimo report applicato: se la sequenza non segue, il client rimanda tutto
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_BgpPathServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -58,6 +82,16 @@ def add_BgpPathServiceServicer_to_server(servicer, server):
                     request_deserializer=bgp__segments__pb2.BgpDataRequest.FromString,
                     response_serializer=bgp__segments__pb2.BgpDataResponse.SerializeToString,
             ),
+            'ReportBgpDataStream': grpc.stream_unary_rpc_method_handler(
+                    servicer.ReportBgpDataStream,
+                    request_deserializer=bgp__segments__pb2.BgpDataRequest.FromString,
+                    response_serializer=bgp__segments__pb2.BgpDataResponse.SerializeToString,
+            ),
+            'ReportBgpDelta': grpc.unary_unary_rpc_method_handler(
+                    servicer.ReportBgpDelta,
+                    request_deserializer=bgp__segments__pb2.BgpDeltaRequest.FromString,
+                    response_serializer=bgp__segments__pb2.BgpDeltaResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'bgp_segments.BgpPathService', rpc_method_handlers)
@@ -95,3 +129,57 @@ class BgpPathService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def ReportBgpDataStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/bgp_segments.BgpPathService/ReportBgpDataStream',
+            bgp__segments__pb2.BgpDataRequest.SerializeToString,
+            bgp__segments__pb2.BgpDataResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ReportBgpDelta(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/bgp_segments.BgpPathService/ReportBgpDelta',
+            bgp__segments__pb2.BgpDeltaRequest.SerializeToString,
+            bgp__segments__pb2.BgpDeltaResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
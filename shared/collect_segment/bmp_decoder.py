@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""Decodifica dei messaggi BMP (RFC 7854) e delle UPDATE/OPEN BGP che trasportano.
+
+Solo quello che serve alla raccolta dei segmenti: prefissi annunciati e
+ritirati con il loro AS_PATH, End-of-RIB, peer up/down, initiation/termination.
+"""
+
+import ipaddress
+import struct
+
+BMP_VERSION = 3
+
+ROUTE_MONITORING = 0
+STATISTICS_REPORT = 1
+PEER_DOWN = 2
+PEER_UP = 3
+INITIATION = 4
+TERMINATION = 5
+ROUTE_MIRRORING = 6
+
+#versione, lunghezza totale, tipo
+COMMON_HEADER = struct.Struct('!BIB')
+#tipo, flag, distinguisher, indirizzo, AS, BGP ID, timestamp (s, µs)
+PEER_HEADER = struct.Struct('!BB8s16sIIII')
+PEER_FLAG_IPV6 = 0x80
+PEER_FLAG_POST_POLICY = 0x40
+PEER_FLAG_TWO_BYTE_AS = 0x20
+
+BGP_HEADER_LEN = 19
+BGP_OPEN = 1
+BGP_UPDATE = 2
+
+ATTR_AS_PATH = 2
+ATTR_MP_REACH_NLRI = 14
+ATTR_MP_UNREACH_NLRI = 15
+ATTR_FLAG_EXTENDED_LENGTH = 0x10
+AS_SEQUENCE = 2
+
+AFI_IPV4 = 1
+AFI_IPV6 = 2
+CAPABILITY_FOUR_OCTET_AS = 65
+INFO_SYS_NAME = 2
+
+class BmpError(ValueError):
+    """Messaggio BMP o BGP malformato"""
+
+class BmpReader:
+    """Divide un flusso di byte in messaggi BMP completi (tipo, corpo)"""
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        self.buffer.extend(data)
+        messages = []
+        offset = 0
+        while len(self.buffer) - offset >= COMMON_HEADER.size:
+            version, length, msg_type = COMMON_HEADER.unpack_from(self.buffer, offset)
+            if version != BMP_VERSION:
+                raise BmpError(f"BMP version {version}")
+            if length < COMMON_HEADER.size:
+                raise BmpError(f"BMP message length {length}")
+            if len(self.buffer) - offset < length:
+                break
+            messages.append((msg_type, bytes(self.buffer[offset + COMMON_HEADER.size:offset + length])))
+            offset += length
+        del self.buffer[:offset]
+        return messages
+
+def parse_peer_header(body):
+    if len(body) < PEER_HEADER.size:
+        raise BmpError("Truncated per-peer header")
+    peer_type, flags, distinguisher, address, asn, bgp_id, _, _ = PEER_HEADER.unpack_from(body)
+    if flags & PEER_FLAG_IPV6:
+        peer_address = str(ipaddress.IPv6Address(address))
+    else:
+        peer_address = str(ipaddress.IPv4Address(address[12:]))
+    return {
+        'type': peer_type,
+        'distinguisher': distinguisher.hex(),
+        'address': peer_address,
+        'asn': asn,
+        'bgp_id': str(ipaddress.IPv4Address(bgp_id)),
+        'post_policy': bool(flags & PEER_FLAG_POST_POLICY),
+        'four_byte_as': not flags & PEER_FLAG_TWO_BYTE_AS
+    }, body[PEER_HEADER.size:]
+
+def split_bgp_message(data):
+    """(tipo, corpo, resto) del primo messaggio BGP in data"""
+    if len(data) < BGP_HEADER_LEN:
+        raise BmpError("Truncated BGP header")
+    length, msg_type = struct.unpack_from('!HB', data, 16)
+    if length < BGP_HEADER_LEN or length > len(data):
+        raise BmpError(f"BGP message length {length}")
+    return msg_type, data[BGP_HEADER_LEN:length], data[length:]
+
+def parse_prefixes(data, afi):
+    """NLRI (lunghezza in bit + byte significativi) come stringhe CIDR"""
+    size, family = (16, ipaddress.IPv6Network) if afi == AFI_IPV6 else (4, ipaddress.IPv4Network)
+    prefixes = []
+    offset = 0
+    while offset < len(data):
+        bits = data[offset]
+        octets = (bits + 7) // 8
+        if bits > size * 8 or offset + 1 + octets > len(data):
+            raise BmpError(f"Bad prefix length {bits}")
+        address = data[offset + 1:offset + 1 + octets].ljust(size, b'\0')
+        prefixes.append(str(family((address, bits), strict=False)))
+        offset += 1 + octets
+    return prefixes
+
+def parse_as_path(data, four_byte_as=True):
+    """Solo i segmenti AS_SEQUENCE, come nel client (gli AS_SET non danno adiacenze)"""
+    width, code = (4, 'I') if four_byte_as else (2, 'H')
+    path = []
+    offset = 0
+    while offset < len(data):
+        if offset + 2 > len(data):
+            raise BmpError("Truncated AS_PATH segment")
+        segment_type, count = data[offset], data[offset + 1]
+        end = offset + 2 + count * width
+        if end > len(data):
+            raise BmpError("Truncated AS_PATH segment")
+        if segment_type == AS_SEQUENCE:
+            path.extend(struct.unpack_from(f'!{count}{code}', data, offset + 2))
+        offset = end
+    return path
+
+def parse_attributes(data):
+    """Attributi di path come tipo -> valore"""
+    attributes = {}
+    offset = 0
+    while offset < len(data):
+        if offset + 3 > len(data):
+            raise BmpError("Truncated path attribute")
+        flags, attr_type = data[offset], data[offset + 1]
+        if flags & ATTR_FLAG_EXTENDED_LENGTH:
+            if offset + 4 > len(data):
+                raise BmpError("Truncated path attribute")
+            length = struct.unpack_from('!H', data, offset + 2)[0]
+            offset += 4
+        else:
+            length = data[offset + 2]
+            offset += 3
+        if offset + length > len(data):
+            raise BmpError("Truncated path attribute")
+        attributes[attr_type] = data[offset:offset + length]
+        offset += length
+    return attributes
+
+def parse_update(body, four_byte_as=True):
+    """(annunciati, ritirati, AS_PATH) di una UPDATE, IPv4 e MP_REACH/MP_UNREACH"""
+    if len(body) < 4:
+        raise BmpError("Truncated UPDATE")
+    withdrawn_len = struct.unpack_from('!H', body)[0]
+    withdrawn = parse_prefixes(body[2:2 + withdrawn_len], AFI_IPV4)
+    offset = 2 + withdrawn_len
+    if offset + 2 > len(body):
+        raise BmpError("Truncated UPDATE")
+    attributes_len = struct.unpack_from('!H', body, offset)[0]
+    attributes = parse_attributes(body[offset + 2:offset + 2 + attributes_len])
+    announced = parse_prefixes(body[offset + 2 + attributes_len:], AFI_IPV4)
+
+    reach = attributes.get(ATTR_MP_REACH_NLRI)
+    if reach and len(reach) >= 5:
+        afi = struct.unpack_from('!H', reach)[0]
+        next_hop_len = reach[3]
+        announced += parse_prefixes(reach[5 + next_hop_len:], afi)
+    unreach = attributes.get(ATTR_MP_UNREACH_NLRI)
+    if unreach and len(unreach) >= 3:
+        afi = struct.unpack_from('!H', unreach)[0]
+        withdrawn += parse_prefixes(unreach[3:], afi)
+
+    as_path = attributes.get(ATTR_AS_PATH)
+    return announced, withdrawn, parse_as_path(as_path, four_byte_as) if as_path is not None else None
+
+def is_end_of_rib(body):
+    """End-of-RIB (RFC 4724): UPDATE vuota per IPv4, solo MP_UNREACH_NLRI senza prefissi per le altre famiglie"""
+    if len(body) < 4 or struct.unpack_from('!H', body)[0] != 0:
+        return False
+    attributes_len = struct.unpack_from('!H', body, 2)[0]
+    if len(body) != 4 + attributes_len:
+        return False
+    if attributes_len == 0:
+        return True
+    attributes = parse_attributes(body[4:])
+    return list(attributes) == [ATTR_MP_UNREACH_NLRI] and len(attributes[ATTR_MP_UNREACH_NLRI]) == 3
+
+def parse_open_asn(body):
+    """ASN di chi ha mandato la OPEN (capability a 4 byte se presente)"""
+    if len(body) < 10:
+        raise BmpError("Truncated OPEN")
+    asn = struct.unpack_from('!H', body, 1)[0]
+    params_len = body[9]
+    params = body[10:10 + params_len]
+    offset = 0
+    while offset + 2 <= len(params):
+        param_type, param_len = params[offset], params[offset + 1]
+        value = params[offset + 2:offset + 2 + param_len]
+        #parametro 2: capability
+        if param_type == 2:
+            cap_offset = 0
+            while cap_offset + 2 <= len(value):
+                code, cap_len = value[cap_offset], value[cap_offset + 1]
+                if code == CAPABILITY_FOUR_OCTET_AS and cap_len == 4:
+                    return struct.unpack_from('!I', value, cap_offset + 2)[0]
+                cap_offset += 2 + cap_len
+        offset += 2 + param_len
+    return asn
+
+def parse_information(data):
+    """TLV di initiation/termination come tipo -> testo"""
+    info = {}
+    offset = 0
+    while offset + 4 <= len(data):
+        info_type, length = struct.unpack_from('!HH', data, offset)
+        info[info_type] = data[offset + 4:offset + 4 + length].decode('utf-8', 'replace')
+        offset += 4 + length
+    return info
+
+def parse_message(msg_type, body):
+    """Messaggio BMP come dict con 'type'; None per i tipi che non servono"""
+    if msg_type == ROUTE_MONITORING:
+        peer, rest = parse_peer_header(body)
+        bgp_type, update, _ = split_bgp_message(rest)
+        if bgp_type != BGP_UPDATE:
+            raise BmpError(f"Route Monitoring carrying BGP message type {bgp_type}")
+        announced, withdrawn, as_path = parse_update(update, peer['four_byte_as'])
+        return {'type': msg_type, 'peer': peer, 'announced': announced, 'withdrawn': withdrawn, 'as_path': as_path,
+                'end_of_rib': is_end_of_rib(update)}
+
+    if msg_type == PEER_UP:
+        peer, rest = parse_peer_header(body)
+        #indirizzo locale, porta locale, porta remota, poi OPEN inviata e ricevuta
+        bgp_type, sent_open, _ = split_bgp_message(rest[20:])
+        if bgp_type != BGP_OPEN:
+            raise BmpError(f"Peer Up carrying BGP message type {bgp_type}")
+        return {'type': msg_type, 'peer': peer, 'local_asn': parse_open_asn(sent_open)}
+
+    if msg_type == PEER_DOWN:
+        peer, rest = parse_peer_header(body)
+        return {'type': msg_type, 'peer': peer, 'reason': rest[0] if rest else 0}
+
+    if msg_type in (INITIATION, TERMINATION):
+        return {'type': msg_type, 'info': parse_information(body)}
+
+    return None
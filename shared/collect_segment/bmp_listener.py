@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""Listener BMP del controller: i router inviano le loro Adj-RIB-In, senza polling.
+
+Ogni sessione tiene le route per peer e conta quante usano ogni AS path e ogni
+segmento; i cambi (path/segmenti apparsi o spariti) vengono scritti a gruppi
+con BgpDataServicer.ingest_delta, nelle stesse tabelle dei report gRPC. Un AS
+deve usare o BMP o il client di raccolta: i report completi del client
+ritirerebbero i segmenti arrivati via BMP.
+
+Una sessione parte da quello che il database attribuisce già all'AS (sessioni
+precedenti mai chiuse, es. controller terminato): finito il dump iniziale
+(End-of-RIB da tutti i peer, o il primo silenzio del router) si ritira quello
+che il router non ha riannunciato. Il silenzio conta solo dopo SYNC_SETTLE
+secondi senza dati (un dump lento ha pause ben più lunghe del flush) e, se
+qualche peer non ha ancora mandato End-of-RIB, solo dopo SYNC_DEADLINE secondi
+dall'inizio della sessione.
+
+Per le prove senza router, 'bmp_listener.py capture.bmp' rilegge un flusso BMP
+catturato (es. con 'nc -l 11019 > capture.bmp') nel database della topologia.
+"""
+
+import argparse
+import ipaddress
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+sys.path.append('/shared')
+import bgp_segments_pb2
+import bmp_decoder
+from bmp_decoder import BmpError, BmpReader
+
+BMP_PORT = 11019
+#i cambi si scrivono al più ogni FLUSH_INTERVAL secondi o ogni FLUSH_CHANGES path/segmenti
+FLUSH_INTERVAL = 1.0
+FLUSH_CHANGES = 5000
+#silenzio che chiude il dump iniziale senza End-of-RIB, e attesa massima degli End-of-RIB
+SYNC_SETTLE = 10.0
+SYNC_DEADLINE = 120.0
+READ_SIZE = 65536
+
+def path_segments(local_asn, path):
+    """Segmenti di un AS path visto da local_asn (come calculate_segments_from_paths)"""
+    full_path = path if path[0] == local_asn else (local_asn,) + path
+    return {
+        (min(as_a, as_b), max(as_a, as_b))
+        for as_a, as_b in zip(full_path, full_path[1:])
+        if as_a != as_b
+    }
+
+class BmpSession:
+    """Stato di una sessione BMP (un router): route per peer e riferimenti a path e segmenti"""
+    def __init__(self, servicer, name, local_asn=None, settle=SYNC_SETTLE, deadline=SYNC_DEADLINE):
+        self.servicer = servicer
+        self.name = name
+        self.local_asn = local_asn
+        self.settle = settle
+        self.deadline = deadline
+        self.reader = BmpReader()
+        #(peer, post-policy, prefisso) -> AS path
+        self.routes = {}
+        self.path_refs = Counter()
+        self.segment_refs = Counter()
+        #path e segmenti già scritti nel database, e quelli da ricontrollare al prossimo flush
+        self.stored_paths = set()
+        self.stored_segments = set()
+        self.dirty_paths = set()
+        self.dirty_segments = set()
+        #stato lasciato da sessioni precedenti letto dal database, dump iniziale completato
+        self.seeded = False
+        self.synced = False
+        #peer (distinguisher, indirizzo) saliti e quelli che hanno mandato End-of-RIB
+        self.peers_up = set()
+        self.peers_eor = set()
+        self.last_flush = time.monotonic()
+        self.started = self.last_data = self.last_flush
+        self.messages = 0
+
+    def feed(self, data):
+        self.last_data = time.monotonic()
+        for msg_type, body in self.reader.feed(data):
+            self.messages += 1
+            try:
+                message = bmp_decoder.parse_message(msg_type, body)
+            except BmpError as e:
+                print(f"[BMP {self.name}] Skipping malformed message: {e}")
+                continue
+            if message is not None:
+                self.handle(message)
+        #router che non tace mai (es. statistiche periodiche): vale la scadenza
+        self.settle_dump()
+        if self.due():
+            self.flush()
+
+    def handle(self, message):
+        msg_type = message['type']
+        if msg_type == bmp_decoder.ROUTE_MONITORING:
+            peer = self.peer_key(message['peer'])
+            if message['end_of_rib']:
+                self.end_of_rib(peer[:2])
+                return
+            for prefix in message['withdrawn']:
+                self.withdraw((peer, prefix))
+            path = tuple(message['as_path'] or ())
+            for prefix in message['announced']:
+                if path:
+                    self.announce((peer, prefix), path)
+                else:
+                    #route interne all'AS: nessun segmento
+                    self.withdraw((peer, prefix))
+        elif msg_type == bmp_decoder.PEER_UP:
+            if self.local_asn is None:
+                self.local_asn = message['local_asn']
+                print(f"[BMP {self.name}] Router is AS{self.local_asn}")
+                #route arrivate prima dell'ASN: i loro segmenti si contano ora
+                for path in self.path_refs:
+                    self.acquire_segments(path)
+            elif message['local_asn'] != self.local_asn:
+                print(f"[BMP {self.name}] Peer Up from AS{message['local_asn']}, session is AS{self.local_asn}")
+            self.peers_up.add(self.peer_key(message['peer'])[:2])
+        elif msg_type == bmp_decoder.PEER_DOWN:
+            peer = self.peer_key(message['peer'])
+            self.peers_up.discard(peer[:2])
+            self.drop_peer(peer)
+        elif msg_type == bmp_decoder.INITIATION:
+            name = message['info'].get(bmp_decoder.INFO_SYS_NAME)
+            if name:
+                print(f"[BMP {self.name}] Initiation from {name}")
+        elif msg_type == bmp_decoder.TERMINATION:
+            print(f"[BMP {self.name}] Termination")
+
+    def peer_key(self, peer):
+        return (peer['distinguisher'], peer['address'], peer['post_policy'])
+
+    def announce(self, key, path):
+        old = self.routes.get(key)
+        if old == path:
+            return
+        if old is not None:
+            self.release(old)
+        self.routes[key] = path
+        self.path_refs[path] += 1
+        if self.path_refs[path] == 1:
+            self.dirty_paths.add(path)
+            if self.local_asn is not None:
+                self.acquire_segments(path)
+
+    def withdraw(self, key):
+        old = self.routes.pop(key, None)
+        if old is not None:
+            self.release(old)
+
+    def release(self, path):
+        self.path_refs[path] -= 1
+        if self.path_refs[path] == 0:
+            del self.path_refs[path]
+            self.dirty_paths.add(path)
+            if self.local_asn is not None:
+                for segment in path_segments(self.local_asn, path):
+                    self.segment_refs[segment] -= 1
+                    if self.segment_refs[segment] == 0:
+                        del self.segment_refs[segment]
+                        self.dirty_segments.add(segment)
+
+    def acquire_segments(self, path):
+        for segment in path_segments(self.local_asn, path):
+            self.segment_refs[segment] += 1
+            if self.segment_refs[segment] == 1:
+                self.dirty_segments.add(segment)
+
+    def drop_peer(self, peer):
+        for key in [key for key in self.routes if key[0] == peer]:
+            self.withdraw(key)
+
+    def end_of_rib(self, peer):
+        self.peers_eor.add(peer)
+        if not self.synced and self.peers_up and self.peers_up <= self.peers_eor:
+            print(f"[BMP {self.name}] End-of-RIB from all {len(self.peers_up)} peers")
+            self.synchronize()
+
+    def seed(self):
+        """Parte da path e segmenti che il database attribuisce già all'AS"""
+        if self.seeded or self.local_asn is None:
+            return
+        reported = self.servicer.reported_by(self.local_asn)
+        if reported is None:
+            #database non disponibile: si riprova al prossimo flush
+            return
+        paths, segments = reported
+        self.stored_paths.update(paths)
+        self.stored_segments.update(segments)
+        self.seeded = True
+        if paths or segments:
+            print(f"[BMP {self.name}] AS{self.local_asn} has {len(paths)} AS paths and "
+                  f"{len(segments)} segments from a previous session")
+
+    def synchronize(self):
+        """Dump iniziale finito: quello che il router non ha riannunciato viene ritirato"""
+        self.seed()
+        if not self.seeded:
+            return
+        self.synced = True
+        self.dirty_paths.update(path for path in self.stored_paths if path not in self.path_refs)
+        self.dirty_segments.update(seg for seg in self.stored_segments if seg not in self.segment_refs)
+        self.flush()
+
+    def dump_settled(self):
+        """Dump iniziale finito senza End-of-RIB: silenzio lungo, o scadenza della sessione"""
+        now = time.monotonic()
+        if not self.messages:
+            return False
+        if now - self.started >= self.deadline:
+            return True
+        if self.peers_up and not self.peers_up <= self.peers_eor:
+            #End-of-RIB attesi: una pausa tra un peer e l'altro non basta
+            return False
+        return now - self.last_data >= self.settle
+
+    def settle_dump(self):
+        if not self.synced and self.dump_settled():
+            print(f"[BMP {self.name}] Initial table dump considered complete without End-of-RIB")
+            self.synchronize()
+
+    def quiet(self):
+        """Il router tace: scrive i cambi, e chiude il dump iniziale se il silenzio dura"""
+        self.settle_dump()
+        self.flush()
+
+    def due(self):
+        changes = len(self.dirty_paths) + len(self.dirty_segments)
+        return changes >= FLUSH_CHANGES or (changes and time.monotonic() - self.last_flush >= FLUSH_INTERVAL)
+
+    def flush(self):
+        """Scrive i path e i segmenti apparsi o spariti dall'ultimo flush"""
+        self.last_flush = time.monotonic()
+        self.seed()
+        if not self.seeded:
+            #ASN non ancora noto o database non disponibile: i cambi restano in attesa
+            return
+
+        added_paths = [path for path in self.dirty_paths if path in self.path_refs and path not in self.stored_paths]
+        withdrawn_paths = [path for path in self.dirty_paths if path not in self.path_refs and path in self.stored_paths]
+        added_segments = [seg for seg in self.dirty_segments
+                          if seg in self.segment_refs and seg not in self.stored_segments]
+        withdrawn_segments = [seg for seg in self.dirty_segments
+                              if seg not in self.segment_refs and seg in self.stored_segments]
+        self.dirty_paths = set()
+        self.dirty_segments = set()
+        if not (added_paths or withdrawn_paths or added_segments or withdrawn_segments):
+            return
+
+        request = bgp_segments_pb2.BgpDeltaRequest(
+            local_asn=self.local_asn,
+            added_segments=[bgp_segments_pb2.Segment(as_a=a, as_b=b) for a, b in sorted(added_segments)],
+            withdrawn_segments=[bgp_segments_pb2.Segment(as_a=a, as_b=b) for a, b in sorted(withdrawn_segments)],
+            added_paths=[bgp_segments_pb2.AsPath(as_sequence=path) for path in added_paths],
+            withdrawn_paths=[bgp_segments_pb2.AsPath(as_sequence=path) for path in withdrawn_paths]
+        )
+        result = self.servicer.ingest_delta(self.local_asn, request)
+        if result is None:
+            #database non disponibile: si riprova al prossimo flush
+            self.dirty_paths.update(added_paths + withdrawn_paths)
+            self.dirty_segments.update(added_segments + withdrawn_segments)
+            return
+
+        self.stored_paths.update(added_paths)
+        self.stored_paths.difference_update(withdrawn_paths)
+        self.stored_segments.update(added_segments)
+        self.stored_segments.difference_update(withdrawn_segments)
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] BMP AS{self.local_asn}: "
+              f"paths +{len(added_paths)}/-{len(withdrawn_paths)}, "
+              f"segments +{len(added_segments)}/-{len(withdrawn_segments)} "
+              f"({result[0]} new, {result[1]} removed in topology)")
+        sys.stdout.flush()
+
+    def close(self):
+        """Fine sessione: senza aggiornamenti le route del router non sono più affidabili"""
+        for key in list(self.routes):
+            self.withdraw(key)
+        self.synchronize()
+
+def trusted_asn(servicer, address):
+    """ASN del nodo trusted con questo indirizzo, None se sconosciuto"""
+    address = ipaddress.ip_address(address.split('%')[0])
+    if getattr(address, 'ipv4_mapped', None):
+        address = address.ipv4_mapped
+    for asn, node in servicer.trusted_nodes.items():
+        for known in (node.get('ipv4'), node.get('ipv6')):
+            try:
+                if known and ipaddress.ip_address(known.split('/')[0]) == address:
+                    return asn
+            except ValueError:
+                continue
+    return None
+
+class BmpHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        address = self.client_address[0]
+        asn = trusted_asn(self.server.servicer, address)
+        if asn is None:
+            print(f"[BMP] Rejected session from {address}: not a trusted node")
+            return
+
+        session = BmpSession(self.server.servicer, address, asn, self.server.settle)
+        print(f"[BMP] Session from {address} (AS{asn})")
+        sys.stdout.flush()
+        #il timeout serve solo a scrivere i cambi anche quando il router tace
+        self.request.settimeout(FLUSH_INTERVAL)
+        try:
+            while True:
+                try:
+                    data = self.request.recv(READ_SIZE)
+                except socket.timeout:
+                    session.quiet()
+                    continue
+                if not data:
+                    break
+                session.feed(data)
+        except (OSError, BmpError) as e:
+            print(f"[BMP] Session from {address} closed: {e}")
+        finally:
+            session.close()
+            print(f"[BMP] Session from {address} ended after {session.messages} messages")
+            sys.stdout.flush()
+
+class BmpServer(socketserver.ThreadingTCPServer):
+    address_family = socket.AF_INET6
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, servicer, port=BMP_PORT, addr='::', settle=SYNC_SETTLE):
+        self.servicer = servicer
+        self.settle = settle
+        super().__init__((addr, port), BmpHandler)
+
+def start_bmp_listener(servicer, port=BMP_PORT, addr='::', settle=SYNC_SETTLE):
+    """Listener BMP in un thread daemon; restituisce il server"""
+    server = BmpServer(servicer, port, addr, settle)
+    threading.Thread(target=server.serve_forever, name='bmp-listener', daemon=True).start()
+    print(f"BMP listener on port {server.server_address[1]}")
+    return server
+
+def replay(servicer, path, local_asn=None, read_size=READ_SIZE):
+    """Riproduce un flusso BMP catturato come se arrivasse da un router; restituisce la sessione"""
+    session = BmpSession(servicer, path, local_asn)
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(read_size)
+            if not data:
+                break
+            session.feed(data)
+    #la cattura contiene tutto il dump
+    session.synchronize()
+    return session
+
+def main():
+    #il controller importa questo modulo per --bmp-port: qui solo per la riproduzione
+    import bgp_segments_controller
+
+    parser = argparse.ArgumentParser(description='Replay a captured BMP stream into the topology database')
+    parser.add_argument('capture', help="Raw BMP bytes, e.g. from 'nc -l 11019 > capture.bmp'")
+    parser.add_argument('--asn', type=int, default=None,
+                        help='ASN of the monitored router (default: from its Peer Up messages)')
+    args = parser.parse_args()
+
+    bgp_segments_controller.init_topology_database()
+    servicer = bgp_segments_controller.BgpDataServicer()
+    session = replay(servicer, args.capture, args.asn)
+    print(f"Replayed {session.messages} BMP messages: {len(session.routes)} routes, "
+          f"{len(session.path_refs)} AS paths, {len(session.segment_refs)} segments")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Controller unico: registrazione, raccolta dei segmenti e path SRv6 in un solo processo.
+
+I tre servizi condividono lo snapshot di topologia del path server (anche per
+i nodi trusted della raccolta) e ogni scrittura aggiorna subito precompute e
+WatchPaths, senza aspettare il polling dei database.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent import futures
+
+import grpc
+
+SHARED_DIR = os.path.dirname(os.path.abspath(__file__))
+for subdir in ('registration', 'collect_segment', 'request_secure_path'):
+    sys.path.append(os.path.join(SHARED_DIR, subdir))
+import nodeinfo_pb2_grpc
+import bgp_segments_pb2_grpc
+import srv6_path_pb2_grpc
+import registration_server
+import bgp_segments_controller
+import bmp_listener
+import srv6_path_server
+from aio_serving import BLOCKING_WORKERS, BlockingExecutor
+import metrics
+
+CONTROLLER_PORT = 50050
+#porte dei tre server separati, per i client esistenti
+LEGACY_PORTS = (50051, 50052, 50053)
+#i tre server separati avevano 20 thread ciascuno; gli stream agent/WatchPaths
+#hanno thread propri in più (srv6_path_server.MAX_STREAMS)
+CONTROLLER_WORKERS = 60
+
+class ControllerState:
+    """Servicer dei tre servizi sopra un solo calcolatore di path (snapshot, cache, agent)"""
+    def __init__(self, max_streams=srv6_path_server.MAX_STREAMS):
+        registration_server.init_database()
+        bgp_segments_controller.init_topology_database()
+        self.path = srv6_path_server.SRv6PathServicer(max_streams)
+        self.calculator = self.path.calculator
+        self.registration = registration_server.NodeInfoServicer(on_change=self.topology_changed)
+        self.collection = bgp_segments_controller.BgpDataServicer(
+            trusted_nodes=self.trusted_nodes, on_change=self.topology_changed
+        )
+
+    def trusted_nodes(self):
+        return self.calculator.load_data().trusted_nodes
+
+    def topology_changed(self):
+        snapshot = self.calculator.load_data()
+        self.path.precomputer.notify(snapshot)
+        self.path.watch_hub.notify(snapshot)
+
+    def stop(self):
+        srv6_path_server.stop_servicer(self.path)
+
+def listen(server, port, legacy_ports):
+    client_creds, agent_creds = srv6_path_server.server_credentials()
+    ports = [port] + (list(LEGACY_PORTS) if legacy_ports else [])
+    for client_port in ports:
+        server.add_secure_port(f'[::]:{client_port}', client_creds)
+    #porta degli agent: TLS mutuo con i certificati dei nodi
+    server.add_secure_port(f'[::]:{srv6_path_server.AGENT_PORT}', agent_creds)
+    return ports
+
+def print_banner(ports, mode):
+    print("=" * 60)
+    print(f"SRv6 CONTROLLER - registration, segment collection, secure paths ({mode})")
+    print("=" * 60)
+    print(f"Services on port(s) {', '.join(str(port) for port in ports)}")
+    print(f"Route agents on port {srv6_path_server.AGENT_PORT}")
+    print("Waiting for nodes...")
+    print("=" * 60)
+    sys.stdout.flush()
+
+def serve(port=CONTROLLER_PORT, legacy_ports=True, workers=CONTROLLER_WORKERS, bmp_port=0,
+          max_streams=srv6_path_server.MAX_STREAMS, bmp_settle=bmp_listener.SYNC_SETTLE):
+    state = ControllerState(max_streams)
+    if bmp_port:
+        bmp_listener.start_bmp_listener(state.collection, bmp_port, settle=bmp_settle)
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=workers + max_streams), options=srv6_path_server.SERVER_OPTIONS
+    )
+    nodeinfo_pb2_grpc.add_NodeInfoServiceServicer_to_server(state.registration, server)
+    bgp_segments_pb2_grpc.add_BgpPathServiceServicer_to_server(state.collection, server)
+    srv6_path_pb2_grpc.add_SRv6PathServiceServicer_to_server(state.path, server)
+    ports = listen(server, port, legacy_ports)
+    server.start()
+    print_banner(ports, "threads")
+
+    try:
+        while True:
+            time.sleep(bgp_segments_controller.SUMMARY_INTERVAL)
+            if state.collection.received_from:
+                state.collection.print_summary()
+    except KeyboardInterrupt:
+        print("\nController closing...")
+        state.stop()
+        server.stop(0)
+
+async def serve_aio(port=CONTROLLER_PORT, legacy_ports=True, blocking_workers=BLOCKING_WORKERS,
+                    install_workers=srv6_path_server.INSTALL_WORKERS, bmp_port=0,
+                    bmp_settle=bmp_listener.SYNC_SETTLE):
+    state = ControllerState()
+    if bmp_port:
+        bmp_listener.start_bmp_listener(state.collection, bmp_port, settle=bmp_settle)
+    blocking = BlockingExecutor(blocking_workers, 'controller')
+    install = BlockingExecutor(install_workers, 'path-install')
+
+    server = grpc.aio.server(options=srv6_path_server.SERVER_OPTIONS)
+    nodeinfo_pb2_grpc.add_NodeInfoServiceServicer_to_server(
+        registration_server.AsyncNodeInfoServicer(state.registration, blocking), server
+    )
+    bgp_segments_pb2_grpc.add_BgpPathServiceServicer_to_server(
+        bgp_segments_controller.AsyncBgpDataServicer(state.collection, blocking), server
+    )
+    srv6_path_pb2_grpc.add_SRv6PathServiceServicer_to_server(
+        srv6_path_server.AsyncSRv6PathServicer(state.path, blocking, install), server
+    )
+    ports = listen(server, port, legacy_ports)
+    await server.start()
+    print_banner(ports, "asyncio")
+
+    try:
+        while True:
+            await asyncio.sleep(bgp_segments_controller.SUMMARY_INTERVAL)
+            if state.collection.received_from:
+                await asyncio.get_running_loop().run_in_executor(blocking.pool, state.collection.print_summary)
+    finally:
+        state.stop()
+        await server.stop(0)
+        blocking.shutdown()
+        install.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description='Unified SRv6 controller')
+    parser.add_argument('--port', type=int, default=CONTROLLER_PORT, help='Port serving all three services')
+    parser.add_argument('--no-legacy-ports', action='store_true',
+                        help=f"Do not listen on {', '.join(str(port) for port in LEGACY_PORTS)}")
+    parser.add_argument('--aio', action='store_true', help='Serve with grpc.aio (coroutine handlers)')
+    parser.add_argument('--workers', type=int, default=CONTROLLER_WORKERS,
+                        help='gRPC threads for short RPCs (threaded mode)')
+    parser.add_argument('--max-streams', type=int, default=srv6_path_server.MAX_STREAMS,
+                        help='Agent and WatchPaths streams, one thread each; more are rejected (threaded mode)')
+    parser.add_argument('--blocking-workers', type=int, default=BLOCKING_WORKERS,
+                        help='Threads for database and path work in --aio mode')
+    parser.add_argument('--install-workers', type=int, default=srv6_path_server.INSTALL_WORKERS,
+                        help='Concurrent InstallPath calls in --aio mode')
+    parser.add_argument('--metrics-port', type=int, default=0,
+                        help='Serve Prometheus metrics on 127.0.0.1:PORT (0: disabled)')
+    parser.add_argument('--bmp-port', type=int, default=0,
+                        help=f'Accept BMP sessions from trusted routers on PORT, e.g. {bmp_listener.BMP_PORT} (0: disabled)')
+    parser.add_argument('--bmp-settle', type=float, default=bmp_listener.SYNC_SETTLE,
+                        help='Seconds of BMP silence that end a router\'s initial table dump without End-of-RIB')
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        metrics.start_http_server(args.metrics_port)
+
+    legacy_ports = not args.no_legacy_ports
+    if not args.aio:
+        serve(args.port, legacy_ports, args.workers, args.bmp_port, args.max_streams, args.bmp_settle)
+        return
+    try:
+        asyncio.run(serve_aio(args.port, legacy_ports, args.blocking_workers, args.install_workers,
+                              args.bmp_port, args.bmp_settle))
+    except KeyboardInterrupt:
+        print("\nController closing...")
+
+if __name__ == '__main__':
+    main()
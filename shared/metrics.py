@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""Metriche del controller (contatori, gauge, istogrammi) esposte in formato testo Prometheus.
+
+Un solo registro per processo: i server lo popolano e start_http_server lo
+serve su un endpoint HTTP locale (GET /metrics).
+"""
+
+import bisect
+import functools
+import inspect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+#secondi: da sotto il millisecondo (cache) ai timeout ssh
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in pairs) + '}'
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name}: labels {sorted(labels)} instead of {list(self.labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            items = sorted(self.values.items())
+        for key, value in items:
+            lines.extend(self.sample_lines(key, value))
+        return lines
+
+    def sample_lines(self, key, value):
+        return [f"{self.name}{format_labels(self.labels, key)} {format_value(value)}"]
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = value
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                #conteggi per bucket (non cumulativi), somma, totale
+                state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][slot] += 1
+            state[1] += value
+            state[2] += 1
+
+    def sample_lines(self, key, state):
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            labels = format_labels(self.labels, key, [('le', format_value(float(bound)))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = format_labels(self.labels, key)
+        lines.append(f"{self.name}_sum{labels} {format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+    def time(self, **labels):
+        return Timer(self, labels)
+
+class Timer:
+    """with histogram.time(...): osserva la durata del blocco in secondi"""
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []
+        self.lock = threading.Lock()
+
+    def register(self, cls, name, help_text, labels=(), **kwargs):
+        """Metrica per nome: chi la registra di nuovo (controller unico) riceve la stessa"""
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, help_text, labels, **kwargs)
+            elif not isinstance(metric, cls) or metric.labels != tuple(labels):
+                raise ValueError(f"Metric {name} already registered with another type or labels")
+            return metric
+
+    def on_collect(self, callback):
+        """callback() chiamata prima di ogni esposizione (gauge letti da altre strutture)"""
+        with self.lock:
+            self.collectors.append(callback)
+
+    def expose(self):
+        with self.lock:
+            collectors = list(self.collectors)
+            metrics = sorted(self.metrics.items())
+        for callback in collectors:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Metrics collector error: {e}")
+        lines = [line for _, metric in metrics for line in metric.expose()]
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+def counter(name, help_text, labels=()):
+    return REGISTRY.register(Counter, name, help_text, labels)
+
+def gauge(name, help_text, labels=()):
+    return REGISTRY.register(Gauge, name, help_text, labels)
+
+def histogram(name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram, name, help_text, labels, buckets=buckets)
+
+RPC_DURATION = histogram('controller_rpc_duration_seconds', 'RPC handler latency', ('method',))
+RPC_TOTAL = counter('controller_rpc_total', 'RPCs handled, by outcome', ('method', 'status'))
+DB_LOCK_WAIT = histogram('controller_db_lock_wait_seconds', 'Time spent waiting for a database lock', ('db',))
+DB_TRANSACTION = histogram('controller_db_transaction_seconds', 'Time a database lock is held', ('db',))
+
+def rpc_status(response):
+    #risposte con success=False contano come fallite anche se la RPC termina
+    return 'FAILED' if getattr(response, 'success', True) is False else 'OK'
+
+def rpc(handler):
+    """Decoratore per i metodi dei servicer: latenza e conteggio per metodo, anche degli stream"""
+    method = handler.__name__
+
+    if inspect.isgeneratorfunction(handler):
+        @functools.wraps(handler)
+        def stream_wrapper(self, request, context):
+            started = time.perf_counter()
+            status = 'OK'
+            try:
+                yield from handler(self, request, context)
+            except GeneratorExit:
+                status = 'CANCELLED'
+                raise
+            except Exception:
+                status = 'ERROR'
+                raise
+            finally:
+                RPC_DURATION.observe(time.perf_counter() - started, method=method)
+                RPC_TOTAL.inc(method=method, status=status)
+        return stream_wrapper
+
+    @functools.wraps(handler)
+    def wrapper(self, request, context):
+        started = time.perf_counter()
+        status = 'ERROR'
+        try:
+            response = handler(self, request, context)
+            status = rpc_status(response)
+            return response
+        finally:
+            RPC_DURATION.observe(time.perf_counter() - started, method=method)
+            RPC_TOTAL.inc(method=method, status=status)
+    return wrapper
+
+class InstrumentedLock:
+    """Lock dei database: misura l'attesa per acquisirlo e quanto resta tenuto (la transazione)"""
+    def __init__(self, db):
+        self.db = db
+        self.lock = threading.Lock()
+        self.acquired = None
+
+    def __enter__(self):
+        started = time.perf_counter()
+        self.lock.acquire()
+        self.acquired = time.perf_counter()
+        DB_LOCK_WAIT.observe(self.acquired - started, db=self.db)
+        return self
+
+    def __exit__(self, *exc):
+        held = time.perf_counter() - self.acquired
+        self.lock.release()
+        DB_TRANSACTION.observe(held, db=self.db)
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = REGISTRY.expose().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_http_server(port, addr='127.0.0.1'):
+    """Endpoint /metrics in un thread daemon; restituisce l'HTTPServer"""
+    server = ThreadingHTTPServer((addr, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    print(f"Metrics on http://{addr}:{server.server_address[1]}/metrics")
+    return server
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0enodeinfo.proto\"\x89\x01\n\x0fNodeInfoMessage\x12\x10\n\x08hostname\x18\x01 \x01(\t\x12\x0c\n\x04ipv4\x18\x02 \x01(\t\x12\x0c\n\x04ipv6\x18\x03 \x01(\t\x12\x12\n\nrouter_bgp\x18\x04 \x01(\x05\x12\x0f\n\x07locator\x18\x05 \x01(\t\x12\x11\n\ttimestamp\x18\x06 \x01(\t\x12\x10\n\x08networks\x18\x07 \x01(\t\"4\n\x10NodeInfoResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t2F\n\x0fNodeInfoService\x12\x33\n\x0cRegisterNode\x12\x10.NodeInfoMessage\x1a\x11.NodeInfoResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0enodeinfo.proto\"\xbe\x01\n\x0fNodeInfoMessage\x12\x10\n\x08hostname\x18\x01 \x01(\t\x12\x0c\n\x04ipv4\x18\x02 \x01(\t\x12\x0c\n\x04ipv6\x18\x03 \x01(\t\x12\x12\n\nrouter_bgp\x18\x04 \x01(\x05\x12\x0f\n\x07locator\x18\x05 \x01(\t\x12\x11\n\ttimestamp\x18\x06 \x01(\t\x12\x10\n\x08networks\x18\x07 \x01(\t\x12\x19\n\x11locator_block_len\x18\x08 \x01(\x05\x12\x18\n\x10locator_node_len\x18\t \x01(\x05\"4\n\x10NodeInfoResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t2F\n\x0fNodeInfoService\x12\x33\n\x0cRegisterNode\x12\x10.NodeInfoMessage\x1a\x11.NodeInfoResponseb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -32,9 +32,9 @@ _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'nodeinfo_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
   _globals['_NODEINFOMESSAGE']._serialized_start=19
-  _globals['_NODEINFOMESSAGE']._serialized_end=156
-  _globals['_NODEINFORESPONSE']._serialized_start=158
-  _globals['_NODEINFORESPONSE']._serialized_end=210
-  _globals['_NODEINFOSERVICE']._serialized_start=212
-  _globals['_NODEINFOSERVICE']._serialized_end=282
+  _globals['_NODEINFOMESSAGE']._serialized_end=209
+  _globals['_NODEINFORESPONSE']._serialized_start=211
+  _globals['_NODEINFORESPONSE']._serialized_end=263
+  _globals['_NODEINFOSERVICE']._serialized_start=265
+  _globals['_NODEINFOSERVICE']._serialized_end=335
 # @@protoc_insertion_point(module_scope)
@@ -67,6 +67,32 @@ def get_locator():
     except Exception:
         return "N/A"
 
+def get_locator_format():
+    """(block-len, node-len) del locator SRv6, (0, 0) se non configurati"""
+    try:
+        result = subprocess.run(
+            ['vtysh', '-c', 'show segment-routing srv6 locator json'],
+            capture_output=True, text=True, encoding='utf-8', errors='ignore', timeout=5
+        )
+        for locator in json.loads(result.stdout).get("locators", []):
+            if locator.get("blockBitsLength") and locator.get("nodeBitsLength"):
+                return locator["blockBitsLength"], locator["nodeBitsLength"]
+    except Exception:
+        pass
+    
+    #versioni di FRR senza i campi nel json: dalla configurazione
+    try:
+        result = subprocess.run(['vtysh', '-c', 'show running-config'],
+                                capture_output=True, text=True, timeout=5)
+        for line in result.stdout.split('\n'):
+            parts = line.split()
+            if parts[:1] == ['prefix'] and 'block-len' in parts and 'node-len' in parts:
+                return (int(parts[parts.index('block-len') + 1]),
+                        int(parts[parts.index('node-len') + 1]))
+    except Exception:
+        pass
+    return 0, 0
+
 def find_interface_for_neighbor(neighbor_ip):
     try:
         result = subprocess.run(
@@ -240,6 +266,7 @@ def try_register(stub, hostname, interface, attempt):
         ipv6 = get_ipv6_from_interface(interface)
         router_bgp = get_as_number()
         locator = get_locator()
+        block_len, node_len = get_locator_format()
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         neighbors = get_bgp_neighbors()
         neighbors_json = json.dumps(neighbors)
@@ -251,12 +278,14 @@ def try_register(stub, hostname, interface, attempt):
             router_bgp=router_bgp,
             locator=locator,
             timestamp=timestamp,
-            networks=neighbors_json
+            networks=neighbors_json,
+            locator_block_len=block_len,
+            locator_node_len=node_len
         )
         
         print(f"Attempt #{attempt}")
         print(f"   IPv4: {ipv4} | IPv6: {ipv6}")
-        print(f"   AS: {router_bgp} | Locator: {locator}")
+        print(f"   AS: {router_bgp} | Locator: {locator} (block-len {block_len}, node-len {node_len})")
         print(f"   Networks found: {len(neighbors)}")
         for net in neighbors:
             print(f"      • {net['neighbor_ip']} (dev {net['interface']})")
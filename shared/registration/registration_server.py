@@ -2,12 +2,13 @@
 # -*- coding: utf-8 -*-
 import grpc
 from concurrent import futures
+import argparse
+import asyncio
 import time
 import sqlite3
 from datetime import datetime
 import sys
 import os
-import threading
 import json
 import locale
 import nodeinfo_pb2
@@ -15,14 +16,27 @@ import nodeinfo_pb2_grpc
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 sys.path.append('/shared')
+from aio_serving import BLOCKING_WORKERS, BlockingExecutor, ContextProxy
+import metrics
 
 DB_PATH = '/shared/trusted_nodes.db'
-db_lock = threading.Lock()
+db_lock = metrics.InstrumentedLock('trusted_nodes')
+
+#generazioni conservate nel log dei nodi modificati (oltre: ricarica completa)
+CHANGE_LOG_GENERATIONS = 1000
 
 CERT_DIR = '/shared/certs'
 SERVER_CERT = os.path.join(CERT_DIR, "server.crt")
 SERVER_KEY = os.path.join(CERT_DIR, "server.key")
 
+SERVER_OPTIONS = [
+    ('grpc.max_send_message_length', 50 * 1024 * 1024),
+    ('grpc.max_receive_message_length', 50 * 1024 * 1024),
+    ('grpc.keepalive_time_ms', 30000),
+    ('grpc.keepalive_timeout_ms', 10000),
+    ('grpc.keepalive_permit_without_calls', True),
+]
+
 def init_database():
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
@@ -34,10 +48,18 @@ def init_database():
             ipv6 TEXT NOT NULL,
             router_bgp INTEGER NOT NULL,
             locator TEXT NOT NULL,
+            locator_block_len INTEGER NOT NULL DEFAULT 0,
+            locator_node_len INTEGER NOT NULL DEFAULT 0,
             last_update TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
     
+    #database creati prima del formato del locator
+    columns = {row[1] for row in cursor.execute('PRAGMA table_info(nodes)')}
+    for column in ('locator_block_len', 'locator_node_len'):
+        if column not in columns:
+            cursor.execute(f'ALTER TABLE nodes ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0')
+    
     #mi serve per estrapolare i vicini bgp
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS bgp_neighbors (
@@ -51,30 +73,77 @@ def init_database():
         )
     ''')
     
+    #contatore letto dal path server per sapere quando ricaricare la topologia
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS topology_generation (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            generation INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('INSERT OR IGNORE INTO topology_generation (id, generation) VALUES (0, 0)')
+    
+    #nodi (ASN) cambiati per generazione: il path server aggiorna solo quelli
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS node_changes (
+            generation INTEGER NOT NULL,
+            asn INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS node_changes_generation ON node_changes (generation)')
+    
     conn.commit()
     conn.close()
     print(f"Database ready to go\n")
     sys.stdout.flush()
 
-def save_trusted_node(hostname, ipv4, ipv6, router_bgp, locator, neighbors_json):
+def bump_generation(cursor, asns=()):
+    cursor.execute('UPDATE topology_generation SET generation = generation + 1 WHERE id = 0')
+    cursor.execute('SELECT generation FROM topology_generation WHERE id = 0')
+    generation = cursor.fetchone()[0]
+    cursor.executemany(
+        'INSERT INTO node_changes (generation, asn) VALUES (?, ?)',
+        [(generation, asn) for asn in sorted(set(asns))]
+    )
+    cursor.execute('DELETE FROM node_changes WHERE generation <= ?', (generation - CHANGE_LOG_GENERATIONS,))
+    return generation
+
+def node_state(cursor, hostname, router_bgp):
+    cursor.execute('''
+        SELECT ipv4, ipv6, router_bgp, locator, locator_block_len, locator_node_len
+        FROM nodes WHERE hostname = ?
+    ''', (hostname,))
+    node = cursor.fetchone()
+    cursor.execute('''
+        SELECT neighbor_ip, neighbor_asn, interface FROM bgp_neighbors
+        WHERE local_asn = ? ORDER BY neighbor_ip
+    ''', (router_bgp,))
+    return node, cursor.fetchall()
+
+def save_trusted_node(hostname, ipv4, ipv6, router_bgp, locator, neighbors_json, block_len=0, node_len=0):
     """Salva nodo e neighbor BGP"""
     try:
         with db_lock:
             conn = sqlite3.connect(DB_PATH, timeout=5)
             cursor = conn.cursor()
             
+            old_state = node_state(cursor, hostname, router_bgp)
+            old_node = old_state[0]
+            
             # 1. Salva nodo
             cursor.execute('''
-                INSERT INTO nodes (hostname, ipv4, ipv6, router_bgp, locator, last_update)
-                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                INSERT INTO nodes (hostname, ipv4, ipv6, router_bgp, locator,
+                                   locator_block_len, locator_node_len, last_update)
+                VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
                 ON CONFLICT(hostname) 
                 DO UPDATE SET 
                     ipv4 = excluded.ipv4,
                     ipv6 = excluded.ipv6,
                     router_bgp = excluded.router_bgp,
                     locator = excluded.locator,
+                    locator_block_len = excluded.locator_block_len,
+                    locator_node_len = excluded.locator_node_len,
                     last_update = CURRENT_TIMESTAMP
-            ''', (hostname, ipv4, ipv6, router_bgp, locator))
+            ''', (hostname, ipv4, ipv6, router_bgp, locator, block_len, node_len))
             
             # 2. Rimuovi vecchi neighbor
             cursor.execute('DELETE FROM bgp_neighbors WHERE local_asn = ?', (router_bgp,))
@@ -98,6 +167,11 @@ def save_trusted_node(hostname, ipv4, ipv6, router_bgp, locator, neighbors_json)
             except json.JSONDecodeError:
                 print(f"Invalid neighbors JSON")
             
+            #una ri-registrazione identica non invalida la topologia
+            if node_state(cursor, hostname, router_bgp) != old_state:
+                #anche il vecchio ASN se l'host ha cambiato AS
+                bump_generation(cursor, [router_bgp] + ([old_node[2]] if old_node else []))
+            
             conn.commit()
             conn.close()
             return True
@@ -107,9 +181,12 @@ def save_trusted_node(hostname, ipv4, ipv6, router_bgp, locator, neighbors_json)
         return False
 
 class NodeInfoServicer(nodeinfo_pb2_grpc.NodeInfoServiceServicer):
-    def __init__(self):
+    def __init__(self, on_change=None):
         self.registered_nodes = set()
+        #chiamata dopo ogni registrazione salvata (controller unico: aggiorna i path)
+        self.on_change = on_change
     
+    @metrics.rpc
     def RegisterNode(self, request, context):
         client_peer = context.peer()
         hostname = request.hostname
@@ -118,7 +195,8 @@ class NodeInfoServicer(nodeinfo_pb2_grpc.NodeInfoServiceServicer):
         print(f"   • IPv4: {request.ipv4}")
         print(f"   • IPv6: {request.ipv6}")
         print(f"   • AS number: {request.router_bgp}")
-        print(f"   • Locator: {request.locator}")
+        print(f"   • Locator: {request.locator} (block-len {request.locator_block_len}, "
+              f"node-len {request.locator_node_len})")
         
         try:
             networks = json.loads(request.networks)
@@ -137,10 +215,14 @@ class NodeInfoServicer(nodeinfo_pb2_grpc.NodeInfoServiceServicer):
             request.ipv6,
             request.router_bgp,
             request.locator,
-            request.networks
+            request.networks,
+            request.locator_block_len,
+            request.locator_node_len
         )
         
         if success:
+            if self.on_change:
+                self.on_change()
             self.registered_nodes.add(hostname)
             message = f"{hostname} registrated with success!"
             print(f"{message}")
@@ -157,28 +239,50 @@ class NodeInfoServicer(nodeinfo_pb2_grpc.NodeInfoServiceServicer):
             message=message
         )
 
-def serve():
+class AsyncNodeInfoServicer(nodeinfo_pb2_grpc.NodeInfoServiceServicer):
+    """Handler grpc.aio: la registrazione (sqlite) gira nell'executor limitato"""
+    def __init__(self, servicer, blocking):
+        self.servicer = servicer
+        self.blocking = blocking
+    
+    async def RegisterNode(self, request, context):
+        return await self.blocking.call(context, self.servicer.RegisterNode, request, ContextProxy(context))
+
+def server_credentials():
     with open(SERVER_CERT, "rb") as f:
         server_cert = f.read()
     with open(SERVER_KEY, "rb") as f:
         server_key = f.read()
+    return grpc.ssl_server_credentials([(server_key, server_cert)])
 
-    server_creds = grpc.ssl_server_credentials(
-        [(server_key, server_cert)]
-    )
+async def serve_aio(blocking_workers=BLOCKING_WORKERS):
+    init_database()
+    blocking = BlockingExecutor(blocking_workers, 'registration')
+    
+    server = grpc.aio.server(options=SERVER_OPTIONS)
+    nodeinfo_pb2_grpc.add_NodeInfoServiceServicer_to_server(AsyncNodeInfoServicer(NodeInfoServicer(), blocking), server)
+    server.add_secure_port('[::]:50051', server_credentials())
+    await server.start()
+    
+    print("=" * 60)
+    print("Controller gRPC (asyncio) ready on the port 50051")
+    print(f"Blocking workers: {blocking_workers}")
+    print("Waiting for some nodes...")
+    print("=" * 60)
+    sys.stdout.flush()
+    
+    try:
+        await server.wait_for_termination()
+    finally:
+        await server.stop(0)
+        blocking.shutdown()
+
+def serve():
+    server_creds = server_credentials()
     
     init_database()
     
-    server = grpc.server(
-        futures.ThreadPoolExecutor(max_workers=20),
-        options=[
-            ('grpc.max_send_message_length', 50 * 1024 * 1024),
-            ('grpc.max_receive_message_length', 50 * 1024 * 1024),
-            ('grpc.keepalive_time_ms', 30000),
-            ('grpc.keepalive_timeout_ms', 10000),
-            ('grpc.keepalive_permit_without_calls', True),
-        ]
-    )
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=20), options=SERVER_OPTIONS)
     
     nodeinfo_pb2_grpc.add_NodeInfoServiceServicer_to_server(
         NodeInfoServicer(), server
@@ -200,9 +304,29 @@ def serve():
         print("\nController on closure...")
         server.stop(0)
 
+def main():
+    parser = argparse.ArgumentParser(description='Node registration server')
+    parser.add_argument('--aio', action='store_true', help='Serve with grpc.aio (coroutine handlers)')
+    parser.add_argument('--blocking-workers', type=int, default=BLOCKING_WORKERS,
+                        help='Threads for database work in --aio mode')
+    parser.add_argument('--metrics-port', type=int, default=0,
+                        help='Serve Prometheus metrics on 127.0.0.1:PORT (0: disabled)')
+    args = parser.parse_args()
+    
+    if args.metrics_port:
+        metrics.start_http_server(args.metrics_port)
+    
+    if not args.aio:
+        serve()
+        return
+    try:
+        asyncio.run(serve_aio(args.blocking_workers))
+    except KeyboardInterrupt:
+        print("\nController on closure...")
+
 if __name__ == '__main__':
     try:
         locale.setlocale(locale.LC_ALL, 'C.UTF-8')
     except:
         pass
-    serve()
+    main()
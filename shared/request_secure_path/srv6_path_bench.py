@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""Benchmark del calcolo dei path su topologie AS sintetiche (offline, senza lab)"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+SHARED_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(SHARED_DIR)
+sys.path.append(os.path.join(SHARED_DIR, 'registration'))
+sys.path.append(os.path.join(SHARED_DIR, 'collect_segment'))
+import registration_server
+import bgp_segments_controller
+import srv6_path_server
+
+#ASN a 4 byte ma entro int32, come nei messaggi protobuf
+BASE_ASN = 1000000
+TOPOLOGIES = ('ring', 'grid', 'powerlaw')
+DEFAULT_SIZES = (10, 100, 1000)
+PERCENTILES = (50, 90, 99)
+
+def ring_segments(n, rng):
+    if n < 3:
+        return [(0, 1)] if n == 2 else []
+    return [(i, (i + 1) % n) for i in range(n)]
+
+def grid_segments(n, rng):
+    side = math.ceil(math.sqrt(n))
+    segments = []
+    for i in range(n):
+        if (i + 1) % side and i + 1 < n:
+            segments.append((i, i + 1))
+        if i + side < n:
+            segments.append((i, i + side))
+    return segments
+
+def powerlaw_segments(n, rng, m=2):
+    """Barabási–Albert: ogni nuovo AS si collega a m AS scelti in proporzione al grado"""
+    segments = [(i, j) for i in range(min(n, m + 1)) for j in range(i + 1, min(n, m + 1))]
+    endpoints = [asn for segment in segments for asn in segment]
+    for new in range(m + 1, n):
+        targets = set()
+        while len(targets) < m:
+            targets.add(rng.choice(endpoints))
+        for target in targets:
+            segments.append((target, new))
+            endpoints += [target, new]
+    return segments
+
+GENERATORS = {
+    'ring': ring_segments,
+    'grid': grid_segments,
+    'powerlaw': powerlaw_segments,
+}
+
+def locator(index):
+    node = index + 1
+    return f"fd00:{node >> 16:x}:{node & 0xffff:x}::/48"
+
+def neighbor_ip(a, b):
+    return f"fd01:{a >> 16:x}:{a & 0xffff:x}:{b >> 16:x}:{b & 0xffff:x}::1"
+
+def seed_databases(workdir, n, segments, trusted):
+    """Crea i database con gli schemi dei server e li riempie in blocco"""
+    db_trusted = os.path.join(workdir, 'trusted_nodes.db')
+    db_topology = os.path.join(workdir, 'network_topology.db')
+    for path in (db_trusted, db_topology):
+        if os.path.exists(path):
+            os.remove(path)
+
+    registration_server.DB_PATH = db_trusted
+    bgp_segments_controller.DB_TOPOLOGY = db_topology
+    with contextlib.redirect_stdout(io.StringIO()):
+        registration_server.init_database()
+        bgp_segments_controller.init_topology_database()
+
+    ports = {}
+    neighbors = []
+    for a, b in segments:
+        for local, remote in ((a, b), (b, a)):
+            if local in trusted:
+                port = ports.get(local, 0)
+                ports[local] = port + 1
+                neighbors.append((BASE_ASN + local, neighbor_ip(local, remote), BASE_ASN + remote, f"eth{port}"))
+
+    with sqlite3.connect(db_trusted) as conn:
+        conn.executemany('''
+            INSERT INTO nodes (hostname, ipv4, ipv6, router_bgp, locator, locator_block_len, locator_node_len)
+            VALUES (?, ?, ?, ?, ?, 32, 16)
+        ''', (
+            (f"as{i}", f"10.{i >> 16 & 0xff}.{i >> 8 & 0xff}.{i & 0xff}", f"fd02::{i:x}", BASE_ASN + i, locator(i))
+            for i in sorted(trusted)
+        ))
+        conn.executemany('''
+            INSERT INTO bgp_neighbors (local_asn, neighbor_ip, neighbor_asn, interface)
+            VALUES (?, ?, ?, ?)
+        ''', neighbors)
+        conn.execute('UPDATE topology_generation SET generation = 1 WHERE id = 0')
+
+    with sqlite3.connect(db_topology) as conn:
+        conn.executemany(
+            'INSERT OR IGNORE INTO segments (as_a, as_b, trusted, discovered_by) VALUES (?, ?, ?, ?)',
+            ((BASE_ASN + a, BASE_ASN + b, int(a in trusted and b in trusted), BASE_ASN) for a, b in segments)
+        )
+        conn.execute('UPDATE topology_generation SET generation = 1 WHERE id = 0')
+
+    return db_trusted, db_topology
+
+def summarize(samples, peak_bytes=None):
+    """Latenze in ms: percentili, media, massimo e throughput"""
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+    total = sum(ordered)
+    stats = {
+        'count': len(ordered),
+        'mean_ms': total / len(ordered) * 1000,
+        'max_ms': ordered[-1] * 1000,
+        'throughput_per_s': len(ordered) / total if total else None,
+    }
+    for percentile in PERCENTILES:
+        index = min(len(ordered) - 1, math.ceil(percentile / 100 * len(ordered)) - 1)
+        stats[f"p{percentile}_ms"] = ordered[index] * 1000
+    if peak_bytes is not None:
+        stats['peak_memory_bytes'] = peak_bytes
+    return stats
+
+def measure(run, items, track_memory):
+    """Tempo di ogni chiamata; il picco di memoria in un secondo passaggio, con tracemalloc attivo"""
+    samples = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for item in items:
+            started = time.perf_counter()
+            run(item)
+            samples.append(time.perf_counter() - started)
+
+    peak = None
+    if track_memory:
+        tracemalloc.start()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for item in items:
+                run(item)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return summarize(samples, peak)
+
+def bench_topology(name, n, args, rng, workdir):
+    segments = GENERATORS[name](n, rng)
+    trusted = set(rng.sample(range(n), max(2, round(n * args.trusted)))) if n > 1 else set(range(n))
+
+    started = time.perf_counter()
+    db_trusted, db_topology = seed_databases(workdir, n, segments, trusted)
+    seed_time = time.perf_counter() - started
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        calculator = srv6_path_server.SRv6PathCalculator(db_trusted, db_topology, os.path.join(workdir, 'routes.db'))
+    empty = srv6_path_server.TopologySnapshot(None, {}, {}, [])
+
+    def reload(_):
+        calculator.snapshot = empty
+        calculator.load_data()
+
+    stages = {'load_data': measure(reload, range(args.reloads), args.memory)}
+    snapshot = calculator.snapshot
+    trusted_asns = sorted(snapshot.trusted_nodes)
+    pairs = [tuple(rng.sample(trusted_asns, 2)) for _ in range(args.pairs)] if len(trusted_asns) > 1 else []
+
+    stages['build_graph'] = measure(
+        lambda only_trusted: calculator.build_graph(only_trusted, snapshot),
+        [True, False] * max(1, args.pairs // 2), args.memory
+    )
+    graph = calculator.build_graph(True, snapshot)
+
+    found = []
+    stages['find_all_paths'] = measure(
+        lambda pair: found.append((pair, calculator.find_all_paths(graph, *pair, args.max_paths))),
+        pairs, args.memory
+    )
+    #con il passaggio per la memoria ogni coppia compare due volte
+    paths = [(path, pair) for pair, result in found[:len(pairs)] for path in result]
+    stages['build_path_response'] = measure(
+        lambda item: calculator.build_path_response(item[0], item[1][0], item[1][1], snapshot),
+        paths, args.memory
+    )
+
+    def cold(pair):
+        calculator.path_cache.clear()
+        calculator.get_paths(*pair, True, args.max_paths, snapshot)
+
+    stages['get_paths_cold'] = measure(cold, pairs, args.memory)
+    for pair in pairs:
+        calculator.get_paths(*pair, True, args.max_paths, snapshot)
+    stages['get_paths_warm'] = measure(
+        lambda pair: calculator.get_paths(*pair, True, args.max_paths, snapshot), pairs, False
+    )
+
+    def apply_delta(pair):
+        #un segmento nuovo: load_data applica il delta invece di ricaricare tutto
+        with sqlite3.connect(db_topology) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                'INSERT OR IGNORE INTO segments (as_a, as_b, trusted, discovered_by) VALUES (?, ?, 1, ?)',
+                (pair[0], pair[1], pair[0])
+            )
+            bgp_segments_controller.record_segment_changes(cursor, added=[pair] if cursor.rowcount else [])
+        calculator.load_data()
+
+    delta_pairs = [tuple(rng.sample(trusted_asns, 2)) for _ in range(args.reloads)] if len(trusted_asns) > 1 else []
+    stages['load_delta'] = measure(apply_delta, delta_pairs, args.memory)
+
+    calculator.ssh_pool.close_all()
+    calculator.install_pool.shutdown()
+    return {
+        'topology': name,
+        'ases': n,
+        'segments': len(segments),
+        'trusted': len(trusted),
+        'pairs': len(pairs),
+        'paths_found': len(paths),
+        'seed_s': seed_time,
+        'stages': stages,
+    }
+
+def git_revision():
+    try:
+        result = subprocess.run(
+            ['git', '-C', SHARED_DIR, 'describe', '--always', '--dirty'],
+            capture_output=True, text=True, timeout=5
+        )
+        return result.stdout.strip() or None
+    except Exception:
+        return None
+
+def print_result(result):
+    print(f"\n{result['topology']} - {result['ases']} ASes, {result['segments']} segments, "
+          f"{result['trusted']} trusted, {result['paths_found']} paths for {result['pairs']} pairs")
+    print(f"  {'stage':<22}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'ops/s':>12}{'peak KiB':>12}")
+    for stage, stats in result['stages'].items():
+        if not stats['count']:
+            continue
+        peak = stats.get('peak_memory_bytes')
+        peak = f"{peak / 1024:.0f}" if peak is not None else "-"
+        print(f"  {stage:<22}{stats['p50_ms']:>10.3f}{stats['p90_ms']:>10.3f}{stats['p99_ms']:>10.3f}"
+              f"{stats['throughput_per_s'] or 0:>12.0f}{peak:>12}")
+    sys.stdout.flush()
+
+def print_comparison(results, baseline_path):
+    """Rapporto p50 attuale / p50 del baseline per ogni stage (>1 = più lento)"""
+    with open(baseline_path) as f:
+        baseline = {
+            (result['topology'], result['ases']): result['stages']
+            for result in json.load(f)['results']
+        }
+    print(f"\nComparison with {baseline_path} (p50 ratio, >1 = slower)")
+    for result in results:
+        previous = baseline.get((result['topology'], result['ases']))
+        if previous is None:
+            continue
+        ratios = []
+        for stage, stats in result['stages'].items():
+            old = previous.get(stage, {})
+            if stats.get('p50_ms') and old.get('p50_ms'):
+                ratios.append(f"{stage}={stats['p50_ms'] / old['p50_ms']:.2f}")
+        print(f"  {result['topology']}/{result['ases']}: {', '.join(ratios)}")
+
+def main():
+    parser = argparse.ArgumentParser(description='SRv6 path computation benchmark on synthetic AS topologies')
+    parser.add_argument('--topologies', type=lambda value: value.split(','), default=list(TOPOLOGIES),
+                        help=f"Comma-separated topologies ({', '.join(TOPOLOGIES)})")
+    parser.add_argument('--sizes', type=lambda value: [int(size) for size in value.split(',')],
+                        default=list(DEFAULT_SIZES), help='Comma-separated AS counts (e.g. 10,1000,100000)')
+    parser.add_argument('--trusted', type=float, default=0.8, help='Fraction of trusted ASes')
+    parser.add_argument('--pairs', type=int, default=100, help='Random trusted source/destination pairs')
+    parser.add_argument('--max-paths', type=int, default=srv6_path_server.DEFAULT_MAX_PATHS)
+    parser.add_argument('--reloads', type=int, default=5, help='Timed load_data runs')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help='Skip the tracemalloc pass')
+    parser.add_argument('--workdir', help='Where to write the databases (default: temporary directory)')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--compare', help='Previous JSON results to compare against')
+    args = parser.parse_args()
+
+    unknown = set(args.topologies) - set(TOPOLOGIES)
+    if unknown:
+        parser.error(f"unknown topologies: {', '.join(sorted(unknown))}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        for name in args.topologies:
+            for n in args.sizes:
+                rng = random.Random(f"{args.seed}-{name}-{n}")
+                result = bench_topology(name, n, args, rng, workdir)
+                print_result(result)
+                results.append(result)
+
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'args': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        print_comparison(results, args.compare)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Cache LRU dei path calcolati, condivisa tra RequestPath e InstallPath"""
+
+import threading
+import time
+from collections import OrderedDict
+
+class PathCache:
+    def __init__(self, max_entries=1024, max_age=300):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            created, value = entry
+            if time.monotonic() - created > self.max_age:
+                del self.entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def rekey(self, old_version, new_version, stale):
+        """Porta alla nuova versione (ultimo elemento della chiave) le entry per cui stale() è falso.
+        
+        Le entry ancora valide restano anche sotto le versioni precedenti (un client
+        può installare dalla lista che ha ricevuto); quelle stale spariscono sotto
+        ogni versione in cui compaiono.
+        """
+        with self.lock:
+            entries = list(self.entries.items())
+        kept, stale_values = {}, set()
+        for key, (created, value) in entries:
+            if key[-1] != old_version:
+                continue
+            if stale(key, value):
+                stale_values.add(id(value))
+            else:
+                kept[key[:-1] + (new_version,)] = (created, value)
+        with self.lock:
+            dropped = [key for key, (_, value) in self.entries.items() if id(value) in stale_values]
+            for key in dropped:
+                del self.entries[key]
+            for key, entry in kept.items():
+                self.entries.setdefault(key, entry)
+            self.invalidations += len(stale_values)
+        return len(kept), len(stale_values)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
+
+    def __str__(self):
+        stats = self.stats()
+        return (f"entries={stats['entries']} hits={stats['hits']} misses={stats['misses']} "
+                f"evictions={stats['evictions']} expirations={stats['expirations']} "
+                f"invalidations={stats['invalidations']}")
@@ -7,6 +7,8 @@ import os
 import socket
 import ipaddress
 import argparse
+import json
+import time
 
 sys.path.append('/shared')
 import srv6_path_pb2
@@ -16,10 +18,14 @@ CONTROLLER_PORT = 50053
 CA_CERT = '/shared/certs/ca.crt'
 
 class SRv6PathClient:
-    def __init__(self):
+    def __init__(self, max_paths=0, disjoint=srv6_path_pb2.DISJOINT_NONE, compressed=False, audit_fib=False):
         self.my_asn = self.get_my_asn()
         self.hostname = socket.gethostname()
         self.controller_ip = None
+        self.max_paths = max_paths
+        self.disjoint = disjoint
+        self.compressed = compressed
+        self.audit_fib = audit_fib
         
         if not self.my_asn:
             print("ASN not found")
@@ -114,7 +120,9 @@ class SRv6PathClient:
             print(f"\nRequesting paths: AS{self.my_asn} → AS{dest_asn}")
             request = srv6_path_pb2.PathRequest(
                 source_asn=self.my_asn,
-                destination_asn=dest_asn,only_trusted=True
+                destination_asn=dest_asn,only_trusted=True,
+                max_paths=self.max_paths,
+                disjoint=self.disjoint
             )
             
             response = stub.RequestPath(request, timeout=10)
@@ -126,23 +134,121 @@ class SRv6PathClient:
             print(f"Error: {e}")
         return None
     
-    def install_path(self, dest_asn, path_index):
+    def request_paths_batch(self, dest_asns, stub):
+        """Path verso più destinazioni con una sola RPC in streaming"""
+        request = srv6_path_pb2.MultiPathRequest(
+            source_asn=self.my_asn,
+            destination_asns=dest_asns,
+            all_trusted=not dest_asns,
+            only_trusted=True,
+            max_paths=self.max_paths
+        )
+        target = ', '.join(f"AS{asn}" for asn in dest_asns) if dest_asns else "all trusted ASes"
+        print(f"\nRequesting paths: AS{self.my_asn} → {target}")
+        return stub.RequestPaths(request, timeout=30)
+    
+    def batch_mode(self, dest_asns, install=False):
+        """Modalità non interattiva: tutte le destinazioni sullo stesso canale"""
+        channel = self.get_grpc_channel()
+        stub = srv6_path_pb2_grpc.SRv6PathServiceStub(channel)
+        ok = True
+        
         try:
-            channel = self.get_grpc_channel()
-            stub = srv6_path_pb2_grpc.SRv6PathServiceStub(channel)
+            for response in self.request_paths_batch(dest_asns, stub):
+                self.display_paths_response(response)
+                if not response.success:
+                    ok = False
+                    continue
+                
+                if install:
+                    ok = self.install_path(response.destination_asn, 0, response.topology_version, stub) and ok
+        except grpc.RpcError as e:
+            print(f"gRPC Error: {e.code()}: {e.details()}")
+            ok = False
+        finally:
+            channel.close()
+        
+        return ok
+    
+    def display_paths_response(self, response):
+        print(f"\n{'='*60}")
+        print(f"AS{response.destination_asn}")
+        print(f"{'='*60}")
+        if not response.success:
+            print(f"  {response.error_message}")
+            return
+        for i, path_resp in enumerate(response.paths, 1):
+            print(f"  {i}. {path_resp.path_string} ({path_resp.hops} hops)")
+    
+    def watch_mode(self, dest_asns, install=False):
+        """Resta in ascolto dei cambi di path; con install reinstalla quando cambia il migliore"""
+        channel = self.get_grpc_channel()
+        stub = srv6_path_pb2_grpc.SRv6PathServiceStub(channel)
+        request = srv6_path_pb2.WatchPathsRequest(
+            source_asn=self.my_asn,
+            destination_asns=dest_asns,
+            only_trusted=True,
+            max_paths=self.max_paths
+        )
+        print(f"\nWatching paths: AS{self.my_asn} → {', '.join(f'AS{asn}' for asn in dest_asns)}")
+        installed = {}
+        
+        try:
+            for response in stub.WatchPaths(request):
+                print(f"\n[{time.strftime('%H:%M:%S')}] Update")
+                self.display_paths_response(response)
+                if not install or not response.success or not response.paths:
+                    continue
+                
+                best = response.paths[0].path_string
+                if installed.get(response.destination_asn) != best:
+                    if self.install_path(response.destination_asn, 0, response.topology_version, stub):
+                        installed[response.destination_asn] = best
+        except grpc.RpcError as e:
+            print(f"gRPC Error: {e.code()}: {e.details()}")
+            return False
+        finally:
+            channel.close()
+        
+        return True
+    
+    def install_path(self, dest_asn, path_index, topology_version, stub=None, path_indexes=(), weights=()):
+        """Con path_indexes (e pesi) installa una sola route multipath su più SID list.
+        
+        topology_version è quella della risposta da cui vengono gli indici.
+        """
+        try:
+            channel = None
+            if stub is None:
+                channel = self.get_grpc_channel()
+                stub = srv6_path_pb2_grpc.SRv6PathServiceStub(channel)
             
-            print(f"\nRequesting installation of path #{path_index + 1}...")
+            if path_indexes:
+                print(f"\nRequesting multipath installation of paths "
+                      f"{', '.join(f'#{index + 1}' for index in path_indexes)}...")
+            else:
+                print(f"\nRequesting installation of path #{path_index + 1}...")
             request = srv6_path_pb2.InstallPathRequest(
                 source_asn=self.my_asn,
                 destination_asn=dest_asn,
                 path_index=path_index,
-                only_trusted=True
+                only_trusted=True,
+                max_paths=self.max_paths,
+                disjoint=self.disjoint,
+                path_indexes=path_indexes,
+                weights=weights,
+                compressed_sids=self.compressed,
+                audit_fib=self.audit_fib,
+                topology_version=topology_version
             )
             
             response = stub.InstallPath(request, timeout=15)
-            channel.close()
+            if channel:
+                channel.close()
             
             if response and response.success:
+                self.display_transit_summary(response)
+                self.display_multipath(response)
                 return self.install_locally(response)
             else:
                 print(f"Installation failed: {response.error_message if response else 'No response'}")
@@ -151,6 +257,27 @@ class SRv6PathClient:
             print(f"Error: {e}")
             return False
     
+    def display_multipath(self, response):
+        if not response.multipath:
+            return
+        print("\nMultipath nexthops:")
+        for member in response.multipath:
+            path = ' → '.join(f"AS{asn}" for asn in member.as_path)
+            print(f"  weight {member.weight}: {path} via {member.output_interface}")
+    
+    def display_transit_summary(self, response):
+        if not response.transit_commands:
+            return
+        try:
+            summary = json.loads(response.transit_commands)
+        except ValueError:
+            return
+        if summary:
+            print("\nTransit nodes:")
+        for node in summary:
+            status = "✓" if node['success'] else "✗"
+            print(f"  {status} AS{node['asn']} ({node['hostname']}): {node['commands']} command(s) - {node['message']}")
+    
     def install_locally(self, response):
         command = response.install_command
         dest_net = response.destination_network
@@ -212,6 +339,9 @@ class SRv6PathClient:
         print(f"  Route: {path_response.path_string}")
         print(f"  Hops: {path_response.hops}")
         print(f"  Destination: {path_response.destination_network}")
+        if path_response.compressed_sid_list:
+            print(f"  SIDs: {len(path_response.sid_list)}, "
+                  f"compressed: {len(path_response.compressed_sid_list)} ({', '.join(path_response.compressed_sid_list)})")
         print(f"  Trusted nodes:")
         for node in path_response.nodes:
             print(f"    AS{node.asn} - {node.hostname}")
@@ -221,7 +351,7 @@ class SRv6PathClient:
         self.display_path(response.paths[0], 1)
         
         if input("\nInstall this path? (y/n): ").strip().lower() == 'y':
-            self.install_path(dest_asn, 0)
+            self.install_path(dest_asn, 0, response.topology_version)
         else:
             print("Installation cancelled")
     
@@ -249,7 +379,7 @@ class SRv6PathClient:
                 self.display_path(response.paths[choice - 1], choice)
                 
                 if input("\nInstall this path? (y/n): ").strip().lower() == 'y':
-                    self.install_path(dest_asn, choice - 1)
+                    self.install_path(dest_asn, choice - 1, response.topology_version)
                     break
                 else:
                     print("\nReturning to path selection...")
@@ -302,17 +432,63 @@ class SRv6PathClient:
 def main():
     parser = argparse.ArgumentParser(description='SRv6 Secure Path Client')
     parser.add_argument('--dest', type=int, help='Destination ASN (non-interactive)')
+    parser.add_argument('--max-paths', type=int, default=0,
+                        help='Number of shortest paths to request (default: controller default)')
+    parser.add_argument('--dests', type=lambda value: [int(asn) for asn in value.split(',') if asn],
+                        help='Comma-separated destination ASNs, requested in one batch (non-interactive)')
+    parser.add_argument('--all', action='store_true', help='Request paths to every trusted AS (non-interactive)')
+    parser.add_argument('--install', action='store_true', help='With --dests/--all/--watch, install the best path of each')
+    parser.add_argument('--watch', action='store_true',
+                        help='With --dest/--dests, keep streaming path updates on topology changes')
+    parser.add_argument('--disjoint', choices=['link', 'node'],
+                        help='With --dest or interactive mode, request link- or node-disjoint paths')
+    parser.add_argument('--multipath', type=int, default=0,
+                        help='With --dest, install the best N paths as one weighted multipath route')
+    parser.add_argument('--weights', type=lambda value: [int(weight) for weight in value.split(',') if weight],
+                        default=[], help='Comma-separated nexthop weights for --multipath (default: equal)')
+    parser.add_argument('--compressed', action='store_true',
+                        help='Install compressed SID lists (NEXT-C-SID micro-SIDs) instead of full SIDs')
+    parser.add_argument('--audit-fib', action='store_true',
+                        help="Check the transit nodes' routing tables before installing (slower)")
     args = parser.parse_args()
+    if args.multipath and not args.dest:
+        parser.error("--multipath requires --dest")
+    if args.weights and len(args.weights) != args.multipath:
+        parser.error("--weights needs one weight per --multipath path")
+    if args.disjoint and (args.dests or args.all or args.watch):
+        parser.error("--disjoint is only supported with --dest or interactive mode")
+    
+    disjoint = {
+        None: srv6_path_pb2.DISJOINT_NONE,
+        'link': srv6_path_pb2.DISJOINT_LINK,
+        'node': srv6_path_pb2.DISJOINT_NODE,
+    }[args.disjoint]
     
     try:
-        client = SRv6PathClient()
+        client = SRv6PathClient(args.max_paths, disjoint, args.compressed, args.audit_fib)
         
-        if args.dest:
+        if args.watch:
+            dest_asns = args.dests or ([args.dest] if args.dest else [])
+            if not dest_asns:
+                parser.error("--watch requires --dest or --dests")
+            if not client.watch_mode(dest_asns, args.install):
+                sys.exit(1)
+        elif args.dests or args.all:
+            if not client.batch_mode(args.dests or [], args.install):
+                sys.exit(1)
+        elif args.dest:
             response = client.request_paths(args.dest)
             if response and response.success:
-                if response.total_paths == 1:
+                if args.multipath:
+                    count = min(args.multipath, response.total_paths)
+                    for i, path in enumerate(response.paths[:count], 1):
+                        client.display_path(path, i)
+                    if not client.install_path(args.dest, 0, response.topology_version,
+                                               path_indexes=list(range(count)), weights=args.weights[:count]):
+                        sys.exit(1)
+                elif response.total_paths == 1:
                     client.display_path(response.paths[0], 1)
-                    client.install_path(args.dest, 0)
+                    client.install_path(args.dest, 0, response.topology_version)
                 else:
                     print(f"Found {response.total_paths} paths. Use interactive mode to select.")
                     for i, path in enumerate(response.paths, 1):
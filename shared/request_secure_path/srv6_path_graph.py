@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""Algoritmi sul grafo AS usati dal path server"""
+
+import heapq
+from array import array
+from collections import deque
+
+class CompactGraph:
+    """Grafo AS in forma CSR: ASN interni come id densi, vicini ordinati in array contigui.
+
+    Ogni arco ha un flag nella maschera `trusted`, così la vista trusted e
+    quella completa condividono la stessa struttura. I grafi prodotti da
+    `updated` condividono la base CSR e tengono a parte (in `patched`) le
+    liste di adiacenza dei soli nodi toccati dai delta.
+    """
+    def __init__(self, segments, trusted_asns=()):
+        asns = sorted({asn for segment in segments for asn in segment})
+        self.asns = array('I', asns)
+        self.index = {asn: i for i, asn in enumerate(asns)}
+
+        neighbor_sets = [set() for _ in asns]
+        for as_a, as_b in segments:
+            if as_a == as_b:
+                continue
+            a, b = self.index[as_a], self.index[as_b]
+            neighbor_sets[a].add(b)
+            neighbor_sets[b].add(a)
+
+        is_trusted = bytearray(asn in trusted_asns for asn in asns)
+        self.is_trusted = is_trusted
+        #nodo -> (vicini, flag trusted) che sostituisce la riga CSR
+        self.patched = {}
+        self.offsets = array('i', [0])
+        self.targets = array('i')
+        self.trusted = bytearray()
+        #nodi con almeno un arco trusted (presenti nella vista trusted)
+        self.trusted_members = bytearray(len(asns))
+
+        for node, neighbors in enumerate(neighbor_sets):
+            for neighbor in sorted(neighbors):
+                trusted_edge = is_trusted[node] and is_trusted[neighbor]
+                self.targets.append(neighbor)
+                self.trusted.append(trusted_edge)
+                if trusted_edge:
+                    self.trusted_members[node] = 1
+            self.offsets.append(len(self.targets))
+        self.directed_edges = len(self.targets)
+
+    def __len__(self):
+        return len(self.asns)
+
+    @property
+    def edge_count(self):
+        return self.directed_edges // 2
+
+    def view(self, only_trusted=True):
+        return GraphView(self, only_trusted)
+
+    def adjacency(self, node):
+        """(vicini, flag trusted, inizio, fine) degli archi di un nodo"""
+        patch = self.patched.get(node)
+        if patch is None:
+            return self.targets, self.trusted, self.offsets[node], self.offsets[node + 1]
+        return patch[0], patch[1], 0, len(patch[0])
+
+    def updated(self, added=(), removed=(), trusted_asns=(), changed_asns=()):
+        """Nuovo grafo con archi aggiunti/rimossi e la fiducia dei nodi cambiati aggiornata.
+
+        Il grafo corrente resta valido (è condiviso dagli snapshot precedenti).
+        """
+        graph = object.__new__(CompactGraph)
+        graph.asns = array('I', self.asns)
+        graph.index = dict(self.index)
+        graph.offsets, graph.targets, graph.trusted = self.offsets, self.targets, self.trusted
+        graph.is_trusted = bytearray(self.is_trusted)
+        graph.trusted_members = bytearray(self.trusted_members)
+        graph.patched = dict(self.patched)
+        graph.directed_edges = self.directed_edges
+
+        touched = {}
+
+        def neighbors_of(node):
+            if node not in touched:
+                if node < len(self.asns):
+                    targets, _, start, end = self.adjacency(node)
+                    touched[node] = set(targets[start:end])
+                else:
+                    touched[node] = set()
+            return touched[node]
+
+        def node_id(asn):
+            node = graph.index.get(asn)
+            if node is None:
+                #id in coda: l'ordine per ASN resta garantito dalle liste di vicini ordinate
+                node = graph.index[asn] = len(graph.asns)
+                graph.asns.append(asn)
+                graph.is_trusted.append(asn in trusted_asns)
+                graph.trusted_members.append(0)
+            return node
+
+        for as_a, as_b in added:
+            if as_a != as_b:
+                a, b = node_id(as_a), node_id(as_b)
+                neighbors_of(a).add(b)
+                neighbors_of(b).add(a)
+
+        for as_a, as_b in removed:
+            a, b = graph.index.get(as_a), graph.index.get(as_b)
+            if a is not None and b is not None:
+                neighbors_of(a).discard(b)
+                neighbors_of(b).discard(a)
+
+        for asn in changed_asns:
+            node = graph.index.get(asn)
+            trusted = asn in trusted_asns
+            if node is None or graph.is_trusted[node] == trusted:
+                continue
+            graph.is_trusted[node] = trusted
+            #cambiano i flag di tutti gli archi del nodo, anche visti dai vicini
+            for neighbor in list(neighbors_of(node)):
+                neighbors_of(neighbor)
+
+        asns, is_trusted = graph.asns, graph.is_trusted
+        for node, neighbors in touched.items():
+            if node < len(self.asns):
+                _, _, start, end = self.adjacency(node)
+                graph.directed_edges -= end - start
+            graph.directed_edges += len(neighbors)
+            targets = array('i', sorted(neighbors, key=asns.__getitem__))
+            flags = bytearray(is_trusted[node] and is_trusted[neighbor] for neighbor in targets)
+            graph.patched[node] = (targets, flags)
+            graph.trusted_members[node] = 1 if any(flags) else 0
+        return graph
+
+class GraphView:
+    """Vista (trusted o completa) su un CompactGraph, indicizzata per ASN"""
+    __slots__ = ('graph', 'only_trusted', 'members')
+
+    def __init__(self, graph, only_trusted=True):
+        self.graph = graph
+        self.only_trusted = only_trusted
+        self.members = graph.trusted_members if only_trusted else None
+
+    def __contains__(self, asn):
+        node = self.graph.index.get(asn)
+        if node is None:
+            return False
+        return self.members is None or bool(self.members[node])
+
+    def __iter__(self):
+        for node, asn in enumerate(self.graph.asns):
+            if self.members is None or self.members[node]:
+                yield asn
+
+    def neighbors(self, node):
+        """Id dei vicini di un nodo, in ordine crescente di ASN"""
+        targets, trusted, start, end = self.graph.adjacency(node)
+        for edge in range(start, end):
+            if not self.only_trusted or trusted[edge]:
+                yield targets[edge]
+
+def count_expansions(stats, expanded):
+    if stats is not None:
+        stats['expansions'] = stats.get('expansions', 0) + expanded
+
+def shortest_path(view, source, target, banned_nodes=(), banned_edges=(), stats=None):
+    """BFS sugli id della vista, evitando i nodi e gli archi (u, v) vietati.
+
+    Con `stats` (dict) somma in stats['expansions'] i nodi estratti dalla coda.
+    """
+    if source == target:
+        return [source]
+
+    adjacency, only_trusted = view.graph.adjacency, view.only_trusted
+    parents = {source: None}
+    queue = deque([source])
+    expanded = 0
+
+    try:
+        while queue:
+            node = queue.popleft()
+            expanded += 1
+            targets, trusted, start, end = adjacency(node)
+            for edge in range(start, end):
+                if only_trusted and not trusted[edge]:
+                    continue
+                neighbor = targets[edge]
+                if neighbor in parents or neighbor in banned_nodes or (node, neighbor) in banned_edges:
+                    continue
+                parents[neighbor] = node
+                if neighbor == target:
+                    path = [target]
+                    while parents[path[-1]] is not None:
+                        path.append(parents[path[-1]])
+                    path.reverse()
+                    return path
+                queue.append(neighbor)
+        return None
+    finally:
+        count_expansions(stats, expanded)
+
+def shortest_path_tree(view, source_asn, stats=None):
+    """Albero dei cammini minimi (BFS) dalla sorgente: id -> id del padre"""
+    if source_asn not in view:
+        return {}
+
+    adjacency, only_trusted = view.graph.adjacency, view.only_trusted
+    source = view.graph.index[source_asn]
+    parents = {source: None}
+    queue = deque([source])
+
+    while queue:
+        node = queue.popleft()
+        targets, trusted, start, end = adjacency(node)
+        for edge in range(start, end):
+            if only_trusted and not trusted[edge]:
+                continue
+            neighbor = targets[edge]
+            if neighbor not in parents:
+                parents[neighbor] = node
+                queue.append(neighbor)
+
+    #ogni nodo raggiunto viene estratto una volta
+    count_expansions(stats, len(parents))
+    return parents
+
+def distances(view, source_asn):
+    """Hop dalla sorgente a ogni nodo raggiungibile nella vista: ASN -> distanza"""
+    asns = view.graph.asns
+    hops = {}
+    #l'albero è in ordine di visita BFS: il padre precede sempre il figlio
+    for node, parent in shortest_path_tree(view, source_asn).items():
+        hops[node] = 0 if parent is None else hops[parent] + 1
+    return {asns[node]: depth for node, depth in hops.items()}
+
+def tree_path(parents, target):
+    if target not in parents:
+        return None
+    path = [target]
+    while parents[path[-1]] is not None:
+        path.append(parents[path[-1]])
+    path.reverse()
+    return path
+
+def k_shortest_paths(view, source_asn, target_asn, k, tree=None, stats=None):
+    """Yen: i k cammini semplici più corti, in ordine di costo (hop) e poi lessicografico.
+
+    Con `tree` (da shortest_path_tree sulla stessa sorgente) il primo cammino
+    si legge dall'albero invece di ripetere la BFS.
+    """
+    if k <= 0 or source_asn not in view or target_asn not in view:
+        return []
+
+    index, asns = view.graph.index, view.graph.asns
+    source, target = index[source_asn], index[target_asn]
+
+    if tree is not None:
+        first = tree_path(tree, target)
+    else:
+        first = shortest_path(view, source, target, stats=stats)
+    if not first:
+        return []
+
+    accepted = [first]
+    seen = {tuple(first)}
+    candidates = []
+
+    while len(accepted) < k:
+        last = accepted[-1]
+
+        for i in range(len(last) - 1):
+            root = last[:i + 1]
+            spur_node = last[i]
+
+            #archi già usati da cammini accettati con la stessa radice
+            banned_edges = {
+                (path[i], path[i + 1])
+                for path in accepted
+                if len(path) > i + 1 and path[:i + 1] == root
+            }
+            banned_nodes = set(root[:-1])
+
+            spur_path = shortest_path(view, spur_node, target, banned_nodes, banned_edges, stats)
+            if not spur_path:
+                continue
+
+            candidate = root[:-1] + spur_path
+            key = tuple(candidate)
+            if key not in seen:
+                seen.add(key)
+                #a parità di costo ordine lessicografico per ASN (gli id aggiunti dai delta sono in coda)
+                heapq.heappush(candidates, (len(candidate) - 1, [asns[node] for node in candidate], candidate))
+
+        if not candidates:
+            break
+
+        accepted.append(heapq.heappop(candidates)[2])
+
+        #memoria limitata: servono al più k - len(accepted) candidati
+        remaining = k - len(accepted)
+        if len(candidates) > remaining:
+            candidates = heapq.nsmallest(remaining, candidates)
+            heapq.heapify(candidates)
+
+    return [[asns[node] for node in path] for path in accepted]
+
+def disjoint_paths(view, source_asn, target_asn, k=2, node_disjoint=True, stats=None):
+    """Bhandari/Suurballe: fino a k cammini disgiunti (nei nodi o negli archi) di costo totale minimo.
+
+    Flusso di costo minimo con capacità unitarie: ogni iterazione cerca il
+    cammino più corto nel grafo residuo (archi inversi a costo negativo),
+    quindi un cammino può "deviare" quelli già trovati se il totale scende.
+    Con node_disjoint ogni nodo di transito è diviso in ingresso/uscita
+    con capacità 1. Risultato ordinato per costo (hop) e poi lessicografico.
+    """
+    if k <= 0 or source_asn not in view or target_asn not in view or source_asn == target_asn:
+        return []
+
+    graph = view.graph
+    source, target = graph.index[source_asn], graph.index[target_asn]
+    nodes = len(graph)
+
+    #archi a coppie: l'arco e e il suo residuo e ^ 1
+    heads, capacity, cost = [], [], []
+    adjacency = [[] for _ in range(2 * nodes if node_disjoint else nodes)]
+
+    def add_arc(u, v, cap, weight):
+        for a, b, c, w in ((u, v, cap, weight), (v, u, 0, -weight)):
+            adjacency[a].append(len(heads))
+            heads.append(b)
+            capacity.append(c)
+            cost.append(w)
+
+    #con node_disjoint: ingresso = node, uscita = nodes + node
+    def tail(node):
+        return nodes + node if node_disjoint else node
+
+    if node_disjoint:
+        for node in range(nodes):
+            add_arc(node, nodes + node, k if node in (source, target) else 1, 0)
+
+    for node in range(nodes):
+        for neighbor in view.neighbors(node):
+            add_arc(tail(node), neighbor, 1, 1)
+
+    start, end = tail(source), target
+    flows = 0
+    expanded = 0
+    while flows < k:
+        #Bellman-Ford (SPFA): i costi residui possono essere negativi
+        distance = {start: 0}
+        parent_arc = {}
+        pending = deque([start])
+        queued = {start}
+        while pending:
+            u = pending.popleft()
+            queued.discard(u)
+            expanded += 1
+            for arc in adjacency[u]:
+                if not capacity[arc]:
+                    continue
+                v = heads[arc]
+                candidate = distance[u] + cost[arc]
+                if candidate < distance.get(v, candidate + 1):
+                    distance[v] = candidate
+                    parent_arc[v] = arc
+                    if v not in queued:
+                        queued.add(v)
+                        pending.append(v)
+
+        if end not in distance:
+            break
+
+        v = end
+        while v != start:
+            arc = parent_arc[v]
+            capacity[arc] -= 1
+            capacity[arc ^ 1] += 1
+            v = heads[arc ^ 1]
+        flows += 1
+
+    count_expansions(stats, expanded)
+
+    #scomposizione del flusso: archi "pieni" (il residuo inverso ha capacità)
+    used = {}
+    for u, arcs in enumerate(adjacency):
+        for arc in arcs:
+            if arc % 2 == 0 and capacity[arc ^ 1] and cost[arc] == 1:
+                used.setdefault(u, []).append(heads[arc])
+
+    paths = []
+    for _ in range(flows):
+        path = [source]
+        while path[-1] != target:
+            following = used[tail(path[-1])].pop()
+            if following in path:
+                #ciclo nella scomposizione: si scarta, il flusso resta valido
+                del path[path.index(following) + 1:]
+            else:
+                path.append(following)
+        paths.append(path)
+
+    paths.sort(key=lambda path: (len(path), [graph.asns[node] for node in path]))
+    return [[graph.asns[node] for node in path] for path in paths]
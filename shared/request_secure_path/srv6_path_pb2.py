@@ -24,27 +24,49 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0fsrv6_path.proto\x12\x08srv6path\"m\n\x0bPathRequest\x12\x12\n\nsource_asn\x18\x01 \x01(\x05\x12\x17\n\x0f\x64\x65stination_asn\x18\x02 \x01(\x05\x12\x14\n\x0conly_trusted\x18\x03 \x01(\x08\x12\x1b\n\x13preferred_interface\x18\x04 \x01(\t\"{\n\x15MultiplePathsResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x15\n\rerror_message\x18\x02 \x01(\t\x12%\n\x05paths\x18\x03 \x03(\x0b\x32\x16.srv6path.PathResponse\x12\x13\n\x0btotal_paths\x18\x04 \x01(\x05\"k\n\x12InstallPathRequest\x12\x12\n\nsource_asn\x18\x01 \x01(\x05\x12\x17\n\x0f\x64\x65stination_asn\x18\x02 \x01(\x05\x12\x12\n\npath_index\x18\x03 \x01(\x05\x12\x14\n\x0conly_trusted\x18\x04 \x01(\x08\"\x99\x02\n\x0cPathResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x15\n\rerror_message\x18\x02 \x01(\t\x12\x0f\n\x07\x61s_path\x18\x03 \x03(\x05\x12\x13\n\x0bpath_string\x18\x04 \x01(\t\x12\x0c\n\x04hops\x18\x05 \x01(\x05\x12\x10\n\x08sid_list\x18\x06 \x03(\t\x12\x1b\n\x13\x64\x65stination_network\x18\x07 \x01(\t\x12\x17\n\x0finstall_command\x18\x08 \x01(\t\x12\x18\n\x10output_interface\x18\t \x01(\t\x12\x0e\n\x06metric\x18\n \x01(\x05\x12!\n\x05nodes\x18\x0b \x03(\x0b\x32\x12.srv6path.NodeInfo\x12\x18\n\x10transit_commands\x18\x0c \x01(\t\"j\n\x08NodeInfo\x12\x0b\n\x03\x61sn\x18\x01 \x01(\x05\x12\x10\n\x08hostname\x18\x02 \x01(\t\x12\x0f\n\x07locator\x18\x03 \x01(\t\x12\x12\n\nis_trusted\x18\x04 \x01(\x08\x12\x0c\n\x04ipv4\x18\x05 \x01(\t\x12\x0c\n\x04ipv6\x18\x06 \x01(\t\"\x81\x01\n\x0eInstallConfirm\x12\x12\n\nsource_asn\x18\x01 \x01(\x05\x12\x17\n\x0f\x64\x65stination_asn\x18\x02 \x01(\x05\x12\x11\n\tinstalled\x18\x03 \x01(\x08\x12\x15\n\rerror_message\x18\x04 \x01(\t\x12\x18\n\x10\x63ommand_executed\x18\x05 \x01(\t\"3\n\x0fInstallResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t2\xe9\x01\n\x0fSRv6PathService\x12\x45\n\x0bRequestPath\x12\x15.srv6path.PathRequest\x1a\x1f.srv6path.MultiplePathsResponse\x12\x43\n\x0bInstallPath\x12\x1c.srv6path.InstallPathRequest\x1a\x16.srv6path.PathResponse\x12J\n\x13\x43onfirmInstallation\x12\x18.srv6path.InstallConfirm\x1a\x19.srv6path.InstallResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0fsrv6_path.proto\x12\x08srv6path\"\xaa\x01\n\x0bPathRequest\x12\x12\n\nsource_asn\x18\x01 \x01(\x05\x12\x17\n\x0f\x64\x65stination_asn\x18\x02 \x01(\x05\x12\x14\n\x0conly_trusted\x18\x03 \x01(\x08\x12\x1b\n\x13preferred_interface\x18\x04 \x01(\t\x12\x11\n\tmax_paths\x18\x05 \x01(\x05\x12(\n\x08\x64isjoint\x18\x06 \x01(\x0e\x32\x16.srv6path.DisjointMode\"\xae\x01\n\x15MultiplePathsResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x15\n\rerror_message\x18\x02 \x01(\t\x12%\n\x05paths\x18\x03 \x03(\x0b\x32\x16.srv6path.PathResponse\x12\x13\n\x0btotal_paths\x18\x04 \x01(\x05\x12\x17\n\x0f\x64\x65stination_asn\x18\x05 \x01(\x05\x12\x18\n\x10topology_version\x18\x06 \x01(\t\"~\n\x10MultiPathRequest\x12\x12\n\nsource_asn\x18\x01 \x01(\x05\x12\x18\n\x10\x64\x65stination_asns\x18\x02 \x03(\x05\x12\x13\n\x0b\x61ll_trusted\x18\x03 \x01(\x08\x12\x14\n\x0conly_trusted\x18\x04 \x01(\x08\x12\x11\n\tmax_paths\x18\x05 \x01(\x05\"j\n\x11WatchPathsRequest\x12\x12\n\nsource_asn\x18\x01 \x01(\x05\x12\x18\n\x10\x64\x65stination_asns\x18\x02 \x03(\x05\x12\x14\n\x0conly_trusted\x18\x03 \x01(\x08\x12\x11\n\tmax_paths\x18\x04 \x01(\x05\"\x95\x02\n\x12InstallPathRequest\x12\x12\n\nsource_asn\x18\x01 \x01(\x05\x12\x17\n\x0f\x64\x65stination_asn\x18\x02 \x01(\x05\x12\x12\n\npath_index\x18\x03 \x01(\x05\x12\x14\n\x0conly_trusted\x18\x04 \x01(\x08\x12\x11\n\tmax_paths\x18\x05 \x01(\x05\x12(\n\x08\x64isjoint\x18\x06 \x01(\x0e\x32\x16.srv6path.DisjointMode\x12\x14\n\x0cpath_indexes\x18\x07 \x03(\x05\x12\x0f\n\x07weights\x18\x08 \x03(\x05\x12\x17\n\x0f\x63ompressed_sids\x18\t \x01(\x08\x12\x11\n\taudit_fib\x18\n \x01(\x08\x12\x18\n\x10topology_version\x18\x0b \x01(\t\"[\n\x0cWeightedPath\x12\x0f\n\x07\x61s_path\x18\x01 \x03(\x05\x12\x10\n\x08sid_list\x18\x02 \x03(\t\x12\x18\n\x10output_interface\x18\x03 \x01(\t\x12\x0e\n\x06weight\x18\x04 \x01(\x05\"\xe1\x02\n\x0cPathResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x15\n\rerror_message\x18\x02 \x01(\t\x12\x0f\n\x07\x61s_path\x18\x03 \x03(\x05\x12\x13\n\x0bpath_string\x18\x04 \x01(\t\x12\x0c\n\x04hops\x18\x05 \x01(\x05\x12\x10\n\x08sid_list\x18\x06 \x03(\t\x12\x1b\n\x13\x64\x65stination_network\x18\x07 \x01(\t\x12\x17\n\x0finstall_command\x18\x08 \x01(\t\x12\x18\n\x10output_interface\x18\t \x01(\t\x12\x0e\n\x06metric\x18\n \x01(\x05\x12!\n\x05nodes\x18\x0b \x03(\x0b\x32\x12.srv6path.NodeInfo\x12\x18\n\x10transit_commands\x18\x0c \x01(\t\x12)\n\tmultipath\x18\r \x03(\x0b\x32\x16.srv6path.WeightedPath\x12\x1b\n\x13\x63ompressed_sid_list\x18\x0e \x03(\t\"j\n\x08NodeInfo\x12\x0b\n\x03\x61sn\x18\x01 \x01(\x05\x12\x10\n\x08hostname\x18\x02 \x01(\t\x12\x0f\n\x07locator\x18\x03 \x01(\t\x12\x12\n\nis_trusted\x18\x04 \x01(\x08\x12\x0c\n\x04ipv4\x18\x05 \x01(\t\x12\x0c\n\x04ipv6\x18\x06 \x01(\t\"\x81\x01\n\x0eInstallConfirm\x12\x12\n\nsource_asn\x18\x01 \x01(\x05\x12\x17\n\x0f\x64\x65stination_asn\x18\x02 \x01(\x05\x12\x11\n\tinstalled\x18\x03 \x01(\x08\x12\x15\n\rerror_message\x18\x04 \x01(\t\x12\x18\n\x10\x63ommand_executed\x18\x05 \x01(\t\"3\n\x0fInstallResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"\x9f\x01\n\x0cRouteNexthop\x12\x0b\n\x03via\x18\x01 \x01(\t\x12\x0b\n\x03\x64\x65v\x18\x02 \x01(\t\x12\x0e\n\x06weight\x18\x03 \x01(\x05\x12\x0c\n\x04segs\x18\x04 \x03(\t\x12\x12\n\nencap_mode\x18\x05 \x01(\t\x12\x14\n\x0clocal_action\x18\x06 \x01(\t\x12\x0f\n\x07\x66lavors\x18\x07 \x03(\t\x12\r\n\x05lblen\x18\x08 \x01(\x05\x12\r\n\x05nflen\x18\t \x01(\x05\"\x86\x01\n\x0eRouteOperation\x12%\n\x06\x61\x63tion\x18\x01 \x01(\x0e\x32\x15.srv6path.RouteAction\x12\x13\n\x0b\x64\x65stination\x18\x02 \x01(\t\x12(\n\x08nexthops\x18\x03 \x03(\x0b\x32\x16.srv6path.RouteNexthop\x12\x0e\n\x06metric\x18\x04 \x01(\x05\"L\n\nRouteBatch\x12\x10\n\x08\x62\x61tch_id\x18\x01 \x01(\x04\x12,\n\noperations\x18\x02 \x03(\x0b\x32\x18.srv6path.RouteOperation\"+\n\nAgentHello\x12\x0b\n\x03\x61sn\x18\x01 \x01(\x05\x12\x10\n\x08hostname\x18\x02 \x01(\t\"X\n\x0b\x42\x61tchResult\x12\x10\n\x08\x62\x61tch_id\x18\x01 \x01(\x04\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x15\n\rerror_message\x18\x03 \x01(\t\x12\x0f\n\x07\x61pplied\x18\x04 \x01(\x05\"i\n\x0c\x41gentMessage\x12%\n\x05hello\x18\x01 \x01(\x0b\x32\x14.srv6path.AgentHelloH\x00\x12\'\n\x06result\x18\x02 \x01(\x0b\x32\x15.srv6path.BatchResultH\x00\x42\t\n\x07message*G\n\x0c\x44isjointMode\x12\x11\n\rDISJOINT_NONE\x10\x00\x12\x11\n\rDISJOINT_LINK\x10\x01\x12\x11\n\rDISJOINT_NODE\x10\x02*A\n\x0bRouteAction\x12\r\n\tROUTE_ADD\x10\x00\x12\x11\n\rROUTE_REPLACE\x10\x01\x12\x10\n\x0cROUTE_DELETE\x10\x02\x32\xc8\x03\n\x0fSRv6PathService\x12\x45\n\x0bRequestPath\x12\x15.srv6path.PathRequest\x1a\x1f.srv6path.MultiplePathsResponse\x12\x43\n\x0bInstallPath\x12\x1c.srv6path.InstallPathRequest\x1a\x16.srv6path.PathResponse\x12J\n\x13\x43onfirmInstallation\x12\x18.srv6path.InstallConfirm\x1a\x19.srv6path.InstallResponse\x12@\n\x0cRouteChannel\x12\x16.srv6path.AgentMessage\x1a\x14.srv6path.RouteBatch(\x01\x30\x01\x12M\n\x0cRequestPaths\x12\x1a.srv6path.MultiPathRequest\x1a\x1f.srv6path.MultiplePathsResponse0\x01\x12L\n\nWatchPaths\x12\x1b.srv6path.WatchPathsRequest\x1a\x1f.srv6path.MultiplePathsResponse0\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'srv6_path_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
-  _globals['_PATHREQUEST']._serialized_start=29
-  _globals['_PATHREQUEST']._serialized_end=138
-  _globals['_MULTIPLEPATHSRESPONSE']._serialized_start=140
-  _globals['_MULTIPLEPATHSRESPONSE']._serialized_end=263
-  _globals['_INSTALLPATHREQUEST']._serialized_start=265
-  _globals['_INSTALLPATHREQUEST']._serialized_end=372
-  _globals['_PATHRESPONSE']._serialized_start=375
-  _globals['_PATHRESPONSE']._serialized_end=656
-  _globals['_NODEINFO']._serialized_start=658
-  _globals['_NODEINFO']._serialized_end=764
-  _globals['_INSTALLCONFIRM']._serialized_start=767
-  _globals['_INSTALLCONFIRM']._serialized_end=896
-  _globals['_INSTALLRESPONSE']._serialized_start=898
-  _globals['_INSTALLRESPONSE']._serialized_end=949
-  _globals['_SRV6PATHSERVICE']._serialized_start=952
-  _globals['_SRV6PATHSERVICE']._serialized_end=1185
+  _globals['_DISJOINTMODE']._serialized_start=2256
+  _globals['_DISJOINTMODE']._serialized_end=2327
+  _globals['_ROUTEACTION']._serialized_start=2329
+  _globals['_ROUTEACTION']._serialized_end=2394
+  _globals['_PATHREQUEST']._serialized_start=30
+  _globals['_PATHREQUEST']._serialized_end=200
+  _globals['_MULTIPLEPATHSRESPONSE']._serialized_start=203
+  _globals['_MULTIPLEPATHSRESPONSE']._serialized_end=377
+  _globals['_MULTIPATHREQUEST']._serialized_start=379
+  _globals['_MULTIPATHREQUEST']._serialized_end=505
+  _globals['_WATCHPATHSREQUEST']._serialized_start=507
+  _globals['_WATCHPATHSREQUEST']._serialized_end=613
+  _globals['_INSTALLPATHREQUEST']._serialized_start=616
+  _globals['_INSTALLPATHREQUEST']._serialized_end=893
+  _globals['_WEIGHTEDPATH']._serialized_start=895
+  _globals['_WEIGHTEDPATH']._serialized_end=986
+  _globals['_PATHRESPONSE']._serialized_start=989
+  _globals['_PATHRESPONSE']._serialized_end=1342
+  _globals['_NODEINFO']._serialized_start=1344
+  _globals['_NODEINFO']._serialized_end=1450
+  _globals['_INSTALLCONFIRM']._serialized_start=1453
+  _globals['_INSTALLCONFIRM']._serialized_end=1582
+  _globals['_INSTALLRESPONSE']._serialized_start=1584
+  _globals['_INSTALLRESPONSE']._serialized_end=1635
+  _globals['_ROUTENEXTHOP']._serialized_start=1638
+  _globals['_ROUTENEXTHOP']._serialized_end=1797
+  _globals['_ROUTEOPERATION']._serialized_start=1800
+  _globals['_ROUTEOPERATION']._serialized_end=1934
+  _globals['_ROUTEBATCH']._serialized_start=1936
+  _globals['_ROUTEBATCH']._serialized_end=2012
+  _globals['_AGENTHELLO']._serialized_start=2014
+  _globals['_AGENTHELLO']._serialized_end=2057
+  _globals['_BATCHRESULT']._serialized_start=2059
+  _globals['_BATCHRESULT']._serialized_end=2147
+  _globals['_AGENTMESSAGE']._serialized_start=2149
+  _globals['_AGENTMESSAGE']._serialized_end=2254
+  _globals['_SRV6PATHSERVICE']._serialized_start=2397
+  _globals['_SRV6PATHSERVICE']._serialized_end=2853
 # @@protoc_insertion_point(module_scope)
@@ -49,6 +49,21 @@ class SRv6PathServiceStub(object):
                 request_serializer=srv6__path__pb2.InstallConfirm.SerializeToString,
                 response_deserializer=srv6__path__pb2.InstallResponse.FromString,
                 _registered_method=True)
+        self.RouteChannel = channel.stream_stream(
+                '/srv6path.SRv6PathService/RouteChannel',
+                request_serializer=srv6__path__pb2.AgentMessage.SerializeToString,
+                response_deserializer=srv6__path__pb2.RouteBatch.FromString,
+                _registered_method=True)
+        self.RequestPaths = channel.unary_stream(
+                '/srv6path.SRv6PathService/RequestPaths',
+                request_serializer=srv6__path__pb2.MultiPathRequest.SerializeToString,
+                response_deserializer=srv6__path__pb2.MultiplePathsResponse.FromString,
+                _registered_method=True)
+        self.WatchPaths = channel.unary_stream(
+                '/srv6path.SRv6PathService/WatchPaths',
+                request_serializer=srv6__path__pb2.WatchPathsRequest.SerializeToString,
+                response_deserializer=srv6__path__pb2.MultiplePathsResponse.FromString,
+                _registered_method=True)
 
 
 class SRv6PathServiceServicer(object):
@@ -72,6 +87,24 @@ class SRv6PathServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def RouteChannel(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def RequestPaths(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def WatchPaths(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_SRv6PathServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -90,6 +123,21 @@ def add_SRv6PathServiceServicer_to_server(servicer, server):
                     request_deserializer=srv6__path__pb2.InstallConfirm.FromString,
                     response_serializer=srv6__path__pb2.InstallResponse.SerializeToString,
             ),
+            'RouteChannel': grpc.stream_stream_rpc_method_handler(
+                    servicer.RouteChannel,
+                    request_deserializer=srv6__path__pb2.AgentMessage.FromString,
+                    response_serializer=srv6__path__pb2.RouteBatch.SerializeToString,
+            ),
+            'RequestPaths': grpc.unary_stream_rpc_method_handler(
+                    servicer.RequestPaths,
+                    request_deserializer=srv6__path__pb2.MultiPathRequest.FromString,
+                    response_serializer=srv6__path__pb2.MultiplePathsResponse.SerializeToString,
+            ),
+            'WatchPaths': grpc.unary_stream_rpc_method_handler(
+                    servicer.WatchPaths,
+                    request_deserializer=srv6__path__pb2.WatchPathsRequest.FromString,
+                    response_serializer=srv6__path__pb2.MultiplePathsResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'srv6path.SRv6PathService', rpc_method_handlers)
@@ -181,3 +229,84 @@ class SRv6PathService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def RouteChannel(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/srv6path.SRv6PathService/RouteChannel',
+            srv6__path__pb2.AgentMessage.SerializeToString,
+            srv6__path__pb2.RouteBatch.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def RequestPaths(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/srv6path.SRv6PathService/RequestPaths',
+            srv6__path__pb2.MultiPathRequest.SerializeToString,
+            srv6__path__pb2.MultiplePathsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def WatchPaths(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/srv6path.SRv6PathService/WatchPaths',
+            srv6__path__pb2.WatchPathsRequest.SerializeToString,
+            srv6__path__pb2.MultiplePathsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
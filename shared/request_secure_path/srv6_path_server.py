@@ -3,157 +3,484 @@
 
 import grpc
 from concurrent import futures
+import argparse
+import asyncio
 import sqlite3
-from collections import defaultdict, deque
+from collections import Counter
 import sys
 import os
+import json
+import queue
 import subprocess
+import threading
+import time
+from types import MappingProxyType
 
 sys.path.append('/shared')
 import srv6_path_pb2
 import srv6_path_pb2_grpc
+from srv6_path_graph import CompactGraph, disjoint_paths, k_shortest_paths, shortest_path_tree
+from srv6_path_cache import PathCache
+from srv6_topology_delta import load_delta
+from srv6_ssh_pool import SSHSessionPool
+from srv6_route_channel import AgentRegistry
+from srv6_route_ledger import DB_ROUTES, RouteLedger, audit_routes, plan_routes
+import srv6_routes
+from srv6_usid import pack_usids, usid_prefix
+from aio_serving import BLOCKING_WORKERS, BlockingExecutor, ContextProxy, LoopQueue
+import metrics
 
 DB_TRUSTED = '/shared/trusted_nodes.db'
 DB_TOPOLOGY = '/shared/network_topology.db'
 CERT_DIR = '/shared/certs'
 SERVER_CERT = os.path.join(CERT_DIR, "server.crt")
 SERVER_KEY = os.path.join(CERT_DIR, "server.key")
+CA_CERT = os.path.join(CERT_DIR, "ca.crt")
+AGENT_PORT = 50054
+
+DEFAULT_MAX_PATHS = 5
+MAX_PATHS_LIMIT = 32
+#coppia di path disgiunti se il client non indica max_paths
+DEFAULT_DISJOINT_PATHS = 2
+#pesi ammessi da 'ip route ... nexthop ... weight'
+MAX_NEXTHOP_WEIGHT = 256
+PATH_CACHE_SIZE = 1024
+PATH_CACHE_MAX_AGE = 300
+PRECOMPUTE_INTERVAL = 2
+#oltre questa quota di nodi con adiacenza modificata dai delta si ricostruisce il CSR
+GRAPH_COMPACT_RATIO = 8
+GRAPH_COMPACT_MIN = 64
+TRANSIT_INSTALL_WORKERS = 8
+#InstallPath contemporanee in modalità asyncio (ognuna attende SSH o agent)
+INSTALL_WORKERS = 16
+#server a thread: thread per le RPC brevi, più uno per ogni stream di lunga durata
+#(RouteChannel di un agent, WatchPaths) che lo occupa per tutta la sua vita.
+#Oltre MAX_STREAMS i nuovi stream ricevono RESOURCE_EXHAUSTED; con --aio nessun limite
+SERVER_WORKERS = 20
+MAX_STREAMS = 64
+
+SERVER_OPTIONS = [
+    ('grpc.max_send_message_length', 50 * 1024 * 1024),
+    ('grpc.max_receive_message_length', 50 * 1024 * 1024),
+    ('grpc.keepalive_time_ms', 30000),
+    ('grpc.keepalive_timeout_ms', 10000),
+    ('grpc.keepalive_permit_without_calls', True),
+]
+
+SEARCH_DURATION = metrics.histogram('srv6_path_search_seconds', 'Path search latency', ('algorithm',))
+SEARCH_EXPANSIONS = metrics.histogram(
+    'srv6_path_search_expansions', 'Nodes expanded by one path search', ('algorithm',),
+    buckets=(1, 10, 100, 1000, 10000, 100000, 1000000)
+)
+INSTALL_DURATION = metrics.histogram(
+    'srv6_install_duration_seconds', 'Route programming latency per transit node', ('asn', 'channel')
+)
+INSTALL_TOTAL = metrics.counter('srv6_install_total', 'Transit node programming, by outcome', ('channel', 'status'))
+TOPOLOGY_SIZE = metrics.gauge('srv6_topology_size', 'Size of the current topology snapshot', ('kind',))
+TOPOLOGY_RELOADS = metrics.histogram('srv6_topology_reload_seconds', 'Topology snapshot rebuilds', ('kind',))
+SERVICE_STATE = metrics.gauge('srv6_path_service', 'Path cache, precompute, watch and agent state', ('stat',))
+
+def version_string(version):
+    """Versione dello snapshot come la vede il client ('' se i database non hanno contatore)"""
+    return '' if version is None else ':'.join(str(part) for part in version)
+
+def parse_version(text):
+    try:
+        return tuple(int(part) for part in text.split(':'))
+    except ValueError:
+        return None
+
+def read_generation(db_path):
+    """Contatore di generazione scritto dai server di registrazione/raccolta"""
+    try:
+        with sqlite3.connect(db_path) as conn:
+            row = conn.execute(
+                'SELECT generation FROM topology_generation WHERE id = 0'
+            ).fetchone()
+            return row[0] if row else None
+    except sqlite3.Error:
+        return None
+
+class TopologySnapshot:
+    """Vista immutabile della topologia, identificata da una versione"""
+    __slots__ = ('version', 'trusted_nodes', 'neighbors', 'next_hops', 'segments', 'graph')
+
+    def __init__(self, version, trusted_nodes, neighbors, segments):
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'trusted_nodes', MappingProxyType(
+            {asn: MappingProxyType(info) for asn, info in trusted_nodes.items()}
+        ))
+        object.__setattr__(self, 'neighbors', MappingProxyType(
+            {asn: tuple(MappingProxyType(nbr) for nbr in nbrs) for asn, nbrs in neighbors.items()}
+        ))
+        #(local_asn, neighbor_asn) -> link verso il vicino, anche più di uno in parallelo
+        next_hops = {}
+        for asn, nbrs in self.neighbors.items():
+            for nbr in nbrs:
+                next_hops.setdefault((asn, nbr['neighbor_asn']), []).append(nbr)
+        object.__setattr__(self, 'next_hops', MappingProxyType(
+            {key: tuple(links) for key, links in next_hops.items()}
+        ))
+        object.__setattr__(self, 'segments', tuple(segments))
+        object.__setattr__(self, 'graph', CompactGraph(self.segments, self.trusted_nodes))
+
+    def updated(self, delta):
+        """Nuovo snapshot con il delta applicato: si rileggono solo i nodi cambiati"""
+        snapshot = object.__new__(TopologySnapshot)
+        changed = delta.changed_asns
+
+        trusted_nodes = dict(self.trusted_nodes)
+        neighbors = dict(self.neighbors)
+        next_hops = {key: links for key, links in self.next_hops.items() if key[0] not in changed}
+        for asn, node in delta.nodes.items():
+            trusted_nodes.pop(asn, None)
+            neighbors.pop(asn, None)
+            if node is not None:
+                trusted_nodes[asn] = MappingProxyType(node)
+            nbrs = tuple(MappingProxyType(nbr) for nbr in delta.neighbors.get(asn, ()))
+            if nbrs:
+                neighbors[asn] = nbrs
+            for nbr in nbrs:
+                key = (asn, nbr['neighbor_asn'])
+                next_hops[key] = next_hops.get(key, ()) + (nbr,)
+
+        removed = set(delta.removed)
+        segments = [segment for segment in self.segments if segment not in removed] if removed else list(self.segments)
+        segments.extend(delta.added)
+        #un arco sparisce solo se non resta anche il segmento nel verso opposto
+        remaining = {frozenset(segment) for segment in segments} if removed else set()
+        removed_edges = [segment for segment in removed if frozenset(segment) not in remaining]
+
+        graph = self.graph.updated(delta.added, removed_edges, trusted_nodes, changed)
+        if len(graph.patched) > max(GRAPH_COMPACT_MIN, len(graph) // GRAPH_COMPACT_RATIO):
+            graph = CompactGraph(segments, trusted_nodes)
+
+        object.__setattr__(snapshot, 'version', delta.new_version)
+        object.__setattr__(snapshot, 'trusted_nodes', MappingProxyType(trusted_nodes))
+        object.__setattr__(snapshot, 'neighbors', MappingProxyType(neighbors))
+        object.__setattr__(snapshot, 'next_hops', MappingProxyType(next_hops))
+        object.__setattr__(snapshot, 'segments', tuple(segments))
+        object.__setattr__(snapshot, 'graph', graph)
+        return snapshot
+
+    def __setattr__(self, name, value):
+        raise AttributeError("TopologySnapshot is immutable")
 
 class SRv6PathCalculator:
-    def __init__(self):
-        self.trusted_nodes = {}
-        self.neighbors = {}
-        self.segments = []
+    def __init__(self, db_trusted=DB_TRUSTED, db_topology=DB_TOPOLOGY, db_routes=DB_ROUTES):
+        self.db_trusted = db_trusted
+        self.db_topology = db_topology
+        #route di transito già installate: un install ripetuto non riprogramma i nodi
+        self.route_ledger = RouteLedger(db_routes)
+        #asn -> last_update della registrazione con cui il registro è stato verificato in questa esecuzione
+        self.ledger_verified = {}
+        self.ledger_lock = threading.Lock()
+        self.snapshot = TopologySnapshot(None, {}, {}, [])
+        self.reload_lock = threading.Lock()
+        self.path_cache = PathCache(PATH_CACHE_SIZE, PATH_CACHE_MAX_AGE)
+        #(versione precedente, versione nuova, invalidator) dell'ultimo delta applicato
+        self.last_delta = None
+        self.ssh_pool = SSHSessionPool()
+        self.agents = AgentRegistry(on_connect=self.node_restarted)
+        self.install_pool = futures.ThreadPoolExecutor(
+            max_workers=TRANSIT_INSTALL_WORKERS, thread_name_prefix='transit-install'
+        )
         self.load_data()
     
+    @property
+    def trusted_nodes(self):
+        return self.snapshot.trusted_nodes
+    
+    @property
+    def neighbors(self):
+        return self.snapshot.neighbors
+    
+    @property
+    def segments(self):
+        return self.snapshot.segments
+    
+    def topology_version(self):
+        return (read_generation(self.db_trusted), read_generation(self.db_topology))
+    
     def load_data(self):
-        self.load_trusted_nodes()
-        self.load_neighbors()
-        self.load_segments()
+        """Restituisce lo snapshot corrente, ricostruendolo solo se i database sono cambiati"""
+        version = self.topology_version()
+        #senza contatore (database vecchi) si ricarica sempre
+        known = None not in version
+        
+        snapshot = self.snapshot
+        if known and snapshot.version == version:
+            return snapshot
+        
+        with self.reload_lock:
+            snapshot = self.snapshot
+            if known and snapshot.version == version:
+                return snapshot
+            
+            previous = snapshot
+            started = time.perf_counter()
+            delta = load_delta(self.db_trusted, self.db_topology, previous.version, version) if known else None
+            try:
+                if delta is not None:
+                    snapshot = previous.updated(delta)
+                else:
+                    snapshot = TopologySnapshot(
+                        version if known else None,
+                        self.load_trusted_nodes(),
+                        self.load_neighbors(),
+                        self.load_segments()
+                    )
+            except Exception as e:
+                print(f"Error loading topology, keeping version {self.snapshot.version}: {e}")
+                return self.snapshot
+            
+            if delta is not None:
+                #restano in cache i path che il delta non può aver cambiato
+                stale = delta.invalidator(previous.graph, snapshot.graph)
+                kept, dropped = self.path_cache.rekey(previous.version, snapshot.version, stale)
+                self.last_delta = (previous.version, snapshot.version, stale)
+                print(f"Topology delta {previous.version} -> {snapshot.version}: {delta}, "
+                      f"{kept} cached path sets kept, {dropped} invalidated")
+            else:
+                self.last_delta = None
+                #liste delle versioni precedenti non più verificabili: InstallPath non deve usarle
+                self.path_cache.clear()
+            TOPOLOGY_RELOADS.observe(time.perf_counter() - started, kind='full' if delta is None else 'delta')
+            
+            #swap atomico: i lettori vedono il vecchio o il nuovo snapshot, mai uno parziale
+            self.snapshot = snapshot
+            TOPOLOGY_SIZE.set(len(snapshot.trusted_nodes), kind='trusted_nodes')
+            TOPOLOGY_SIZE.set(len(snapshot.graph), kind='ases')
+            TOPOLOGY_SIZE.set(snapshot.graph.edge_count, kind='segments')
+            print(f"Topology snapshot {snapshot.version}: {len(snapshot.trusted_nodes)} trusted nodes, "
+                  f"{len(snapshot.graph)} ASes, {snapshot.graph.edge_count} segments")
+        return snapshot
     
     def load_trusted_nodes(self):
-        try:
-            with sqlite3.connect(DB_TRUSTED) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.execute('SELECT * FROM nodes')
-                self.trusted_nodes = {int(row['router_bgp']): dict(row) for row in cursor}
-            print("[1/3] Data loaded")
-        except Exception as e:
-            print(f"Error loading trusted nodes: {e}")
+        with sqlite3.connect(self.db_trusted) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.execute('SELECT * FROM nodes')
+            trusted_nodes = {int(row['router_bgp']): dict(row) for row in cursor}
+        print("[1/3] Data loaded")
+        return trusted_nodes
     
     def load_neighbors(self):
-        try:
-            with sqlite3.connect(DB_TRUSTED) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.execute('SELECT * FROM bgp_neighbors')
-                for row in cursor:
-                    asn = row['local_asn']
-                    self.neighbors.setdefault(asn, []).append({
-                        'neighbor_asn': row['neighbor_asn'],
-                        'neighbor_ip': row['neighbor_ip'],
-                        'interface': row['interface']
-                    })
-            print("[2/3] Data loaded")
-        except Exception as e:
-            print(f"Error loading neighbors: {e}")
+        neighbors = {}
+        with sqlite3.connect(self.db_trusted) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.execute('SELECT * FROM bgp_neighbors')
+            for row in cursor:
+                asn = row['local_asn']
+                neighbors.setdefault(asn, []).append({
+                    'neighbor_asn': row['neighbor_asn'],
+                    'neighbor_ip': row['neighbor_ip'],
+                    'interface': row['interface']
+                })
+        print("[2/3] Data loaded")
+        return neighbors
     
     def load_segments(self):
-        try:
-            with sqlite3.connect(DB_TOPOLOGY) as conn:
-                cursor = conn.execute('SELECT as_a, as_b FROM segments')
-                self.segments = [(row[0], row[1]) for row in cursor]
-            print("[3/3] Data loaded")
-        except Exception as e:
-            print(f"Error loading segments: {e}")
-    
-    def build_graph(self, only_trusted=True):
-        graph = defaultdict(set)
-        for as_a, as_b in self.segments:
-            if not only_trusted or (as_a in self.trusted_nodes and as_b in self.trusted_nodes):
-                graph[as_a].add(as_b)
-                graph[as_b].add(as_a)
-        return graph
-    
-    def find_all_paths(self, graph, start, end, max_paths=5):
-        if start not in graph or end not in graph:
-            return []
+        with sqlite3.connect(self.db_topology) as conn:
+            cursor = conn.execute('SELECT as_a, as_b FROM segments')
+            segments = [(row[0], row[1]) for row in cursor]
+        print("[3/3] Data loaded")
+        return segments
+    
+    def build_graph(self, only_trusted=True, snapshot=None):
+        """Vista sul grafo CSR dello snapshot, costruito una volta per versione"""
+        snapshot = snapshot or self.snapshot
+        return snapshot.graph.view(only_trusted)
+    
+    def find_all_paths(self, graph, start, end, max_paths=DEFAULT_MAX_PATHS, tree=None):
+        stats = {}
+        with SEARCH_DURATION.time(algorithm='yen'):
+            paths = k_shortest_paths(graph, start, end, max_paths, tree, stats)
+        SEARCH_EXPANSIONS.observe(stats.get('expansions', 0), algorithm='yen')
+        return paths
+    
+    def find_disjoint_paths(self, graph, start, end, max_paths=DEFAULT_DISJOINT_PATHS,
+                            disjoint=srv6_path_pb2.DISJOINT_NODE):
+        stats = {}
+        with SEARCH_DURATION.time(algorithm='disjoint'):
+            paths = disjoint_paths(
+                graph, start, end, max_paths, node_disjoint=disjoint == srv6_path_pb2.DISJOINT_NODE, stats=stats
+            )
+        SEARCH_EXPANSIONS.observe(stats.get('expansions', 0), algorithm='disjoint')
+        return paths
+    
+    def get_paths(self, source_asn, dest_asn, only_trusted=True, max_paths=DEFAULT_MAX_PATHS, snapshot=None,
+                  disjoint=srv6_path_pb2.DISJOINT_NONE):
+        """Lista di (path, PathResponse) per una coppia, servita dalla cache se possibile"""
+        snapshot = snapshot or self.snapshot
+        key = path_key(source_asn, dest_asn, only_trusted, max_paths, disjoint, snapshot.version)
+        
+        #senza versione non si può garantire che la lista resti la stessa
+        cacheable = snapshot.version is not None
+        if cacheable:
+            results = self.path_cache.get(key)
+            if results is not None:
+                return results
         
-        all_paths = []
-        queue = deque([[start]])
+        graph = self.build_graph(only_trusted, snapshot)
+        if disjoint == srv6_path_pb2.DISJOINT_NONE:
+            results = self.compute_paths(source_asn, dest_asn, graph, max_paths, snapshot)
+        else:
+            paths = self.find_disjoint_paths(graph, source_asn, dest_asn, max_paths, disjoint)
+            results = self.build_results(paths, source_asn, dest_asn, snapshot)
         
-        while queue and len(all_paths) < max_paths:
-            path = queue.popleft()
-            node = path[-1]
+        if cacheable:
+            self.path_cache.put(key, results)
+        return results
+    
+    def remember_paths(self, key, results):
+        """Lista servita da fuori cache (precalcolo): InstallPath la ritrova per versione"""
+        if key[-1] is not None:
+            self.path_cache.put(key, results)
+    
+    def compute_paths(self, source_asn, dest_asn, graph, max_paths=DEFAULT_MAX_PATHS, snapshot=None):
+        paths = self.find_all_paths(graph, source_asn, dest_asn, max_paths)
+        return self.build_results(paths, source_asn, dest_asn, snapshot)
+    
+    def build_results(self, paths, source_asn, dest_asn, snapshot=None):
+        snapshot = snapshot or self.snapshot
+        results = []
+        for path in paths:
+            response = self.build_path_response(path, source_asn, dest_asn, snapshot)
+            if response:
+                results.append((path, response))
+        return tuple(results)
+    
+    def get_paths_many(self, source_asn, dest_asns, only_trusted=True, max_paths=DEFAULT_MAX_PATHS, snapshot=None):
+        """Path verso più destinazioni con un solo albero dei cammini minimi dalla sorgente"""
+        snapshot = snapshot or self.snapshot
+        cacheable = snapshot.version is not None
+        graph = tree = None
+        
+        for dest_asn in dest_asns:
+            key = path_key(source_asn, dest_asn, only_trusted, max_paths, srv6_path_pb2.DISJOINT_NONE, snapshot.version)
+            results = self.path_cache.get(key) if cacheable else None
             
-            if node == end:
-                all_paths.append(path)
-                continue
+            if results is None:
+                if tree is None:
+                    graph = self.build_graph(only_trusted, snapshot)
+                    stats = {}
+                    with SEARCH_DURATION.time(algorithm='tree'):
+                        tree = shortest_path_tree(graph, source_asn, stats)
+                    SEARCH_EXPANSIONS.observe(stats.get('expansions', 0), algorithm='tree')
+                paths = self.find_all_paths(graph, source_asn, dest_asn, max_paths, tree)
+                results = self.build_results(paths, source_asn, dest_asn, snapshot)
+                if cacheable:
+                    self.path_cache.put(key, results)
             
-            for neighbor in sorted(graph[node]):
-                if neighbor not in path:
-                    queue.append(path + [neighbor])
-        
-        return sorted(all_paths, key=len)
+            yield dest_asn, results
     
-    def get_locator_address(self, asn):
-        if asn in self.trusted_nodes:
-            locator = self.trusted_nodes[asn]['locator']
+    def get_locator_address(self, asn, snapshot=None):
+        snapshot = snapshot or self.snapshot
+        if asn in snapshot.trusted_nodes:
+            locator = snapshot.trusted_nodes[asn]['locator']
             if locator and locator != 'N/A':
                 prefix = locator.split('/')[0]
                 return f"{prefix}1" if prefix.endswith('::') else f"{prefix}::1"
         return None
     
-    def find_next_hop_to(self, current_asn, target_asn):
-        for nbr in self.neighbors.get(current_asn, []):
-            if nbr['neighbor_asn'] == target_asn:
-                return nbr
-        return None
+    def get_compressed_sids(self, path, snapshot=None):
+        """Micro-SID dei nodi di transito in container (NEXT-C-SID), poi il SID della destinazione.
+        
+        Lista vuota se il path non ha transito o un nodo non ha un locator comprimibile.
+        """
+        snapshot = snapshot or self.snapshot
+        transit = [snapshot.trusted_nodes.get(asn) for asn in path[1:-1]]
+        if not transit or None in transit:
+            return []
+        containers = pack_usids(transit)
+        dest_sid = self.get_locator_address(path[-1], snapshot)
+        if not containers or not dest_sid:
+            return []
+        return containers + [dest_sid]
+    
+    def generate_usid_routes(self, paths, snapshot=None):
+        """Comportamento End con flavor next-csid sul micro-SID di ogni nodo di transito"""
+        snapshot = snapshot or self.snapshot
+        usid_routes = {}
+        for path in paths:
+            for asn in path[1:-1]:
+                node = snapshot.trusted_nodes[asn]
+                usid_routes[asn] = [srv6_routes.route(
+                    srv6_routes.ROUTE_REPLACE, usid_prefix(node),
+                    [srv6_routes.local_nexthop(
+                        'End', 'lo', ['next-csid'], node['locator_block_len'], node['locator_node_len']
+                    )]
+                )]
+        return usid_routes
+    
+    def find_next_hops_to(self, current_asn, target_asn, snapshot=None):
+        snapshot = snapshot or self.snapshot
+        return snapshot.next_hops.get((current_asn, target_asn), ())
+    
+    def find_next_hop_to(self, current_asn, target_asn, snapshot=None):
+        links = self.find_next_hops_to(current_asn, target_asn, snapshot)
+        return links[0] if links else None
     
-    def generate_transit_commands(self, path):
-        if len(path) < 2:
+    def generate_transit_routes(self, path, snapshot=None):
+        """Route per i nodi di transito, in forma strutturata (vedi srv6_routes)"""
+        return self.generate_multipath_transit_routes([path], [1], snapshot)
+    
+    def generate_multipath_transit_routes(self, paths, weights, snapshot=None):
+        """Route di transito per più path verso la stessa destinazione.
+        
+        Un nodo attraversato da più path riceve una sola route con un nexthop
+        per ogni link d'uscita, pesato con la somma dei pesi dei path.
+        """
+        snapshot = snapshot or self.snapshot
+        if not paths or len(paths[0]) < 2:
             return {}
         
-        dest_locator = self.trusted_nodes[path[-1]]['locator']
-        transit_commands = {}
+        dest_locator = snapshot.trusted_nodes[paths[0][-1]]['locator']
+        #asn -> {(neighbor_ip, interface): peso}
+        links_by_asn = {}
         
-        for i in range(1, len(path) - 1):
-            next_hop = self.find_next_hop_to(path[i], path[i + 1])
-            if next_hop:
-                commands = []
-                
-                #rimuove tutte le route esistenti una alla volta per quella destinazione
-                commands.append(
-                    f"while ip -6 route del {dest_locator} 2>/dev/null; do :; done"
-                )
-                
-                commands.append(
-                    f"ip -6 route add {dest_locator} "
-                    f"via {next_hop['neighbor_ip']} "
-                    f"dev {next_hop['interface']} metric 1"
-                )
-                
-                transit_commands.setdefault(path[i], []).extend(commands)
+        for path, weight in zip(paths, weights):
+            for i in range(1, len(path) - 1):
+                next_hop = self.find_next_hop_to(path[i], path[i + 1], snapshot)
+                if next_hop:
+                    links = links_by_asn.setdefault(path[i], {})
+                    link = (next_hop['neighbor_ip'], next_hop['interface'])
+                    links[link] = links.get(link, 0) + weight
         
-        return transit_commands
+        #stato desiderato: le operazioni vere le decide il registro (plan_routes)
+        return {
+            asn: [
+                srv6_routes.route(
+                    srv6_routes.ROUTE_REPLACE, dest_locator,
+                    [srv6_routes.nexthop(via, dev, min(weight, MAX_NEXTHOP_WEIGHT))
+                     for (via, dev), weight in links.items()]
+                ),
+            ]
+            for asn, links in links_by_asn.items()
+        }
     
-    def install_command_on_node(self, asn, command):
-        if asn not in self.trusted_nodes:
+    def generate_transit_commands(self, path, snapshot=None):
+        """Comandi per programmare da zero i nodi di transito (senza registro)"""
+        return {
+            asn: [cmd for op in plan_routes(routes, {}) for cmd in srv6_routes.shell_commands(op)]
+            for asn, routes in self.generate_transit_routes(path, snapshot).items()
+        }
+    
+    def install_commands_on_node(self, asn, commands, snapshot=None):
+        """Esegue tutti i comandi di un nodo, in ordine, in una sola sessione ssh"""
+        snapshot = snapshot or self.snapshot
+        if asn not in snapshot.trusted_nodes:
             return False, "Node not trusted"
         
-        node_ipv4 = self.trusted_nodes[asn].get('ipv4', '')
+        node_ipv4 = snapshot.trusted_nodes[asn].get('ipv4', '')
         if not node_ipv4 or node_ipv4 == 'N/A':
             return False, "No IPv4 address for node"
         
         try:
-            #ssh
-            ssh_cmd = f"ssh -o ConnectTimeout=5 -o StrictHostKeyChecking=no root@{node_ipv4} '{command}'"
-            result = subprocess.run(
-                ssh_cmd,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
+            #script su stdin: niente quoting della shell locale, si ferma al primo errore
+            script = "set -e\n" + "\n".join(commands) + "\n"
+            with INSTALL_DURATION.time(asn=asn, channel='ssh'):
+                result = self.ssh_pool.run(node_ipv4, script, timeout=10)
             
             if result.returncode == 0:
                 return True, "OK"
@@ -166,20 +493,168 @@ class SRv6PathCalculator:
         except Exception as e:
             return False, str(e)
     
-    def build_path_response(self, path, source_asn, dest_asn):
-        sid_list = [self.get_locator_address(asn) for asn in path]
+    def install_command_on_node(self, asn, command, snapshot=None):
+        return self.install_commands_on_node(asn, [command], snapshot)
+    
+    def read_fib(self, asn, snapshot):
+        """Route IPv6 del nodo ('ip -j -6 route show') via ssh, None se non leggibili"""
+        node_ipv4 = snapshot.trusted_nodes.get(asn, {}).get('ipv4', '')
+        if not node_ipv4 or node_ipv4 == 'N/A':
+            return None
+        try:
+            result = self.ssh_pool.run(node_ipv4, "ip -j -6 route show\n", timeout=10)
+            if result.returncode != 0:
+                return None
+            return json.loads(result.stdout or '[]')
+        except Exception:
+            return None
+    
+    def audit_transit_nodes(self, asns, snapshot=None):
+        """Confronta il registro con la FIB dei nodi (una lettura per nodo, in parallelo).
+        
+        Le destinazioni che non corrispondono escono dal registro e verranno riprogrammate.
+        """
+        snapshot = snapshot or self.snapshot
+        asns = [asn for asn in asns if self.route_ledger.installed(asn)]
+        jobs = {asn: self.install_pool.submit(self.read_fib, asn, snapshot) for asn in asns}
+        
+        mismatched = {}
+        for asn, job in jobs.items():
+            installed = self.route_ledger.installed(asn)
+            fib = job.result()
+            stale = list(installed) if fib is None else audit_routes(installed, fib)
+            if stale:
+                self.route_ledger.forget(asn, stale)
+                mismatched[asn] = stale
+        return mismatched
+    
+    def node_restarted(self, asn):
+        """Nodo riavviato o agent riconnesso: le route del registro non sono più garantite"""
+        if self.route_ledger.installed(asn):
+            print(f"  [Ledger] AS{asn} restarted, its transit routes will be reprogrammed")
+        self.route_ledger.forget(asn)
+    
+    def registration_stamps(self, asns):
+        """asn -> last_update della registrazione (una ri-registrazione identica non cambia la generazione)"""
+        asns = list(asns)
+        if not asns:
+            return {}
+        try:
+            with sqlite3.connect(self.db_trusted) as conn:
+                rows = conn.execute(
+                    f"SELECT router_bgp, last_update FROM nodes WHERE router_bgp IN ({','.join('?' * len(asns))})",
+                    asns
+                ).fetchall()
+        except sqlite3.Error:
+            return {}
+        return {int(asn): stamp for asn, stamp in rows}
+    
+    def unverified_nodes(self, asns):
+        """Nodi il cui registro non è stato verificato in questa esecuzione.
+        
+        Un nodo ri-registrato (riavvio del nodo o del lab) perde le sue route nel
+        registro; uno mai visto da questo controller va confrontato con la FIB.
+        """
+        stamps = self.registration_stamps(asns)
+        unverified = []
+        with self.ledger_lock:
+            for asn in asns:
+                stamp = stamps.get(asn)
+                if asn not in self.ledger_verified:
+                    unverified.append(asn)
+                elif self.ledger_verified[asn] != stamp:
+                    self.node_restarted(asn)
+                self.ledger_verified[asn] = stamp
+        return unverified
+    
+    def program_transit_routes(self, transit_routes, snapshot=None, audit=False):
+        """Porta i nodi di transito allo stato desiderato inviando solo le differenze col registro.
+        
+        Il registro di ogni nodo è confrontato con la FIB la prima volta che il nodo
+        compare in questa esecuzione del controller (o sempre, con audit).
+        Restituisce (operazioni inviate per nodo, riepilogo per nodo).
+        """
+        snapshot = snapshot or self.snapshot
+        unverified = self.unverified_nodes(list(transit_routes))
+        to_audit = list(transit_routes) if audit else unverified
+        if to_audit:
+            for asn, destinations in self.audit_transit_nodes(to_audit, snapshot).items():
+                print(f"  [Audit] AS{asn}: {len(destinations)} route(s) differ from the ledger")
+        
+        plan = self.route_ledger.plan(transit_routes)
+        summary = self.install_transit_routes(plan, snapshot) if plan else []
+        for node in summary:
+            if node['success']:
+                self.route_ledger.record(node['asn'], plan[node['asn']])
+            else:
+                #esito parziale sconosciuto: al prossimo install si riparte da zero
+                self.route_ledger.forget(node['asn'], [op['destination'] for op in plan[node['asn']]])
+        
+        for asn in transit_routes:
+            if asn not in plan:
+                summary.append({
+                    'asn': asn,
+                    'hostname': snapshot.trusted_nodes[asn]['hostname'] if asn in snapshot.trusted_nodes else '',
+                    'channel': 'ledger',
+                    'success': True,
+                    'message': 'Unchanged',
+                    'commands': 0
+                })
+        return plan, summary
+    
+    def install_transit_routes(self, transit_routes, snapshot=None):
+        """Programma i nodi di transito in parallelo: agent dove connesso, altrimenti ssh"""
+        snapshot = snapshot or self.snapshot
+        agent_routes = {asn: ops for asn, ops in transit_routes.items() if self.agents.get(asn)}
+        ssh_jobs = {
+            asn: self.install_pool.submit(
+                self.install_commands_on_node, asn,
+                [cmd for op in ops for cmd in srv6_routes.shell_commands(op)], snapshot
+            )
+            for asn, ops in transit_routes.items() if asn not in agent_routes
+        }
+        agent_results = {}
+        if agent_routes:
+            started = time.perf_counter()
+            agent_results = self.agents.push(agent_routes)
+            #un solo round trip per tutti gli agent
+            for asn in agent_routes:
+                INSTALL_DURATION.observe(time.perf_counter() - started, asn=asn, channel='agent')
+        
+        summary = []
+        for asn, ops in transit_routes.items():
+            if asn in agent_routes:
+                channel = 'agent'
+                success, message = agent_results[asn]
+            else:
+                channel = 'ssh'
+                success, message = ssh_jobs[asn].result()
+            INSTALL_TOTAL.inc(channel=channel, status='OK' if success else 'FAILED')
+            summary.append({
+                'asn': asn,
+                'hostname': snapshot.trusted_nodes[asn]['hostname'] if asn in snapshot.trusted_nodes else '',
+                'channel': channel,
+                'success': success,
+                'message': message,
+                'commands': len(ops)
+            })
+        return summary
+    
+    def build_path_response(self, path, source_asn, dest_asn, snapshot=None):
+        snapshot = snapshot or self.snapshot
+        sid_list = [self.get_locator_address(asn, snapshot) for asn in path]
         sid_list = [sid for sid in sid_list if sid]
         
-        dest_locator = self.get_locator_address(dest_asn)
+        dest_locator = self.get_locator_address(dest_asn, snapshot)
         if not dest_locator:
             return None
         
-        dest_full = self.trusted_nodes[dest_asn]['locator']
+        dest_full = snapshot.trusted_nodes[dest_asn]['locator']
         dest_network = dest_full if '/' in dest_full else f"{dest_locator}/128"
         
         #trova interfaccia output
         if len(path) > 1:
-            next_hop = self.find_next_hop_to(source_asn, path[1])
+            next_hop = self.find_next_hop_to(source_asn, path[1], snapshot)
             output_interface = next_hop['interface'] if next_hop else "eth2"
         else:
             output_interface = "eth1"
@@ -189,20 +664,19 @@ class SRv6PathCalculator:
         if intermediate_sids:
             install_command = (f"ip -6 route add {dest_network} encap seg6 mode encap "
                              f"segs {','.join(sid_list)} dev {output_interface} metric 1")
-            print(install_command)
         else:
             install_command = "# Direct connection, no SRv6 needed"
         
         nodes_info = [
             srv6_path_pb2.NodeInfo(
                 asn=asn,
-                hostname=self.trusted_nodes[asn]['hostname'],
-                locator=self.trusted_nodes[asn]['locator'],
+                hostname=snapshot.trusted_nodes[asn]['hostname'],
+                locator=snapshot.trusted_nodes[asn]['locator'],
                 is_trusted=True,
-                ipv4=self.trusted_nodes[asn].get('ipv4', 'N/A'),
-                ipv6=self.trusted_nodes[asn].get('ipv6', 'N/A')
+                ipv4=snapshot.trusted_nodes[asn].get('ipv4', 'N/A'),
+                ipv6=snapshot.trusted_nodes[asn].get('ipv6', 'N/A')
             )
-            for asn in path if asn in self.trusted_nodes
+            for asn in path if asn in snapshot.trusted_nodes
         ]
         
         return srv6_path_pb2.PathResponse(
@@ -213,80 +687,569 @@ class SRv6PathCalculator:
             install_command=install_command,
             output_interface=output_interface,
             metric=1,
-            nodes=nodes_info
+            nodes=nodes_info,
+            compressed_sid_list=self.get_compressed_sids(path, snapshot)
+        )
+
+    def build_install_response(self, selected, weights, compressed=False, snapshot=None):
+        """PathResponse con una sola route sul source: un nexthop pesato per SID list (compressa o no)"""
+        snapshot = snapshot or self.snapshot
+        members = []
+        nexthops = []
+        for (path, response), weight in zip(selected, weights):
+            #come in build_path_response: un path di un solo AS non ha un nexthop
+            if len(path) < 2:
+                return srv6_path_pb2.PathResponse(
+                    success=False,
+                    error_message=f"AS{path[0]} is both source and destination: no route to install"
+                )
+            #IPv6 multipath: Linux rifiuta i nexthop con solo il device, serve il gateway
+            next_hop = self.find_next_hop_to(path[0], path[1], snapshot)
+            if not next_hop:
+                return srv6_path_pb2.PathResponse(
+                    success=False,
+                    error_message=f"No next hop from AS{path[0]} to AS{path[1]}"
+                )
+            sid_list = response.compressed_sid_list if compressed else response.sid_list
+            members.append(srv6_path_pb2.WeightedPath(
+                as_path=path,
+                sid_list=sid_list,
+                output_interface=response.output_interface,
+                weight=weight
+            ))
+            #come nel caso singolo: niente SRv6 se non ci sono SID intermedi
+            if compressed:
+                segs = sid_list
+            else:
+                segs = sid_list if len(sid_list) > 2 else ()
+            nexthops.append(srv6_routes.nexthop(
+                via=next_hop['neighbor_ip'], dev=response.output_interface, weight=weight, segs=segs
+            ))
+        
+        primary = selected[0][1]
+        response = srv6_path_pb2.PathResponse()
+        response.CopyFrom(primary)
+        if len(selected) > 1:
+            response.path_string = " | ".join(member.path_string for _, member in selected)
+            response.multipath.extend(members)
+        if any(hop['segs'] for hop in nexthops):
+            op = srv6_routes.route(srv6_routes.ROUTE_ADD, primary.destination_network, nexthops, primary.metric)
+            response.install_command = srv6_routes.shell_commands(op)[0]
+        return response
+
+def path_key(source_asn, dest_asn, only_trusted, max_paths, disjoint, version):
+    """Chiave della cache dei path: la versione è sempre l'ultimo elemento"""
+    return (source_asn, dest_asn, bool(only_trusted), max_paths, disjoint, version)
+
+def paths_response(source_asn, dest_asn, results, version=None):
+    if not results:
+        return srv6_path_pb2.MultiplePathsResponse(
+            success=False,
+            error_message=f"No path found between AS{source_asn} and AS{dest_asn}",
+            total_paths=0,
+            destination_asn=dest_asn,
+            topology_version=version_string(version)
         )
+    
+    return srv6_path_pb2.MultiplePathsResponse(
+        success=True,
+        paths=[response for _, response in results],
+        total_paths=len(results),
+        destination_asn=dest_asn,
+        topology_version=version_string(version)
+    )
+
+class PathPrecomputer:
+    """Calcola in background i path di ogni coppia di AS trusted ad ogni cambio di topologia"""
+    def __init__(self, calculator, max_paths=DEFAULT_MAX_PATHS, interval=PRECOMPUTE_INTERVAL):
+        self.calculator = calculator
+        self.max_paths = max_paths
+        self.interval = interval
+        #versione completata e (versione, {(src, dst): (results, MultiplePathsResponse)})
+        self.version = None
+        self.store = (None, {})
+        self.requested = Counter()
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='path-precompute', daemon=True)
+    
+    def start(self):
+        self.thread.start()
+    
+    def stop(self):
+        self.stopped.set()
+        self.wakeup.set()
+    
+    def notify(self, snapshot):
+        if snapshot.version != self.version:
+            self.wakeup.set()
+    
+    def record_request(self, source_asn, dest_asn):
+        with self.lock:
+            self.requested[(source_asn, dest_asn)] += 1
+    
+    def lookup(self, source_asn, dest_asn, only_trusted, max_paths, version):
+        if not only_trusted or max_paths != self.max_paths or version is None:
+            return None
+        store_version, pairs = self.store
+        if store_version != version:
+            return None
+        return pairs.get((source_asn, dest_asn))
+    
+    def ordered_pairs(self, asns):
+        with self.lock:
+            requested = dict(self.requested)
+        pairs = [(source, dest) for source in asns for dest in asns if source != dest]
+        #prima le coppie già richieste, le più richieste in testa
+        pairs.sort(key=lambda pair: -requested.get(pair, 0))
+        return pairs
+    
+    def run(self):
+        while not self.stopped.is_set():
+            snapshot = self.calculator.load_data()
+            if snapshot.version is not None and snapshot.version != self.version:
+                if not self.precompute(snapshot):
+                    continue
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+    
+    def carry_over(self, snapshot):
+        """Coppie della versione precedente ancora valide dopo l'ultimo delta"""
+        store_version, previous = self.store
+        last_delta = self.calculator.last_delta
+        if last_delta is None or last_delta[0] != store_version or last_delta[1] != snapshot.version:
+            return {}
+        stale = last_delta[2]
+        #stessi path, risposta con la nuova versione
+        return {
+            (source_asn, dest_asn): (entry[0], paths_response(source_asn, dest_asn, entry[0], snapshot.version))
+            for (source_asn, dest_asn), entry in previous.items()
+            if not stale((source_asn, dest_asn, True, self.max_paths, srv6_path_pb2.DISJOINT_NONE), entry[0])
+        }
+    
+    def precompute(self, snapshot):
+        started = time.monotonic()
+        pairs = self.carry_over(snapshot)
+        carried = len(pairs)
+        #pubblicato subito: le coppie già pronte sono servibili durante il calcolo
+        self.store = (snapshot.version, pairs)
+        
+        graph = self.calculator.build_graph(True, snapshot)
+        asns = sorted(asn for asn in snapshot.trusted_nodes if asn in graph)
+        
+        for source_asn, dest_asn in self.ordered_pairs(asns):
+            if (source_asn, dest_asn) in pairs:
+                continue
+            if self.stopped.is_set() or self.calculator.snapshot is not snapshot:
+                #topologia cambiata nel frattempo: si riparte dalla nuova versione
+                return False
+            results = self.calculator.compute_paths(source_asn, dest_asn, graph, self.max_paths, snapshot)
+            pairs[(source_asn, dest_asn)] = (results, paths_response(source_asn, dest_asn, results, snapshot.version))
+        
+        self.version = snapshot.version
+        print(f"[Precompute] Topology {snapshot.version}: {len(pairs)} pairs ready "
+              f"({carried} carried over) in {time.monotonic() - started:.2f}s")
+        sys.stdout.flush()
+        return True
+
+class PathWatchHub:
+    """Sottoscrizioni WatchPaths: ricalcola ogni coppia una volta e notifica solo i cambiamenti"""
+    def __init__(self, calculator, interval=PRECOMPUTE_INTERVAL):
+        self.calculator = calculator
+        self.interval = interval
+        self.version = None
+        #(src, dst, only_trusted, max_paths) -> {'subscribers': set di Queue, 'paths': path ordinati}
+        self.watches = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='path-watch', daemon=True)
+    
+    def start(self):
+        self.thread.start()
+    
+    def stop(self):
+        self.stopped.set()
+        self.wakeup.set()
+    
+    def notify(self, snapshot):
+        if snapshot.version != self.version:
+            self.wakeup.set()
+    
+    def evaluate(self, key, snapshot):
+        source_asn, dest_asn, only_trusted, max_paths = key
+        results = self.calculator.get_paths(source_asn, dest_asn, only_trusted, max_paths, snapshot)
+        ranked = tuple(tuple(path) for path, _ in results)
+        return ranked, paths_response(source_asn, dest_asn, results, snapshot.version)
+    
+    def subscribe(self, keys, subscriber):
+        """Registra il subscriber e gli invia subito lo stato attuale di ogni coppia"""
+        snapshot = self.calculator.load_data()
+        for key in keys:
+            with self.lock:
+                watch = self.watches.get(key)
+                if watch is None:
+                    ranked, response = self.evaluate(key, snapshot)
+                    watch = self.watches[key] = {'subscribers': set(), 'paths': ranked, 'response': response}
+                watch['subscribers'].add(subscriber)
+                subscriber.put(watch['response'])
+        self.notify(snapshot)
+    
+    def unsubscribe(self, keys, subscriber):
+        with self.lock:
+            for key in keys:
+                watch = self.watches.get(key)
+                if watch is None:
+                    continue
+                watch['subscribers'].discard(subscriber)
+                if not watch['subscribers']:
+                    del self.watches[key]
+    
+    def run(self):
+        while not self.stopped.is_set():
+            snapshot = self.calculator.load_data()
+            if snapshot.version != self.version:
+                self.refresh(snapshot)
+                self.version = snapshot.version
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+    
+    def refresh(self, snapshot):
+        with self.lock:
+            keys = list(self.watches)
+        
+        changed = 0
+        for key in keys:
+            ranked, response = self.evaluate(key, snapshot)
+            with self.lock:
+                watch = self.watches.get(key)
+                if watch is None or watch['paths'] == ranked:
+                    continue
+                watch['paths'] = ranked
+                watch['response'] = response
+                subscribers = list(watch['subscribers'])
+            changed += 1
+            for subscriber in subscribers:
+                subscriber.put(response)
+        
+        if changed:
+            print(f"[Watch] Topology {snapshot.version}: {changed}/{len(keys)} watched pair(s) changed")
+            sys.stdout.flush()
+
+def watch_keys(request):
+    """Chiavi PathWatchHub di un WatchPathsRequest, una per destinazione"""
+    only_trusted = request.only_trusted or True
+    max_paths = requested_max_paths(request)
+    return [
+        (request.source_asn, dest_asn, only_trusted, max_paths)
+        for dest_asn in dict.fromkeys(request.destination_asns)
+    ]
+
+def requested_max_paths(request, default=DEFAULT_MAX_PATHS):
+    if request.max_paths <= 0:
+        return default
+    return min(request.max_paths, MAX_PATHS_LIMIT)
+
+def requested_path_set(request):
+    """(max_paths, disjoint) di un PathRequest/InstallPathRequest"""
+    if request.disjoint == srv6_path_pb2.DISJOINT_NONE:
+        return requested_max_paths(request), request.disjoint
+    return requested_max_paths(request, DEFAULT_DISJOINT_PATHS), request.disjoint
+
+class StreamSlots:
+    """Posti per gli stream di lunga durata nel server a thread.
+    
+    Uno stream oltre il limite viene rifiutato subito, invece di prendere
+    il thread che servirebbe a RequestPath e InstallPath.
+    """
+    def __init__(self, limit=MAX_STREAMS):
+        self.limit = limit
+        self.active = 0
+        self.lock = threading.Lock()
+    
+    def acquire(self, context):
+        with self.lock:
+            full = self.active >= self.limit
+            if not full:
+                self.active += 1
+        if full:
+            context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED,
+                          f"Too many open streams ({self.limit}), retry later")
+    
+    def release(self):
+        with self.lock:
+            self.active -= 1
 
 class SRv6PathServicer(srv6_path_pb2_grpc.SRv6PathServiceServicer):
-    def __init__(self):
+    def __init__(self, max_streams=MAX_STREAMS):
         self.calculator = SRv6PathCalculator()
+        #solo per gli handler a thread: quelli asyncio non occupano thread
+        self.stream_slots = StreamSlots(max_streams)
+        self.precomputer = PathPrecomputer(self.calculator)
+        self.precomputer.start()
+        self.watch_hub = PathWatchHub(self.calculator)
+        self.watch_hub.start()
+        metrics.REGISTRY.on_collect(self.collect_metrics)
+    
+    def collect_metrics(self):
+        for stat, value in self.calculator.path_cache.stats().items():
+            SERVICE_STATE.set(value, stat=f'path_cache_{stat}')
+        SERVICE_STATE.set(len(self.precomputer.store[1]), stat='precomputed_pairs')
+        with self.watch_hub.lock:
+            watches = list(self.watch_hub.watches.values())
+        SERVICE_STATE.set(len(watches), stat='watched_pairs')
+        SERVICE_STATE.set(sum(len(watch['subscribers']) for watch in watches), stat='watch_subscriptions')
+        SERVICE_STATE.set(len(self.calculator.agents.connected()), stat='agents_connected')
+        SERVICE_STATE.set(self.stream_slots.active, stat='threaded_streams')
+    
+    def lookup_paths(self, source_asn, dest_asn, only_trusted, max_paths, disjoint=srv6_path_pb2.DISJOINT_NONE):
+        """Path precalcolati se pronti, altrimenti calcolo (o cache) on demand"""
+        snapshot = self.calculator.load_data()
+        self.precomputer.notify(snapshot)
+        
+        if disjoint == srv6_path_pb2.DISJOINT_NONE:
+            entry = self.precomputer.lookup(source_asn, dest_asn, only_trusted, max_paths, snapshot.version)
+            if entry is not None:
+                print("Precomputed paths")
+                self.calculator.remember_paths(
+                    path_key(source_asn, dest_asn, only_trusted, max_paths, disjoint, snapshot.version), entry[0]
+                )
+                return snapshot, entry[0], entry[1]
+        
+        results = self.calculator.get_paths(source_asn, dest_asn, only_trusted, max_paths, snapshot, disjoint)
+        print(f"Path cache: {self.calculator.path_cache}")
+        return snapshot, results, None
+    
+    def requested_paths(self, request):
+        """(snapshot attuale, lista di path su cui il client ha scelto gli indici).
+        
+        La lista è quella della versione indicata dal client, se ancora valida
+        (in cache o precalcolata); None se la topologia è cambiata nel frattempo.
+        """
+        snapshot = self.calculator.load_data()
+        source_asn, dest_asn = request.source_asn, request.destination_asn
+        only_trusted = request.only_trusted or True
+        max_paths, disjoint = requested_path_set(request)
+        if snapshot.version is None:
+            #database senza contatore di generazione: nessuna versione da confrontare
+            return snapshot, self.calculator.get_paths(source_asn, dest_asn, only_trusted, max_paths, snapshot, disjoint)
+        
+        version = parse_version(request.topology_version) if request.topology_version else None
+        if version is None:
+            return snapshot, None
+        if version == snapshot.version and disjoint == srv6_path_pb2.DISJOINT_NONE:
+            entry = self.precomputer.lookup(source_asn, dest_asn, only_trusted, max_paths, version)
+            if entry is not None:
+                return snapshot, entry[0]
+        return snapshot, self.calculator.path_cache.get(
+            path_key(source_asn, dest_asn, only_trusted, max_paths, disjoint, version)
+        )
     
+    @metrics.rpc
     def RequestPath(self, request, context):
-        print(f"\n[RequestPath] AS{request.source_asn} → AS{request.destination_asn}")
+        max_paths, disjoint = requested_path_set(request)
+        mode = f" ({srv6_path_pb2.DisjointMode.Name(disjoint)})" if disjoint else ""
+        print(f"\n[RequestPath] AS{request.source_asn} → AS{request.destination_asn}{mode}")
         
-        self.calculator.load_data()
-        graph = self.calculator.build_graph(request.only_trusted or True)
-        paths = self.calculator.find_all_paths(graph, request.source_asn, request.destination_asn)
+        self.precomputer.record_request(request.source_asn, request.destination_asn)
+        snapshot, results, response = self.lookup_paths(
+            request.source_asn, request.destination_asn,
+            request.only_trusted or True, max_paths, disjoint
+        )
         
-        if not paths:
+        if not results:
             print("No path found")
-            return srv6_path_pb2.MultiplePathsResponse(
-                success=False,
-                error_message=f"No path found between AS{request.source_asn} and AS{request.destination_asn}",
-                total_paths=0
-            )
+            return response or paths_response(request.source_asn, request.destination_asn, results, snapshot.version)
         
-        print(f"Found {len(paths)} secure path(s)")
-        for i, path in enumerate(paths, 1):
+        print(f"Found {len(results)} {'disjoint' if disjoint else 'secure'} path(s)")
+        for i, (path, _) in enumerate(results, 1):
             print(f"  {i}. {' → '.join(f'AS{asn}' for asn in path)} ({len(path)-1} hops)")
         
-        path_responses = [
-            self.calculator.build_path_response(path, request.source_asn, request.destination_asn)
-            for path in paths
-        ]
-        path_responses = [pr for pr in path_responses if pr]
+        return response or paths_response(request.source_asn, request.destination_asn, results, snapshot.version)
+    
+    @metrics.rpc
+    def RequestPaths(self, request, context):
+        """Una sorgente, più destinazioni: una risposta in streaming per destinazione"""
+        source_asn = request.source_asn
+        only_trusted = request.only_trusted or True
+        max_paths = requested_max_paths(request)
         
-        return srv6_path_pb2.MultiplePathsResponse(
-            success=True,
-            paths=path_responses,
-            total_paths=len(path_responses)
-        )
+        snapshot = self.calculator.load_data()
+        self.precomputer.notify(snapshot)
+        
+        dest_asns = list(dict.fromkeys(request.destination_asns))
+        if request.all_trusted or not dest_asns:
+            dest_asns = sorted(asn for asn in snapshot.trusted_nodes if asn != source_asn)
+        print(f"\n[RequestPaths] AS{source_asn} → {len(dest_asns)} destination(s)")
+        
+        missing = []
+        for dest_asn in dest_asns:
+            self.precomputer.record_request(source_asn, dest_asn)
+            entry = self.precomputer.lookup(source_asn, dest_asn, only_trusted, max_paths, snapshot.version)
+            if entry is not None:
+                self.calculator.remember_paths(
+                    path_key(source_asn, dest_asn, only_trusted, max_paths, srv6_path_pb2.DISJOINT_NONE,
+                             snapshot.version), entry[0]
+                )
+                yield entry[1]
+            else:
+                missing.append(dest_asn)
+        
+        found = len(dest_asns) - len(missing)
+        for dest_asn, results in self.calculator.get_paths_many(
+            source_asn, missing, only_trusted, max_paths, snapshot
+        ):
+            if not context.is_active():
+                return
+            yield paths_response(source_asn, dest_asn, results, snapshot.version)
+        
+        print(f"Precomputed: {found}, computed: {len(missing)}")
+        print(f"Path cache: {self.calculator.path_cache}")
+        sys.stdout.flush()
     
+    def WatchPaths(self, request, context):
+        """Stream di MultiplePathsResponse: stato iniziale, poi solo quando i path cambiano"""
+        keys = watch_keys(request)
+        if not keys:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "No destination to watch")
+        
+        print(f"\n[WatchPaths] AS{request.source_asn} → "
+              f"{', '.join(f'AS{key[1]}' for key in keys)}")
+        sys.stdout.flush()
+        
+        self.stream_slots.acquire(context)
+        updates = queue.Queue()
+        self.watch_hub.subscribe(keys, updates)
+        try:
+            while context.is_active():
+                try:
+                    yield updates.get(timeout=1)
+                except queue.Empty:
+                    continue
+        finally:
+            self.watch_hub.unsubscribe(keys, updates)
+            self.stream_slots.release()
+            print(f"\n[WatchPaths] AS{request.source_asn} unsubscribed")
+            sys.stdout.flush()
+    
+    @metrics.rpc
     def InstallPath(self, request, context):
         print(f"\n[InstallPath] AS{request.source_asn} → AS{request.destination_asn} (index: {request.path_index})")
         
-        self.calculator.load_data()
-        graph = self.calculator.build_graph(request.only_trusted or True)
-        paths = self.calculator.find_all_paths(graph, request.source_asn, request.destination_asn)
+        #stessa lista vista dal client in RequestPath (per versione di topologia)
+        snapshot, results = self.requested_paths(request)
+        if results is None:
+            print(f"Path list of topology '{request.topology_version}' no longer valid")
+            return srv6_path_pb2.PathResponse(success=False, error_message="Topology changed, request paths again")
+        
+        indexes = list(dict.fromkeys(request.path_indexes)) or [request.path_index]
+        weights = list(request.weights) or [1] * len(indexes)
+        error = None
+        if any(not 0 <= index < len(results) for index in indexes):
+            error = f"Invalid path index {', '.join(str(index) for index in indexes)}"
+        elif len(weights) != len(indexes):
+            error = f"{len(weights)} weight(s) for {len(indexes)} path(s)"
+        elif any(not 1 <= weight <= MAX_NEXTHOP_WEIGHT for weight in weights):
+            error = f"Weights must be between 1 and {MAX_NEXTHOP_WEIGHT}"
+        if error:
+            return srv6_path_pb2.PathResponse(success=False, error_message=error)
         
-        if not paths or request.path_index >= len(paths):
+        selected = [results[index] for index in indexes]
+        paths = [path for path, _ in selected]
+        if request.compressed_sids and any(
+            len(path) > 2 and not response.compressed_sid_list for path, response in selected
+        ):
             return srv6_path_pb2.PathResponse(
                 success=False,
-                error_message=f"Invalid path index {request.path_index}"
+                error_message="Compressed SIDs not available: locator format unknown for a transit node"
             )
-        
-        path = paths[request.path_index]
-        print(f"Installing: {' → '.join(f'AS{asn}' for asn in path)}")
+        #la route del source prima dei transiti: se manca un nexthop non si programma nulla
+        if len(selected) > 1 or request.compressed_sids:
+            response = self.calculator.build_install_response(selected, weights, request.compressed_sids, snapshot)
+            if not response.success:
+                return response
+        else:
+            response = srv6_path_pb2.PathResponse()
+            response.CopyFrom(selected[0][1])
+        for path, weight in zip(paths, weights):
+            print(f"Installing: {' → '.join(f'AS{asn}' for asn in path)}"
+                  + (f" (weight {weight})" if len(paths) > 1 else ""))
         
         #installa commandi per i nodi di transito
-        transit_commands = self.calculator.generate_transit_commands(path)
-        if transit_commands:
-            print("\nInstalling route - removing conflicts...")
-            for asn, commands in transit_commands.items():
-                hostname = self.calculator.trusted_nodes[asn]['hostname']
-                print(f"  AS{asn} ({hostname}):")
-                for cmd in commands:
-                    success, msg = self.calculator.install_command_on_node(asn, cmd)
-                    status = "✓" if success else "✗"
-                    print(cmd)
-                    if success: 
-                        print(f"    {status} Transit node ready")
-                    if not success:
-                        print(f"      Error: {msg}")
-        
-        response = self.calculator.build_path_response(path, request.source_asn, request.destination_asn)
+        transit_routes = self.calculator.generate_multipath_transit_routes(paths, weights, snapshot)
+        if request.compressed_sids:
+            for asn, ops in self.calculator.generate_usid_routes(paths, snapshot).items():
+                transit_routes.setdefault(asn, []).extend(ops)
+        summary = []
+        if transit_routes:
+            print("\nInstalling route - only changes against the ledger...")
+            plan, summary = self.calculator.program_transit_routes(transit_routes, snapshot, request.audit_fib)
+            for node in summary:
+                print(f"  AS{node['asn']} ({node['hostname']}) via {node['channel']}:")
+                for op in plan.get(node['asn'], []):
+                    for cmd in srv6_routes.shell_commands(op):
+                        print(cmd)
+                if node['channel'] == 'ledger':
+                    print("    ✓ Already installed")
+                elif node['success']:
+                    print("    ✓ Transit node ready")
+                else:
+                    print(f"      Error: {node['message']}")
+        
+        response.transit_commands = json.dumps(summary)
         print("\nPath ready for source installation")
         return response
     
+    def agent_node(self, first, context):
+        """(asn, nodo trusted) dell'agent che apre RouteChannel, dal messaggio hello e dal certificato"""
+        if first is None or first.WhichOneof('message') != 'hello':
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "First message must be a hello")
+        
+        asn = first.hello.asn
+        node = self.calculator.load_data().trusted_nodes.get(asn)
+        #identità dal certificato client (porta agent, TLS mutuo): CN = hostname del nodo
+        common_names = context.auth_context().get('x509_common_name', [])
+        identity = common_names[0].decode() if common_names else None
+        if node is None or identity != node['hostname']:
+            print(f"\n[RouteChannel] Rejected agent AS{asn} (certificate: {identity})")
+            context.abort(grpc.StatusCode.PERMISSION_DENIED, f"AS{asn} is not a trusted node for this certificate")
+        return asn, node
+    
+    def RouteChannel(self, request_iterator, context):
+        """Stream bidirezionale con l'agent di un nodo: batch di route in uscita, esiti in entrata"""
+        asn, node = self.agent_node(next(request_iterator, None), context)
+        self.stream_slots.acquire(context)
+        try:
+            session = self.calculator.agents.connect(asn, node['hostname'])
+        except Exception:
+            self.stream_slots.release()
+            raise
+        print(f"\n[RouteChannel] Agent AS{asn} ({node['hostname']}) connected")
+        sys.stdout.flush()
+        
+        def read_results():
+            try:
+                for message in request_iterator:
+                    if message.WhichOneof('message') == 'result':
+                        session.complete(message.result)
+            except grpc.RpcError:
+                pass
+            finally:
+                session.close()
+        
+        threading.Thread(target=read_results, name=f"agent-{asn}", daemon=True).start()
+        context.add_callback(session.close)
+        
+        try:
+            yield from session.batches()
+        finally:
+            self.calculator.agents.disconnect(session)
+            self.stream_slots.release()
+            print(f"\n[RouteChannel] Agent AS{asn} disconnected")
+            sys.stdout.flush()
+    
+    @metrics.rpc
     def ConfirmInstallation(self, request, context):
         status = "✓ installed" if request.installed else "✗ failed"
         print(f"\n[Confirm] AS{request.source_asn} → AS{request.destination_asn}: {status}")
@@ -295,31 +1258,158 @@ class SRv6PathServicer(srv6_path_pb2_grpc.SRv6PathServiceServicer):
         
         return srv6_path_pb2.InstallResponse(success=True, message="Confirmation received")
 
-def serve():
+class AsyncSRv6PathServicer(srv6_path_pb2_grpc.SRv6PathServiceServicer):
+    """Handler grpc.aio sopra SRv6PathServicer.
+
+    Calcolo dei path e installazione girano in due executor limitati (un
+    InstallPath lento non blocca le RequestPath); WatchPaths e RouteChannel
+    restano aperti sul loop senza occupare thread.
+    """
+    def __init__(self, servicer, compute, install):
+        self.servicer = servicer
+        self.compute = compute
+        self.install = install
+    
+    async def RequestPath(self, request, context):
+        return await self.compute.call(context, self.servicer.RequestPath, request, ContextProxy(context))
+    
+    async def RequestPaths(self, request, context):
+        responses = self.servicer.RequestPaths(request, ContextProxy(context))
+        async for response in self.compute.stream(context, responses):
+            yield response
+    
+    async def WatchPaths(self, request, context):
+        keys = watch_keys(request)
+        if not keys:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "No destination to watch")
+        
+        print(f"\n[WatchPaths] AS{request.source_asn} → "
+              f"{', '.join(f'AS{key[1]}' for key in keys)}")
+        sys.stdout.flush()
+        
+        updates = LoopQueue()
+        watch_hub = self.servicer.watch_hub
+        await self.compute.call(context, watch_hub.subscribe, keys, updates)
+        try:
+            while True:
+                yield await updates.get()
+        finally:
+            watch_hub.unsubscribe(keys, updates)
+            print(f"\n[WatchPaths] AS{request.source_asn} unsubscribed")
+            sys.stdout.flush()
+    
+    async def InstallPath(self, request, context):
+        return await self.install.call(context, self.servicer.InstallPath, request, ContextProxy(context))
+    
+    async def RouteChannel(self, request_iterator, context):
+        first = None
+        async for message in request_iterator:
+            first = message
+            break
+        asn, node = await self.compute.call(context, self.servicer.agent_node, first, ContextProxy(context))
+        
+        agents = self.servicer.calculator.agents
+        outgoing = LoopQueue()
+        #connect azzera il registro delle route del nodo (sqlite): fuori dal loop
+        session = await self.compute.call(context, agents.connect, asn, node['hostname'], outgoing)
+        print(f"\n[RouteChannel] Agent AS{asn} ({node['hostname']}) connected")
+        sys.stdout.flush()
+        
+        async def read_results():
+            try:
+                async for message in request_iterator:
+                    if message.WhichOneof('message') == 'result':
+                        session.complete(message.result)
+            except grpc.RpcError:
+                pass
+            finally:
+                session.close()
+        
+        reader = asyncio.create_task(read_results())
+        try:
+            while True:
+                batch = await outgoing.get()
+                if batch is None:
+                    return
+                yield batch
+        finally:
+            reader.cancel()
+            agents.disconnect(session)
+            print(f"\n[RouteChannel] Agent AS{asn} disconnected")
+            sys.stdout.flush()
+    
+    async def ConfirmInstallation(self, request, context):
+        return self.servicer.ConfirmInstallation(request, context)
+
+def server_credentials():
+    """(credenziali porta client, credenziali porta agent con TLS mutuo)"""
     with open(SERVER_CERT, "rb") as f:
         server_cert = f.read()
     with open(SERVER_KEY, "rb") as f:
         server_key = f.read()
+    with open(CA_CERT, "rb") as f:
+        ca_cert = f.read()
+    return (
+        grpc.ssl_server_credentials([(server_key, server_cert)]),
+        grpc.ssl_server_credentials(
+            [(server_key, server_cert)], root_certificates=ca_cert, require_client_auth=True
+        )
+    )
+
+def stop_servicer(servicer):
+    servicer.precomputer.stop()
+    servicer.watch_hub.stop()
+    servicer.calculator.ssh_pool.close_all()
+
+async def serve_aio(blocking_workers=BLOCKING_WORKERS, install_workers=INSTALL_WORKERS):
+    client_creds, agent_creds = server_credentials()
+    servicer = SRv6PathServicer()
+    compute = BlockingExecutor(blocking_workers, 'path-compute')
+    install = BlockingExecutor(install_workers, 'path-install')
     
-    server = grpc.server(
-        futures.ThreadPoolExecutor(max_workers=20),
-        options=[
-            ('grpc.max_send_message_length', 50 * 1024 * 1024),
-            ('grpc.max_receive_message_length', 50 * 1024 * 1024),
-            ('grpc.keepalive_time_ms', 30000),
-            ('grpc.keepalive_timeout_ms', 10000),
-            ('grpc.keepalive_permit_without_calls', True),
-        ]
+    server = grpc.aio.server(options=SERVER_OPTIONS)
+    srv6_path_pb2_grpc.add_SRv6PathServiceServicer_to_server(
+        AsyncSRv6PathServicer(servicer, compute, install), server
     )
+    server.add_secure_port('[::]:50053', client_creds)
+    server.add_secure_port(f'[::]:{AGENT_PORT}', agent_creds)
+    await server.start()
+    
+    print("=" * 60)
+    print("PHASE 3 - CALCULATE THE SECURE PATH (asyncio)")
+    print("=" * 60)
+    print("Controller on port 50053")
+    print(f"Route agents on port {AGENT_PORT}")
+    print(f"Workers: {blocking_workers} compute, {install_workers} install")
+    print("Waiting for nodes...")
+    print("=" * 60)
+    sys.stdout.flush()
+    
+    try:
+        await server.wait_for_termination()
+    finally:
+        stop_servicer(servicer)
+        await server.stop(0)
+        compute.shutdown()
+        install.shutdown()
+
+def serve(workers=SERVER_WORKERS, max_streams=MAX_STREAMS):
+    client_creds, agent_creds = server_credentials()
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=workers + max_streams), options=SERVER_OPTIONS)
     
-    srv6_path_pb2_grpc.add_SRv6PathServiceServicer_to_server(SRv6PathServicer(), server)
-    server.add_secure_port('[::]:50053', grpc.ssl_server_credentials([(server_key, server_cert)]))
+    servicer = SRv6PathServicer(max_streams)
+    srv6_path_pb2_grpc.add_SRv6PathServiceServicer_to_server(servicer, server)
+    server.add_secure_port('[::]:50053', client_creds)
+    #porta degli agent: TLS mutuo con i certificati dei nodi
+    server.add_secure_port(f'[::]:{AGENT_PORT}', agent_creds)
     server.start()
     
     print("=" * 60)
     print("PHASE 3 - CALCULATE THE SECURE PATH")
     print("=" * 60)
     print("Controller on port 50053")
+    print(f"Route agents on port {AGENT_PORT}")
+    print(f"Threads: {workers} for requests, up to {max_streams} agent/watch streams")
     print("Waiting for nodes...")
     print("=" * 60)
     sys.stdout.flush()
@@ -328,7 +1418,34 @@ def serve():
         server.wait_for_termination()
     except KeyboardInterrupt:
         print("\nController closing...")
+        stop_servicer(servicer)
         server.stop(0)
 
+def main():
+    parser = argparse.ArgumentParser(description='SRv6 secure path server')
+    parser.add_argument('--aio', action='store_true', help='Serve with grpc.aio (coroutine handlers)')
+    parser.add_argument('--blocking-workers', type=int, default=BLOCKING_WORKERS,
+                        help='Threads for path computation in --aio mode')
+    parser.add_argument('--install-workers', type=int, default=INSTALL_WORKERS,
+                        help='Concurrent InstallPath calls in --aio mode')
+    parser.add_argument('--workers', type=int, default=SERVER_WORKERS,
+                        help='gRPC threads for short RPCs (threaded mode)')
+    parser.add_argument('--max-streams', type=int, default=MAX_STREAMS,
+                        help='Agent and WatchPaths streams, one thread each; more are rejected (threaded mode)')
+    parser.add_argument('--metrics-port', type=int, default=0,
+                        help='Serve Prometheus metrics on 127.0.0.1:PORT (0: disabled)')
+    args = parser.parse_args()
+    
+    if args.metrics_port:
+        metrics.start_http_server(args.metrics_port)
+    
+    if not args.aio:
+        serve(args.workers, args.max_streams)
+        return
+    try:
+        asyncio.run(serve_aio(args.blocking_workers, args.install_workers))
+    except KeyboardInterrupt:
+        print("\nController closing...")
+
 if __name__ == "__main__":
-    serve()
+    main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""Agent sul nodo AS: riceve dal controller le operazioni sulle route e le applica a batch"""
+
+import grpc
+import subprocess
+import sys
+import os
+import socket
+import ipaddress
+import argparse
+import queue
+import time
+import traceback
+
+sys.path.append('/shared')
+import srv6_path_pb2
+import srv6_path_pb2_grpc
+import srv6_routes
+
+AGENT_PORT = 50054
+CERT_DIR = '/shared/certs'
+CA_CERT = os.path.join(CERT_DIR, "ca.crt")
+RETRY_INTERVAL = 5
+
+class IpBatchApplier:
+    """Applica un batch con un solo processo 'ip -6 -force -batch -'"""
+    def apply(self, operations):
+        lines = [line for op in operations for line in srv6_routes.batch_lines(op)]
+        if not lines:
+            return True, "OK"
+        try:
+            result = subprocess.run(
+                ['ip', '-6', '-force', '-batch', '-'],
+                input="\n".join(lines) + "\n",
+                capture_output=True,
+                text=True,
+                timeout=10
+            )
+        except subprocess.TimeoutExpired:
+            return False, "Timeout"
+
+        if result.returncode == 0:
+            return True, "OK"
+        return False, result.stderr.strip() or result.stdout.strip()
+
+class RecordingApplier:
+    """Sostituto per i test: registra le operazioni senza toccare il kernel"""
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def apply(self, operations):
+        self.batches.append(list(operations))
+        for op in operations:
+            for line in srv6_routes.batch_lines(op):
+                print(f"  [dry-run] ip -6 {line}")
+        if self.fail:
+            return False, "Recording applier set to fail"
+        return True, "OK"
+
+    @property
+    def operations(self):
+        return [op for batch in self.batches for op in batch]
+
+def get_asn_from_frr():
+    try:
+        result = subprocess.run(
+            ['vtysh', '-c', 'show running-config'],
+            capture_output=True, text=True, timeout=5
+        )
+        for line in result.stdout.split('\n'):
+            if line.strip().startswith('router bgp'):
+                parts = line.split()
+                if len(parts) >= 3 and parts[2].isdigit():
+                    return int(parts[2])
+    except Exception as e:
+        print(f"Error getting ASN: {e}")
+    return None
+
+def get_lan_address(interface):
+    try:
+        cmd = ["ip", "-4", "-o", "addr", "show", "dev", interface]
+        out = subprocess.check_output(cmd, text=True, encoding='utf-8', errors='ignore').strip()
+        return out.split()[3]
+    except Exception:
+        return None
+
+def find_controller(port=AGENT_PORT):
+    try:
+        result = subprocess.run(["ip", "-o", "link", "show"], capture_output=True, text=True)
+        interfaces = [line.split(':')[1].strip() for line in result.stdout.split('\n')
+                      if 'eth' in line and 'state UP' in line]
+
+        for iface in interfaces:
+            addr = get_lan_address(iface)
+            if not addr:
+                continue
+
+            network = ipaddress.ip_interface(addr).network
+            my_ip = addr.split('/')[0]
+
+            for host in network.hosts():
+                ip = str(host)
+                if ip == my_ip:
+                    continue
+                try:
+                    with socket.create_connection((ip, port), timeout=0.5):
+                        return ip
+                except OSError:
+                    continue
+    except Exception as e:
+        print(f"Error finding controller: {e}")
+    return None
+
+def agent_credentials(hostname):
+    with open(CA_CERT, 'rb') as f:
+        ca_cert = f.read()
+    #certificato del nodo (CN = hostname): il controller lo usa per identificare l'agent
+    with open(os.path.join(CERT_DIR, f"{hostname}.key"), 'rb') as f:
+        key = f.read()
+    with open(os.path.join(CERT_DIR, f"{hostname}.crt"), 'rb') as f:
+        cert = f.read()
+    return grpc.ssl_channel_credentials(root_certificates=ca_cert, private_key=key, certificate_chain=cert)
+
+class RouteAgent:
+    def __init__(self, asn, hostname, applier):
+        self.asn = asn
+        self.hostname = hostname
+        self.applier = applier
+
+    def messages(self, results):
+        """Stream verso il controller: hello, poi un esito per ogni batch"""
+        yield srv6_path_pb2.AgentMessage(
+            hello=srv6_path_pb2.AgentHello(asn=self.asn, hostname=self.hostname)
+        )
+        while True:
+            result = results.get()
+            if result is None:
+                return
+            yield srv6_path_pb2.AgentMessage(result=result)
+
+    def handle(self, batch):
+        operations = [srv6_routes.from_proto(op) for op in batch.operations]
+        print(f"[Batch {batch.batch_id}] {len(operations)} operation(s)")
+        success, message = self.applier.apply(operations)
+        print(f"  {'✓' if success else '✗'} {message}")
+        sys.stdout.flush()
+        return srv6_path_pb2.BatchResult(
+            batch_id=batch.batch_id,
+            success=success,
+            error_message="" if success else message,
+            applied=len(operations) if success else 0
+        )
+
+    def run_stream(self, channel):
+        stub = srv6_path_pb2_grpc.SRv6PathServiceStub(channel)
+        results = queue.Queue()
+        try:
+            for batch in stub.RouteChannel(self.messages(results)):
+                results.put(self.handle(batch))
+        finally:
+            results.put(None)
+
+def wait_for_asn():
+    """ASN da FRR: all'avvio del nodo bgpd/vtysh possono non rispondere ancora"""
+    while True:
+        asn = get_asn_from_frr()
+        if asn:
+            return asn
+        print(f"ASN not found (FRR not ready?), new attempt in {RETRY_INTERVAL} seconds...")
+        sys.stdout.flush()
+        time.sleep(RETRY_INTERVAL)
+
+def run_agent(args):
+    asn = args.asn or wait_for_asn()
+    hostname = socket.gethostname()
+
+    applier = RecordingApplier() if args.dry_run else IpBatchApplier()
+    agent = RouteAgent(asn, hostname, applier)
+
+    print("=" * 60)
+    print("SRv6 ROUTE AGENT")
+    print("=" * 60)
+    print(f"AS Number: {asn}")
+    print(f"Hostname: {hostname}")
+    print("=" * 60)
+    sys.stdout.flush()
+
+    while True:
+        controller_ip = args.controller or find_controller(args.port)
+        if not controller_ip:
+            print(f"Controller not found, new attempt in {RETRY_INTERVAL} seconds...")
+            sys.stdout.flush()
+            time.sleep(RETRY_INTERVAL)
+            continue
+
+        try:
+            channel = grpc.secure_channel(
+                f"{controller_ip}:{args.port}",
+                agent_credentials(hostname),
+                options=[
+                    ('grpc.ssl_target_name_override', 'ctrl'),
+                    ('grpc.keepalive_time_ms', 30000),
+                    ('grpc.keepalive_timeout_ms', 10000),
+                    ('grpc.keepalive_permit_without_calls', True),
+                ]
+            )
+            print(f"Connected to controller {controller_ip}:{args.port}")
+            sys.stdout.flush()
+            agent.run_stream(channel)
+            channel.close()
+        except grpc.RpcError as e:
+            print(f"Stream closed: {e.code()}: {e.details()}")
+        except Exception as e:
+            print(f"Error: {e}")
+
+        sys.stdout.flush()
+        time.sleep(RETRY_INTERVAL)
+
+def main():
+    parser = argparse.ArgumentParser(description='SRv6 route programming agent')
+    parser.add_argument('--controller', help='Controller address (default: discover on local links)')
+    parser.add_argument('--port', type=int, default=AGENT_PORT)
+    parser.add_argument('--asn', type=int, help='Local ASN (default: read from FRR)')
+    parser.add_argument('--dry-run', action='store_true', help='Record operations instead of applying them')
+    args = parser.parse_args()
+    run_agent(args)
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nAgent closing...")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\nError: {e}")
+        traceback.print_exc()
+        sys.exit(1)
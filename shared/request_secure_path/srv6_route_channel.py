@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Lato controller del canale RouteChannel verso gli agent sui nodi"""
+
+import itertools
+import queue
+import threading
+import time
+from concurrent import futures
+
+import srv6_path_pb2
+import srv6_routes
+
+AGENT_PUSH_TIMEOUT = 10
+
+class AgentSession:
+    """Stream aperto da un agent: batch in uscita e conferme in attesa"""
+    def __init__(self, asn, hostname, batch_ids, outgoing=None):
+        self.asn = asn
+        self.hostname = hostname
+        self.batch_ids = batch_ids
+        #basta un oggetto con put(): il server asyncio passa una coda letta dal loop
+        self.outgoing = outgoing if outgoing is not None else queue.Queue()
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def submit(self, operations):
+        """Accoda un batch e restituisce un Future con (success, message)"""
+        future = futures.Future()
+        with self.lock:
+            if self.closed:
+                future.set_result((False, "Agent disconnected"))
+                return future
+            batch_id = next(self.batch_ids)
+            self.pending[batch_id] = future
+
+        self.outgoing.put(srv6_path_pb2.RouteBatch(
+            batch_id=batch_id,
+            operations=[srv6_routes.to_proto(op) for op in operations]
+        ))
+        return future
+
+    def complete(self, result):
+        with self.lock:
+            future = self.pending.pop(result.batch_id, None)
+        if future is not None:
+            future.set_result((result.success, result.error_message or "OK"))
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            pending, self.pending = self.pending, {}
+        for future in pending.values():
+            future.set_result((False, "Agent disconnected"))
+        self.outgoing.put(None)
+
+    def batches(self):
+        while True:
+            batch = self.outgoing.get()
+            if batch is None:
+                return
+            yield batch
+
+class AgentRegistry:
+    def __init__(self, on_connect=None):
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.batch_ids = itertools.count(1)
+        #chiamata con l'ASN a ogni connessione (agent appena avviato: FIB del nodo sconosciuta)
+        self.on_connect = on_connect
+
+    def connect(self, asn, hostname, outgoing=None):
+        if self.on_connect:
+            self.on_connect(asn)
+        session = AgentSession(asn, hostname, self.batch_ids, outgoing)
+        with self.lock:
+            previous = self.sessions.get(asn)
+            self.sessions[asn] = session
+        #un solo stream per nodo: quello nuovo sostituisce il vecchio
+        if previous is not None:
+            previous.close()
+        return session
+
+    def disconnect(self, session):
+        with self.lock:
+            if self.sessions.get(session.asn) is session:
+                del self.sessions[session.asn]
+        session.close()
+
+    def get(self, asn):
+        with self.lock:
+            return self.sessions.get(asn)
+
+    def connected(self):
+        with self.lock:
+            return sorted(self.sessions)
+
+    def push(self, routes_by_asn, timeout=AGENT_PUSH_TIMEOUT):
+        """Invia i batch a tutti gli agent insieme e attende le conferme: un solo round trip"""
+        jobs = {}
+        for asn, operations in routes_by_asn.items():
+            session = self.get(asn)
+            if session is None:
+                jobs[asn] = None
+            else:
+                jobs[asn] = session.submit(operations)
+
+        deadline = time.monotonic() + timeout
+        results = {}
+        for asn, job in jobs.items():
+            if job is None:
+                results[asn] = (False, "Agent not connected")
+                continue
+            try:
+                results[asn] = job.result(timeout=max(0, deadline - time.monotonic()))
+            except futures.TimeoutError:
+                results[asn] = (False, "Timeout")
+        return results
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""Registro delle route di transito installate dal controller: si programmano solo le differenze"""
+
+import ipaddress
+import json
+import sqlite3
+import threading
+
+import srv6_routes
+
+DB_ROUTES = '/shared/installed_routes.db'
+
+def route_key(op):
+    """Forma canonica di una route (azione esclusa), confrontabile con il registro"""
+    return json.dumps(
+        {'destination': op['destination'], 'nexthops': op['nexthops'], 'metric': op['metric']},
+        sort_keys=True
+    )
+
+def plan_routes(desired, installed):
+    """Operazioni minime per portare un nodo allo stato desiderato.
+
+    `installed` è destinazione -> route_key del registro. Route identica: niente;
+    diversa: replace; destinazione mai programmata: delete (possono esserci route
+    sconosciute) e poi replace. Le delete richieste passano sempre.
+    """
+    ops = []
+    for op in desired:
+        destination = op['destination']
+        if op['action'] == srv6_routes.ROUTE_DELETE:
+            ops.append(op)
+            continue
+        current = installed.get(destination)
+        if current == route_key(op):
+            continue
+        if current is None:
+            ops.append(srv6_routes.route(srv6_routes.ROUTE_DELETE, destination))
+        ops.append(dict(op, action=srv6_routes.ROUTE_REPLACE))
+    return ops
+
+def normalize_prefix(prefix):
+    try:
+        return str(ipaddress.IPv6Network(prefix, strict=False))
+    except ValueError:
+        return prefix
+
+def fib_nexthops(route):
+    """Nexthop di una route di 'ip -j -6 route show' come (via, dev, peso)"""
+    hops = route.get('nexthops')
+    if not hops:
+        return [(route.get('gateway', ''), route.get('dev', ''), 1)]
+    return sorted((hop.get('gateway', ''), hop.get('dev', ''), hop.get('weight', 1)) for hop in hops)
+
+def ledger_nexthops(op):
+    hops = op['nexthops']
+    if len(hops) == 1:
+        #con un solo nexthop il kernel non mostra il peso
+        return [(hops[0]['via'], hops[0]['dev'], 1)]
+    return sorted((hop['via'], hop['dev'], hop['weight'] or 1) for hop in hops)
+
+def audit_routes(installed, fib):
+    """Destinazioni del registro che la FIB del nodo non ha (o ha diverse)"""
+    routes = {}
+    for route in fib:
+        routes.setdefault(normalize_prefix(route.get('dst', '')), []).append(route)
+
+    mismatched = []
+    for destination, key in installed.items():
+        op = json.loads(key)
+        found = routes.get(normalize_prefix(destination), [])
+        if not any(
+            route.get('metric', 0) == op['metric'] and fib_nexthops(route) == ledger_nexthops(op)
+            for route in found
+        ):
+            mismatched.append(destination)
+    return mismatched
+
+class RouteLedger:
+    """Route installate per (nodo, destinazione): in memoria, persistite su sqlite"""
+    def __init__(self, db_path=DB_ROUTES):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        #asn -> {destinazione: route_key}
+        self.routes = {}
+        self.init_database()
+        self.load()
+
+    def init_database(self):
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS installed_routes (
+                        asn INTEGER NOT NULL,
+                        destination TEXT NOT NULL,
+                        route TEXT NOT NULL,
+                        installed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (asn, destination)
+                    )
+                ''')
+        except sqlite3.Error as e:
+            print(f"Route ledger not persisted ({self.db_path}): {e}")
+
+    def load(self):
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                rows = conn.execute('SELECT asn, destination, route FROM installed_routes').fetchall()
+        except sqlite3.Error:
+            return
+        with self.lock:
+            for asn, destination, key in rows:
+                self.routes.setdefault(asn, {})[destination] = key
+
+    def installed(self, asn):
+        with self.lock:
+            return dict(self.routes.get(asn, {}))
+
+    def plan(self, routes_by_asn):
+        """asn -> operazioni da eseguire; i nodi già allineati non compaiono.
+        
+        Una destinazione programmata su nodi che il nuovo path non attraversa più
+        viene cancellata da quei nodi (anche se non compaiono in routes_by_asn).
+        """
+        plan = {}
+        for asn, desired in routes_by_asn.items():
+            ops = plan_routes(desired, self.installed(asn))
+            if ops:
+                plan[asn] = ops
+        for asn, ops in self.stale_routes(routes_by_asn).items():
+            plan.setdefault(asn, []).extend(ops)
+        return plan
+
+    def stale_routes(self, routes_by_asn):
+        """Delete per le destinazioni desiderate ancora nel registro di nodi fuori dal nuovo stato"""
+        destinations = {
+            op['destination'] for ops in routes_by_asn.values() for op in ops
+            if op['action'] != srv6_routes.ROUTE_DELETE
+        }
+        with self.lock:
+            routes = {asn: list(installed) for asn, installed in self.routes.items()}
+
+        stale = {}
+        for asn, installed in routes.items():
+            wanted = {op['destination'] for op in routes_by_asn.get(asn, ())}
+            removed = sorted(d for d in installed if d in destinations and d not in wanted)
+            if removed:
+                stale[asn] = [srv6_routes.route(srv6_routes.ROUTE_DELETE, d) for d in removed]
+        return stale
+
+    def record(self, asn, ops):
+        """Operazioni applicate con successo sul nodo"""
+        installed, removed = {}, []
+        for op in ops:
+            if op['action'] == srv6_routes.ROUTE_DELETE:
+                installed.pop(op['destination'], None)
+                removed.append(op['destination'])
+            else:
+                installed[op['destination']] = route_key(op)
+
+        with self.lock:
+            routes = self.routes.setdefault(asn, {})
+            for destination in removed:
+                routes.pop(destination, None)
+            routes.update(installed)
+        self.persist(asn, removed, installed)
+
+    def forget(self, asn, destinations=None):
+        """Stato del nodo non più noto (errore, riavvio, audit): al prossimo install si riprogramma"""
+        with self.lock:
+            routes = self.routes.get(asn, {})
+            if destinations is None:
+                destinations = list(routes)
+            for destination in destinations:
+                routes.pop(destination, None)
+        self.persist(asn, destinations, {})
+
+    def persist(self, asn, removed, installed):
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.executemany(
+                    'DELETE FROM installed_routes WHERE asn = ? AND destination = ?',
+                    [(asn, destination) for destination in removed]
+                )
+                conn.executemany('''
+                    INSERT OR REPLACE INTO installed_routes (asn, destination, route, installed_at)
+                    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                ''', [(asn, destination, key) for destination, key in installed.items()])
+        except sqlite3.Error as e:
+            print(f"Route ledger write error: {e}")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Operazioni sulle route IPv6 in forma strutturata, condivise da controller e agent"""
+
+import srv6_path_pb2
+
+ROUTE_ADD = 'add'
+ROUTE_REPLACE = 'replace'
+ROUTE_DELETE = 'delete'
+
+ACTION_TO_PROTO = {
+    ROUTE_ADD: srv6_path_pb2.ROUTE_ADD,
+    ROUTE_REPLACE: srv6_path_pb2.ROUTE_REPLACE,
+    ROUTE_DELETE: srv6_path_pb2.ROUTE_DELETE,
+}
+ACTION_FROM_PROTO = {value: key for key, value in ACTION_TO_PROTO.items()}
+
+def nexthop(via='', dev='', weight=0, segs=(), encap_mode='encap'):
+    return {'via': via, 'dev': dev, 'weight': weight, 'segs': list(segs), 'encap_mode': encap_mode}
+
+def local_nexthop(action, dev='lo', flavors=(), lblen=0, nflen=0):
+    """Nexthop seg6local: comportamento SRv6 per un SID locale (es. End con flavor next-csid)"""
+    hop = nexthop(dev=dev)
+    hop['local'] = {'action': action, 'flavors': list(flavors), 'lblen': lblen, 'nflen': nflen}
+    return hop
+
+def route(action, destination, nexthops=(), metric=1):
+    return {'action': action, 'destination': destination, 'nexthops': list(nexthops), 'metric': metric}
+
+def nexthop_args(hop):
+    args = []
+    local = hop.get('local')
+    if local:
+        args += ['encap', 'seg6local', 'action', local['action']]
+        if local['flavors']:
+            args += ['flavors', ','.join(local['flavors'])]
+        if local['lblen']:
+            args += ['lblen', str(local['lblen'])]
+        if local['nflen']:
+            args += ['nflen', str(local['nflen'])]
+    elif hop['segs']:
+        args += ['encap', 'seg6', 'mode', hop['encap_mode'] or 'encap', 'segs', ','.join(hop['segs'])]
+    if hop['via']:
+        args += ['via', hop['via']]
+    if hop['dev']:
+        args += ['dev', hop['dev']]
+    return args
+
+def route_args(op):
+    """Argomenti dopo 'ip -6 route' per aggiungere o sostituire la route"""
+    args = [op['action'], op['destination']]
+    if len(op['nexthops']) == 1:
+        args += nexthop_args(op['nexthops'][0])
+        args += ['metric', str(op['metric'])]
+    else:
+        args += ['metric', str(op['metric'])]
+        for hop in op['nexthops']:
+            args += ['nexthop'] + nexthop_args(hop) + ['weight', str(hop['weight'] or 1)]
+    return args
+
+def shell_commands(op):
+    """Comandi shell equivalenti, per i nodi programmati via ssh"""
+    if op['action'] == ROUTE_DELETE:
+        #rimuove tutte le route esistenti una alla volta per quella destinazione
+        return [f"while ip -6 route del {op['destination']} 2>/dev/null; do :; done"]
+    return ["ip -6 route " + ' '.join(route_args(op))]
+
+def batch_lines(op):
+    """Righe per 'ip -6 -force -batch -': un solo processo per tutto il batch"""
+    if op['action'] == ROUTE_DELETE:
+        return [f"route flush exact {op['destination']}"]
+    return ["route " + ' '.join(route_args(op))]
+
+def nexthop_to_proto(hop):
+    message = srv6_path_pb2.RouteNexthop(
+        via=hop['via'], dev=hop['dev'], weight=hop['weight'],
+        segs=hop['segs'], encap_mode=hop['encap_mode']
+    )
+    local = hop.get('local')
+    if local:
+        message.local_action = local['action']
+        message.flavors.extend(local['flavors'])
+        message.lblen = local['lblen']
+        message.nflen = local['nflen']
+    return message
+
+def nexthop_from_proto(message):
+    if message.local_action:
+        return local_nexthop(message.local_action, message.dev, message.flavors, message.lblen, message.nflen)
+    return nexthop(message.via, message.dev, message.weight, message.segs, message.encap_mode)
+
+def to_proto(op):
+    return srv6_path_pb2.RouteOperation(
+        action=ACTION_TO_PROTO[op['action']],
+        destination=op['destination'],
+        nexthops=[nexthop_to_proto(hop) for hop in op['nexthops']],
+        metric=op['metric']
+    )
+
+def from_proto(message):
+    return route(
+        ACTION_FROM_PROTO[message.action],
+        message.destination,
+        [nexthop_from_proto(hop) for hop in message.nexthops],
+        message.metric
+    )
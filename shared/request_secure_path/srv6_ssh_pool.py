@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Pool di sessioni ssh persistenti (ControlMaster) verso i nodi trusted"""
+
+import os
+import subprocess
+import threading
+import time
+
+SSH_CONTROL_DIR = '/tmp/srv6-ssh'
+SSH_CONNECT_TIMEOUT = 5
+SSH_IDLE_TIMEOUT = 300
+SSH_HEALTH_CHECK_INTERVAL = 30
+
+#codice di uscita di ssh per errori di connessione (non del comando remoto)
+SSH_CONNECTION_ERROR = 255
+
+class SSHSessionPool:
+    """Una connessione master autenticata per nodo, riusata da ogni comando.
+
+    I comandi passano dal socket di controllo del master: niente handshake
+    TCP/SSH per comando. Le sessioni inattive vengono chiuse, quelle rotte
+    riaperte al primo errore di connessione.
+    """
+    def __init__(self, user='root', control_dir=SSH_CONTROL_DIR, idle_timeout=SSH_IDLE_TIMEOUT,
+                 health_check_interval=SSH_HEALTH_CHECK_INTERVAL):
+        self.user = user
+        self.control_dir = control_dir
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        #host -> {'lock', 'last_used', 'last_check', 'open'}
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+
+        os.makedirs(self.control_dir, mode=0o700, exist_ok=True)
+        self.janitor = threading.Thread(target=self.evict_idle_loop, name='ssh-janitor', daemon=True)
+        self.janitor.start()
+
+    def control_path(self, host):
+        return os.path.join(self.control_dir, f"{self.user}@{host}")
+
+    def base_args(self, host):
+        return [
+            'ssh',
+            '-o', f"ControlPath={self.control_path(host)}",
+            '-o', f"ConnectTimeout={SSH_CONNECT_TIMEOUT}",
+            '-o', 'StrictHostKeyChecking=no',
+            '-o', 'BatchMode=yes',
+        ]
+
+    def session(self, host):
+        with self.lock:
+            return self.sessions.setdefault(host, {
+                'lock': threading.Lock(),
+                'last_used': 0.0,
+                'last_check': 0.0,
+                'open': False,
+            })
+
+    def check(self, host):
+        result = subprocess.run(
+            self.base_args(host) + ['-O', 'check', f"{self.user}@{host}"],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            timeout=SSH_CONNECT_TIMEOUT
+        )
+        return result.returncode == 0
+
+    def open(self, host):
+        #-f: il master va in background dopo l'autenticazione, quindi niente pipe da attendere
+        result = subprocess.run(
+            self.base_args(host) + [
+                '-o', 'ControlMaster=yes',
+                '-o', f"ControlPersist={self.idle_timeout}s",
+                '-f', '-N', f"{self.user}@{host}"
+            ],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            timeout=SSH_CONNECT_TIMEOUT + 5
+        )
+        return result.returncode == 0
+
+    def close(self, host):
+        try:
+            subprocess.run(
+                self.base_args(host) + ['-O', 'exit', f"{self.user}@{host}"],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                timeout=SSH_CONNECT_TIMEOUT
+            )
+        except subprocess.TimeoutExpired:
+            pass
+
+    def ensure(self, host, force=False):
+        """Garantisce un master vivo per l'host, aprendolo o riaprendolo se serve"""
+        state = self.session(host)
+        with state['lock']:
+            now = time.monotonic()
+            if state['open'] and not force:
+                if now - state['last_check'] < self.health_check_interval:
+                    return True
+                if self.check(host):
+                    state['last_check'] = now
+                    return True
+
+            if state['open'] or force:
+                self.close(host)
+            state['open'] = self.open(host)
+            state['last_check'] = state['last_used'] = time.monotonic()
+            return state['open']
+
+    def run(self, host, script, timeout=10):
+        """Esegue uno script sh sul nodo tramite la sessione del pool"""
+        if not self.ensure(host):
+            return subprocess.CompletedProcess([], SSH_CONNECTION_ERROR, '', f"Cannot connect to {host}")
+
+        args = self.base_args(host) + ['-o', 'ControlMaster=no', f"{self.user}@{host}", 'sh', '-s']
+        result = subprocess.run(args, input=script, capture_output=True, text=True, timeout=timeout)
+
+        if result.returncode == SSH_CONNECTION_ERROR:
+            #master caduto: una riconnessione e un solo nuovo tentativo
+            if self.ensure(host, force=True):
+                result = subprocess.run(args, input=script, capture_output=True, text=True, timeout=timeout)
+
+        self.session(host)['last_used'] = time.monotonic()
+        return result
+
+    def evict_idle(self):
+        now = time.monotonic()
+        with self.lock:
+            hosts = list(self.sessions.items())
+        for host, state in hosts:
+            with state['lock']:
+                if state['open'] and now - state['last_used'] > self.idle_timeout:
+                    self.close(host)
+                    state['open'] = False
+
+    def evict_idle_loop(self):
+        while not self.stopped.wait(self.health_check_interval):
+            try:
+                self.evict_idle()
+            except Exception as e:
+                print(f"SSH pool error: {e}")
+
+    def close_all(self):
+        self.stopped.set()
+        with self.lock:
+            hosts = list(self.sessions.items())
+        for host, state in hosts:
+            with state['lock']:
+                if state['open']:
+                    self.close(host)
+                    state['open'] = False
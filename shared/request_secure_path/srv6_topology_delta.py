@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""Delta di topologia tra due versioni, letti dai log dei database (node_changes, segment_changes)"""
+
+import math
+import sqlite3
+
+from srv6_path_graph import distances
+
+#oltre questo numero di archi nuovi in una vista si invalida tutto invece di calcolare le distanze
+MAX_BOUNDED_ADDITIONS = 16
+
+def complete_log(conn, table, old_generation, new_generation):
+    """True se il log contiene ogni generazione in (old, new]"""
+    if new_generation < old_generation:
+        return False
+    if new_generation == old_generation:
+        return True
+    count = conn.execute(
+        f'SELECT COUNT(DISTINCT generation) FROM {table} WHERE generation > ? AND generation <= ?',
+        (old_generation, new_generation)
+    ).fetchone()[0]
+    return count == new_generation - old_generation
+
+def load_delta(db_trusted, db_topology, old_version, new_version):
+    """Delta tra due versioni (trusted, topology); None se serve una ricarica completa"""
+    if old_version is None or None in old_version or None in new_version:
+        return None
+
+    try:
+        with sqlite3.connect(db_trusted) as conn:
+            conn.row_factory = sqlite3.Row
+            if not complete_log(conn, 'node_changes', old_version[0], new_version[0]):
+                return None
+            asns = [row[0] for row in conn.execute(
+                'SELECT DISTINCT asn FROM node_changes WHERE generation > ? AND generation <= ?',
+                (old_version[0], new_version[0])
+            )]
+            nodes, neighbors = {}, {}
+            for asn in asns:
+                row = conn.execute('SELECT * FROM nodes WHERE router_bgp = ?', (asn,)).fetchone()
+                nodes[asn] = dict(row) if row else None
+                neighbors[asn] = [
+                    {
+                        'neighbor_asn': nbr['neighbor_asn'],
+                        'neighbor_ip': nbr['neighbor_ip'],
+                        'interface': nbr['interface']
+                    }
+                    for nbr in conn.execute('SELECT * FROM bgp_neighbors WHERE local_asn = ?', (asn,))
+                ]
+
+        with sqlite3.connect(db_topology) as conn:
+            if not complete_log(conn, 'segment_changes', old_version[1], new_version[1]):
+                return None
+            #effetto netto per segmento: conta l'ultima modifica
+            net = {}
+            for as_a, as_b, added in conn.execute('''
+                SELECT as_a, as_b, added FROM segment_changes
+                WHERE generation > ? AND generation <= ? ORDER BY generation
+            ''', (old_version[1], new_version[1])):
+                net[(as_a, as_b)] = bool(added)
+    except sqlite3.Error:
+        #database senza log (versioni precedenti)
+        return None
+
+    return TopologyDelta(
+        old_version, new_version, nodes, neighbors,
+        [segment for segment, added in net.items() if added],
+        [segment for segment, added in net.items() if not added]
+    )
+
+def has_edge(graph, as_a, as_b, only_trusted):
+    a, b = graph.index.get(as_a), graph.index.get(as_b)
+    if a is None or b is None:
+        return False
+    targets, trusted, start, end = graph.adjacency(a)
+    for edge in range(start, end):
+        if targets[edge] == b:
+            return not only_trusted or bool(trusted[edge])
+    return False
+
+def incident_edges(graph, asn):
+    node = graph.index.get(asn)
+    if node is None:
+        return []
+    targets, _, start, end = graph.adjacency(node)
+    return [(asn, graph.asns[targets[edge]]) for edge in range(start, end)]
+
+class TopologyDelta:
+    """Nodi cambiati (riga e vicini BGP) e segmenti aggiunti/rimossi tra due versioni"""
+    def __init__(self, old_version, new_version, nodes, neighbors, added, removed):
+        self.old_version = old_version
+        self.new_version = new_version
+        #asn -> riga del nodo, None se non più registrato
+        self.nodes = nodes
+        self.neighbors = neighbors
+        self.added = added
+        self.removed = removed
+
+    @property
+    def changed_asns(self):
+        return set(self.nodes)
+
+    def __str__(self):
+        return f"{len(self.nodes)} node(s), +{len(self.added)}/-{len(self.removed)} segment(s)"
+
+    def invalidator(self, old_graph, new_graph):
+        return PathInvalidator(self.changed_asns, self.added, self.removed, old_graph, new_graph)
+
+class PathInvalidator:
+    """Decide quali insiemi di path calcolati sulla versione vecchia restano validi sulla nuova.
+
+    - un path che passa da un nodo cambiato o da un arco sparito è da ricalcolare;
+    - un arco nuovo (u, v) può solo aggiungere path che lo usano, lunghi almeno
+      d(s, u) + 1 + d(v, t): se il k-esimo path è più corto, l'insieme non cambia.
+    """
+    def __init__(self, changed_asns, added, removed, old_graph, new_graph):
+        self.changed_asns = changed_asns
+        self.graph = new_graph
+        self.added = {}
+        self.removed = {}
+        self.hops = {}
+
+        candidates = set(added) | set(removed)
+        for asn in changed_asns:
+            candidates.update(incident_edges(old_graph, asn))
+            candidates.update(incident_edges(new_graph, asn))
+
+        for only_trusted in (True, False):
+            self.added[only_trusted] = set()
+            self.removed[only_trusted] = set()
+            for as_a, as_b in candidates:
+                before = has_edge(old_graph, as_a, as_b, only_trusted)
+                after = has_edge(new_graph, as_a, as_b, only_trusted)
+                if before and not after:
+                    self.removed[only_trusted].add(frozenset((as_a, as_b)))
+                elif after and not before:
+                    self.added[only_trusted].add(frozenset((as_a, as_b)))
+
+    def distances(self, only_trusted, asn):
+        key = (only_trusted, asn)
+        if key not in self.hops:
+            self.hops[key] = distances(self.graph.view(only_trusted), asn)
+        return self.hops[key]
+
+    def __call__(self, key, results):
+        """True se l'insieme di path `results` per la chiave di cache `key` va ricalcolato"""
+        source_asn, dest_asn, only_trusted, max_paths, disjoint = key[:5]
+        only_trusted = bool(only_trusted)
+        if source_asn in self.changed_asns or dest_asn in self.changed_asns:
+            return True
+
+        paths = [path for path, _ in results]
+        for path in paths:
+            if any(asn in self.changed_asns for asn in path):
+                return True
+            if self.removed[only_trusted] and any(
+                frozenset(link) in self.removed[only_trusted] for link in zip(path, path[1:])
+            ):
+                return True
+
+        added = self.added[only_trusted]
+        if not added:
+            return False
+        if disjoint or len(added) > MAX_BOUNDED_ADDITIONS:
+            return True
+
+        #con meno di k path qualsiasi path nuovo entra nella lista
+        worst = len(paths[-1]) - 1 if len(paths) >= max_paths else math.inf
+        for link in added:
+            as_u, as_v = tuple(link)
+            from_u, from_v = self.distances(only_trusted, as_u), self.distances(only_trusted, as_v)
+            bound = min(
+                from_u.get(source_asn, math.inf) + 1 + from_v.get(dest_asn, math.inf),
+                from_v.get(source_asn, math.inf) + 1 + from_u.get(dest_asn, math.inf)
+            )
+            if bound <= worst:
+                return True
+        return False
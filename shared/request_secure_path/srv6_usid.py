@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""SID compressi (uSID / NEXT-C-SID): più micro-SID di nodo in un container da 128 bit"""
+
+import ipaddress
+
+def node_format(node):
+    """(blocco, block-len, node id, node-len) del locator di un nodo trusted, None se non comprimibile"""
+    block_len = node.get('locator_block_len') or 0
+    node_len = node.get('locator_node_len') or 0
+    if not block_len or not node_len or block_len + node_len > 128:
+        return None
+    try:
+        network = ipaddress.IPv6Network(node['locator'], strict=False)
+    except (KeyError, ValueError):
+        return None
+    if network.prefixlen > block_len + node_len:
+        return None
+
+    address = int(network.network_address)
+    block = address >> (128 - block_len)
+    node_id = (address >> (128 - block_len - node_len)) & ((1 << node_len) - 1)
+    #id 0 nel container indica la fine dei micro-SID
+    if not node_id:
+        return None
+    return block, block_len, node_id, node_len
+
+def usid_prefix(node):
+    """Prefisso del micro-SID del nodo (blocco + node id), per la route seg6local"""
+    block, block_len, node_id, node_len = node_format(node)
+    address = (block << (128 - block_len)) | (node_id << (128 - block_len - node_len))
+    return f"{ipaddress.IPv6Address(address)}/{block_len + node_len}"
+
+def pack_usids(nodes):
+    """Container per i nodi in ordine: blocco | uN1 | uN2 | ... con gli slot liberi a zero (fine).
+
+    Un nodo con blocco o lunghezze diverse dal precedente apre un nuovo container.
+    None se un nodo non ha un formato di locator comprimibile.
+    """
+    containers = []
+    current, ids = None, []
+
+    def flush():
+        if current is None:
+            return
+        block, block_len, node_len = current
+        address = block << (128 - block_len)
+        for slot, node_id in enumerate(ids, 1):
+            address |= node_id << (128 - block_len - slot * node_len)
+        containers.append(str(ipaddress.IPv6Address(address)))
+
+    for node in nodes:
+        fmt = node_format(node)
+        if fmt is None:
+            return None
+        block, block_len, node_id, node_len = fmt
+        slots = (128 - block_len) // node_len
+        if current == (block, block_len, node_len) and len(ids) < slots:
+            ids.append(node_id)
+        else:
+            flush()
+            current, ids = (block, block_len, node_len), [node_id]
+    flush()
+    return containers